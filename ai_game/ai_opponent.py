@@ -6,19 +6,44 @@ Prediction:
   Each model outputs predict_proba() over classes {1, 2, 3}.
   Each model's probability vector is weighted by its max confidence value.
   The weighted sum across models determines the final chosen action.
+  Because player_move is the only feature, the vote for each of the three
+  possible inputs is computed once per fit and cached in a decision table.
 
 Logs per-model and ensemble confidences after every prediction.
+
+Incremental mode (``incremental=True``):
+  The only input feature is ``player_move`` ∈ {1, 2, 3}, so the full training
+  history is summarised exactly by a 3×3 table of (player_move, ai_move)
+  counts. Each new round updates one cell in O(1) and the three ensemble
+  members are evaluated in closed form from that table:
+    rf — per-move class frequencies (what a fully grown tree learns)
+    nn — the same frequencies with light additive smoothing (the log-loss
+         optimum the MLP converges to on a single categorical input)
+    nb — Gaussian naive Bayes computed from the count sufficient statistics
+         (identical to GaussianNB.fit on the expanded history)
 """
 
 import os
+import pickle
 import random
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 
 from .fighter import Fighter
+from .history_reader import HistoryReader
 
 LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "logs", "game_logs.csv")
+HISTORY_COLUMNS = ["player_move", "ai_move"]
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs")
+SNAPSHOT_VERSION = 1
+# Full mode: refit at startup once this fraction of rows is newer than the models
+SNAPSHOT_REFIT_FRACTION = 0.1
+
+# GaussianNB default; keeps the closed-form variances in step with sklearn's
+NB_VAR_SMOOTHING = 1e-9
+# Additive smoothing applied to the incremental "nn" frequencies
+NN_SMOOTHING = 0.5
 
 
 class AdaptiveAIOpponent(Fighter):
@@ -26,61 +51,368 @@ class AdaptiveAIOpponent(Fighter):
 
     CLASSES = [1, 2, 3]
 
-    def __init__(self, name: str = "AI"):
+    def __init__(self, name: str = "AI", incremental: bool = False):
         super().__init__(name, health=100, mp=50)
 
-        from sklearn.ensemble import RandomForestClassifier
-        from sklearn.neural_network import MLPClassifier
-        from sklearn.naive_bayes import GaussianNB
-
-        self.rf_model = RandomForestClassifier(n_estimators=10, random_state=42)
-        self.nn_model = MLPClassifier(hidden_layer_sizes=(10,), max_iter=1000, random_state=42)
-        self.nb_model = GaussianNB()
+        self.incremental = incremental
+        # Created on first fit (see _ensure_models) so that starting from a
+        # snapshot does not pay for importing sklearn
+        self.rf_model = self.nn_model = self.nb_model = None
+        self._models_blob: Optional[bytes] = None
 
+        # Training history (full mode). Rows loaded in bulk (log / snapshot)
+        # stay as arrays; rows added during play are appended to the lists.
+        # Incremental mode keeps only the count table below.
+        self._base_X = np.zeros(0, dtype=np.int64)
+        self._base_y = np.zeros(0, dtype=np.int64)
         self._train_X: list = []
         self._train_y: list = []
         self._models_fitted: bool = False
+        # History rows the live decision table was built from
+        self.trained_rows: int = 0
+
+        # Incremental mode: counts[i, j] = rounds with player_move CLASSES[i]
+        # answered by ai_move CLASSES[j]
+        self._counts = np.zeros((len(self.CLASSES), len(self.CLASSES)))
+
+        # player_move -> (chosen, ensemble_confidence, last_confidences);
+        # rebuilt after every fit so predict_move never touches the models
+        self._decision_table: dict = {}
+
+        # HistoryReader checkpoint of LOG_FILE the history corresponds to
+        # (set by load_history)
+        self._log_checkpoint: Optional[dict] = None
 
         # Confidence logging (populated after each predict_move call)
         self.ensemble_confidence: float = 0.0
         self.last_confidences: dict = {"rf": 0.0, "nn": 0.0, "nb": 0.0}
 
+    @property
+    def history_rows(self) -> int:
+        if self.incremental:
+            return self.trained_rows
+        return len(self._base_X) + len(self._train_X)
+
     # ------------------------------------------------------------------
     # Training
     # ------------------------------------------------------------------
 
-    def load_history(self):
-        """Load past game_logs.csv to warm-up the ensemble."""
-        import pandas as pd
+    def load_history(
+        self, use_snapshot: bool = True, store=None, last_segments: Optional[int] = None
+    ):
+        """
+        Load past game_logs.csv to warm-up the ensemble.
+
+        With `use_snapshot`, the snapshot written by a previous run is
+        restored and only log rows appended since then are read. A missing,
+        stale or unreadable snapshot falls back to a full rebuild from the
+        log, after which a fresh snapshot is saved.
+
+        With a `RoundStore`, the history is instead the store's memory-mapped
+        player_move / ai_move columns (saved matches only; no snapshot).
+
+        With `last_segments`, only the newest K segments of the segmented
+        log (segment_log.py) are read (no snapshot).
+        """
+        if store is not None:
+            self._load_from_store(store)
+            return
+        if last_segments is not None:
+            self._load_from_segments(last_segments)
+            return
         if not os.path.exists(LOG_FILE):
             return
+        if use_snapshot and self._load_snapshot():
+            return
         try:
-            df = pd.read_csv(LOG_FILE)
-            if "player_move" in df.columns and "ai_move" in df.columns and len(df) > 1:
-                self._train_X = df[["player_move"]].values.tolist()
-                self._train_y = df["ai_move"].values.tolist()
-                self._fit_models()
+            self._rebuild_from_log()
         except Exception:
-            pass
+            return
+        if use_snapshot:
+            self._save_snapshot()
+
+    def _rebuild_from_log(self):
+        reader = HistoryReader(LOG_FILE, HISTORY_COLUMNS)
+        rows = reader.read()
+        self._set_history(rows["player_move"], rows["ai_move"])
+        self._log_checkpoint = reader.checkpoint()
+
+    def _load_from_store(self, store):
+        self._set_history(
+            np.asarray(store.column("player_move"), dtype=np.int64),
+            np.asarray(store.column("ai_move"), dtype=np.int64),
+        )
+
+    def _load_from_segments(self, last: int):
+        from .segment_log import read_rows
+
+        df = read_rows(last=last, columns=["player_move", "ai_move"])
+        self._set_history(
+            df["player_move"].to_numpy(dtype=np.int64),
+            df["ai_move"].to_numpy(dtype=np.int64),
+        )
+
+    def _set_history(self, X: np.ndarray, y: np.ndarray):
+        if len(X) > 1:
+            self._base_X, self._base_y = X, y
+            self._train_X, self._train_y = [], []
+            if self.incremental:
+                self._rebuild_counts()
+            else:
+                self._fit_models()
+
+    def _history(self, n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """First `n_rows` of the training history as (X[n, 1], y[n])."""
+        n_extra = max(0, n_rows - len(self._base_X))
+        X = np.concatenate([
+            self._base_X[:n_rows],
+            np.asarray(self._train_X[:n_extra], dtype=np.int64).reshape(-1),
+        ])
+        y = np.concatenate([
+            self._base_y[:n_rows],
+            np.asarray(self._train_y[:n_extra], dtype=np.int64).reshape(-1),
+        ])
+        return X.reshape(-1, 1), y
+
+    def _rebuild_counts(self):
+        """Recompute the incremental count table from the stored history, then drop it."""
+        X, y = self._history(len(self._base_X) + len(self._train_X))
+        X = X.reshape(-1)
+        self._counts = self._count_table(X, y)
+        self._models_fitted = self._counts.sum() >= 2
+        self.trained_rows = len(X)
+        self._base_X = self._base_y = np.zeros(0, dtype=np.int64)
+        self._train_X, self._train_y = [], []
+        self._rebuild_decision_table()
+
+    def _count_table(self, X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        counts = np.zeros((len(self.CLASSES), len(self.CLASSES)))
+        for i, player_move in enumerate(self.CLASSES):
+            for j, ai_move in enumerate(self.CLASSES):
+                counts[i, j] = np.count_nonzero((X == player_move) & (y == ai_move))
+        return counts
+
+    def _count(self, player_move: int, ai_move: int):
+        if player_move in self.CLASSES and ai_move in self.CLASSES:
+            self._counts[
+                self.CLASSES.index(player_move), self.CLASSES.index(ai_move)
+            ] += 1.0
+
+    def _ensure_models(self):
+        """Create the sklearn models (or unpickle them from a snapshot)."""
+        if self.rf_model is not None:
+            return
+        if self._models_blob is not None:
+            try:
+                self.rf_model, self.nn_model, self.nb_model = pickle.loads(self._models_blob)
+                return
+            except Exception:
+                pass
+            finally:
+                self._models_blob = None
+
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.neural_network import MLPClassifier
+        from sklearn.naive_bayes import GaussianNB
+
+        self.rf_model = RandomForestClassifier(n_estimators=10, random_state=42)
+        self.nn_model = MLPClassifier(hidden_layer_sizes=(10,), max_iter=1000, random_state=42)
+        self.nb_model = GaussianNB()
 
     def _fit_models(self):
-        if len(self._train_X) < 2:
+        if self.history_rows < 2:
             return
-        X = np.array(self._train_X)
-        y = np.array(self._train_y)
-        try:
-            self.rf_model.fit(X, y)
-            self.nn_model.fit(X, y)
-            self.nb_model.fit(X, y)
-            self._models_fitted = True
-        except Exception:
-            self._models_fitted = False
+        self.publish_snapshot(self.fit_snapshot(self.history_rows))
 
-    def update_and_train(self, player_move: int, ai_move: int):
-        """Add one data point and retrain models online."""
+    def fit_snapshot(self, n_rows: int) -> dict:
+        """
+        Fit fresh copies of the models on the first `n_rows` history rows.
+
+        Does not modify the live decision table, so it is safe to call from
+        a worker thread while the game keeps predicting; pass the result to
+        `publish_snapshot` to make it live.
+        """
+        from sklearn.base import clone
+
+        self._ensure_models()
+        X, y = self._history(n_rows)
+        models = tuple(clone(m) for m in (self.rf_model, self.nn_model, self.nb_model))
+        fitted = False
+        if n_rows >= 2:
+            try:
+                for model in models:
+                    model.fit(X, y)
+                fitted = True
+            except Exception:
+                fitted = False
+        table = self._build_decision_table(models) if fitted else {}
+        return {"models": models, "fitted": fitted, "table": table, "n_rows": n_rows}
+
+    def publish_snapshot(self, snapshot: dict):
+        """Swap in a snapshot produced by `fit_snapshot`."""
+        self.rf_model, self.nn_model, self.nb_model = snapshot["models"]
+        self._decision_table = snapshot["table"]
+        self._models_fitted = snapshot["fitted"]
+        self.trained_rows = snapshot["n_rows"]
+
+    def add_round(self, player_move: int, ai_move: int):
+        """Append one round to the training history without refitting."""
         self._train_X.append([player_move])
         self._train_y.append(ai_move)
-        self._fit_models()
+
+    def update_and_train(self, player_move: int, ai_move: int):
+        """Add one data point and retrain models online.
+
+        In incremental mode this is O(1) in time and memory: only the count
+        table is updated, the round itself is not kept.
+        """
+        if self.incremental:
+            self._count(player_move, ai_move)
+            self._models_fitted = self._counts.sum() >= 2
+            self.trained_rows += 1
+            self._rebuild_decision_table()
+        else:
+            self.add_round(player_move, ai_move)
+            self._fit_models()
+
+    # ------------------------------------------------------------------
+    # Snapshots — fitted state persisted next to the log offset it covers
+    # ------------------------------------------------------------------
+
+    def _snapshot_path(self) -> str:
+        mode = "incremental" if self.incremental else "full"
+        return os.path.join(SNAPSHOT_DIR, f"ai_snapshot_{mode}.pkl")
+
+    def _save_snapshot(self):
+        """Persist the fitted state; only valid right after load_history."""
+        if self._log_checkpoint is None:
+            return
+
+        snap = {
+            "version": SNAPSHOT_VERSION,
+            "incremental": self.incremental,
+            "log": self._log_checkpoint,
+            "fitted": self._models_fitted,
+            "trained_rows": self.trained_rows,
+            "table": self._decision_table,
+        }
+        if self.incremental:
+            snap["counts"] = self._counts
+        else:
+            X, y = self._history(self.history_rows)
+            snap["X"] = X.reshape(-1).astype(np.int8)
+            snap["y"] = y.astype(np.int8)
+            models = (self.rf_model, self.nn_model, self.nb_model)
+            snap["models"] = (
+                pickle.dumps(models) if self.rf_model is not None else self._models_blob
+            )
+
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        path = self._snapshot_path()
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                pickle.dump(snap, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _load_snapshot(self) -> bool:
+        """Restore from disk and read only newer log rows. False → rebuild."""
+        try:
+            with open(self._snapshot_path(), "rb") as fh:
+                snap = pickle.load(fh)
+            if (
+                snap.get("version") != SNAPSHOT_VERSION
+                or snap.get("incremental") != self.incremental
+            ):
+                return False
+            log = snap["log"]
+            reader = HistoryReader(LOG_FILE, HISTORY_COLUMNS)
+            if not reader.restore(log):
+                return False
+            tail = reader.read()
+            if reader.reset:
+                return False
+            tail_X, tail_y = tail["player_move"], tail["ai_move"]
+        except Exception:
+            return False
+
+        self._decision_table = snap["table"]
+        self._models_fitted = snap["fitted"]
+        self.trained_rows = snap["trained_rows"]
+        self._log_checkpoint = reader.checkpoint()
+        self._train_X, self._train_y = [], []
+        if self.incremental:
+            self._counts = np.array(snap["counts"], dtype=float)
+            self._counts += self._count_table(tail_X, tail_y)
+            self._models_fitted = self._counts.sum() >= 2
+            self.trained_rows = int(self._counts.sum())
+            if len(tail_X):
+                self._rebuild_decision_table()
+        else:
+            self._models_blob = snap["models"]
+            self._base_X = np.concatenate([snap["X"].astype(np.int64), tail_X])
+            self._base_y = np.concatenate([snap["y"].astype(np.int64), tail_y])
+            # Models are refit every round anyway; only refit here when the
+            # snapshot has fallen well behind the log
+            behind = self.history_rows - self.trained_rows
+            if behind > SNAPSHOT_REFIT_FRACTION * self.trained_rows:
+                self._fit_models()
+        if reader.offset != log["offset"]:
+            self._save_snapshot()
+        return True
+
+    # ------------------------------------------------------------------
+    # Incremental mode — closed-form ensemble members
+    # ------------------------------------------------------------------
+
+    def _count_probas(self, player_move: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(rf, nn, nb) probability vectors derived from the count table."""
+        n_classes = len(self.CLASSES)
+        uniform = np.ones(n_classes) / n_classes
+        class_totals = self._counts.sum(axis=0)
+        prior = class_totals / class_totals.sum()
+
+        if player_move in self.CLASSES:
+            row = self._counts[self.CLASSES.index(player_move)]
+        else:
+            row = np.zeros(n_classes)
+        # Unseen inputs fall back to the class prior, like a tree leaf would
+        rf_proba = row / row.sum() if row.sum() > 0 else prior
+
+        seen = class_totals > 0
+        smoothed = row + NN_SMOOTHING * seen
+        nn_proba = smoothed / smoothed.sum() if smoothed.sum() > 0 else uniform
+
+        return rf_proba, nn_proba, self._nb_proba(player_move, class_totals)
+
+    def _nb_proba(self, player_move: int, class_totals: np.ndarray) -> np.ndarray:
+        """GaussianNB posterior from count sufficient statistics."""
+        xs = np.array(self.CLASSES, dtype=float)
+        n = class_totals.sum()
+        seen = class_totals > 0
+        # Global feature variance, used by sklearn for var_smoothing
+        row_totals = self._counts.sum(axis=1)
+        global_mean = float(xs @ row_totals) / n
+        global_var = float((xs ** 2) @ row_totals) / n - global_mean ** 2
+        epsilon = NB_VAR_SMOOTHING * max(global_var, 0.0)
+
+        totals = np.where(seen, class_totals, 1.0)
+        means = (xs @ self._counts) / totals
+        variances = np.maximum((xs ** 2) @ self._counts / totals - means ** 2, 0.0) + epsilon
+        if np.any(variances[seen] <= 0.0):
+            return np.ones(len(self.CLASSES)) / len(self.CLASSES)
+
+        jll = np.full(len(self.CLASSES), -np.inf)
+        jll[seen] = (
+            np.log(class_totals[seen] / n)
+            - 0.5 * np.log(2.0 * np.pi * variances[seen])
+            - 0.5 * (player_move - means[seen]) ** 2 / variances[seen]
+        )
+        jll -= jll.max()
+        proba = np.exp(jll)
+        return proba / proba.sum()
 
     # ------------------------------------------------------------------
     # Prediction — confidence-weighted voting
@@ -93,6 +425,9 @@ class AdaptiveAIOpponent(Fighter):
         Uses confidence-weighted voting:
           weight_i = max(predict_proba_i)
           final_proba = sum_i(weight_i * proba_i) / sum_i(weight_i)
+
+        The vote for every move in CLASSES is precomputed after each fit
+        (see `_rebuild_decision_table`), so this is a dict lookup.
         """
         if not self._models_fitted:
             chosen = random.choice(self.CLASSES)
@@ -100,28 +435,53 @@ class AdaptiveAIOpponent(Fighter):
             self.last_confidences = {"rf": 33.3, "nn": 33.3, "nb": 33.3}
             return chosen, 33.3
 
-        X_test = np.array([[player_move]])
+        entry = self._decision_table.get(player_move)
+        if entry is None:
+            # Off-table input (not a valid move); vote on the spot
+            entry = self._vote(*self._ensemble_probas([player_move])[0])
+        chosen, self.ensemble_confidence, confidences = entry
+        self.last_confidences = dict(confidences)
+        return chosen, self.ensemble_confidence
 
-        def safe_proba(model) -> np.ndarray:
-            """Get probability vector aligned to CLASSES [1,2,3]."""
-            uniform = np.ones(len(self.CLASSES)) / len(self.CLASSES)
-            try:
-                raw = model.predict_proba(X_test)[0]
-                known = list(model.classes_)
-                aligned = np.zeros(len(self.CLASSES))
-                for idx, cls in enumerate(self.CLASSES):
-                    if cls in known:
-                        aligned[idx] = raw[known.index(cls)]
-                if np.any(np.isnan(aligned)) or np.sum(aligned) == 0:
-                    return uniform
-                return aligned
-            except Exception:
-                return uniform
+    def _rebuild_decision_table(self):
+        """Precompute the weighted vote for every possible player move."""
+        self._decision_table = self._build_decision_table() if self._models_fitted else {}
 
-        rf_proba = safe_proba(self.rf_model)
-        nn_proba = safe_proba(self.nn_model)
-        nb_proba = safe_proba(self.nb_model)
+    def _build_decision_table(self, models: tuple = None) -> dict:
+        probas = self._ensemble_probas(self.CLASSES, models)
+        return {
+            player_move: self._vote(rf_proba, nn_proba, nb_proba)
+            for player_move, (rf_proba, nn_proba, nb_proba) in zip(self.CLASSES, probas)
+        }
+
+    def _ensemble_probas(self, player_moves: list, models: tuple = None) -> list:
+        """One (rf, nn, nb) tuple of aligned probability vectors per input."""
+        if self.incremental:
+            return [self._count_probas(m) for m in player_moves]
+        if models is None:
+            models = (self.rf_model, self.nn_model, self.nb_model)
+        X = np.array([[m] for m in player_moves])
+        rf, nn, nb = (self._aligned_proba(model, X) for model in models)
+        return list(zip(rf, nn, nb))
+
+    def _aligned_proba(self, model, X: np.ndarray) -> np.ndarray:
+        """predict_proba rows aligned to CLASSES [1,2,3] (uniform on failure)."""
+        uniform = np.ones(len(self.CLASSES)) / len(self.CLASSES)
+        try:
+            raw = model.predict_proba(X)
+        except Exception:
+            return np.tile(uniform, (len(X), 1))
+        known = list(model.classes_)
+        aligned = np.zeros((len(X), len(self.CLASSES)))
+        for idx, cls in enumerate(self.CLASSES):
+            if cls in known:
+                aligned[:, idx] = raw[:, known.index(cls)]
+        bad = np.any(np.isnan(aligned), axis=1) | (np.sum(aligned, axis=1) == 0)
+        aligned[bad] = uniform
+        return aligned
 
+    def _vote(self, rf_proba, nn_proba, nb_proba) -> Tuple[int, float, dict]:
+        """Confidence-weighted vote → (chosen, ensemble_conf_pct, per-model conf)."""
         # Per-model confidence = max predicted probability
         rf_w = float(np.max(rf_proba))
         nn_w = float(np.max(nn_proba))
@@ -135,10 +495,9 @@ class AdaptiveAIOpponent(Fighter):
         best_idx = int(np.argmax(weighted))
         chosen = self.CLASSES[best_idx]
 
-        self.ensemble_confidence = round(float(np.max(weighted)) * 100, 2)
-        self.last_confidences = {
+        confidences = {
             "rf": round(rf_w * 100, 2),
             "nn": round(nn_w * 100, 2),
             "nb": round(nb_w * 100, 2),
         }
-        return chosen, self.ensemble_confidence
+        return chosen, round(float(np.max(weighted)) * 100, 2), confidences
@@ -0,0 +1,346 @@
+"""Vectorised batch battle simulator.
+
+Runs N independent matches at once with HP/MP held in NumPy arrays, applying
+the same rules as `Fighter` and `BattleEngine.execute_player_move`:
+  - the player side acts first, then the AI side; both act every round
+  - Attack  (1): MP ≥ 10 → MP −10, damage 10–20, otherwise nothing happens
+  - Special (2): MP ≥ 20 → MP −20, damage 25–35, otherwise nothing happens
+  - Regen   (3): MP +5, capped at the maximum
+  - after both moves: player HP 0 → AI wins, else AI HP 0 → player wins
+Finished matches are dropped from the working arrays, so each step only
+touches live matches. Matches still running after `max_rounds` are draws.
+
+Policies are vectorised callables:
+    policy(hp, mp, opp_hp, opp_mp, opp_move, rng) -> moves (1/2/3 per match)
+`opp_move` is the opponent's previous move for the player side (0 in round 1)
+and the player's move in the current round for the AI side, which is what
+`AdaptiveAIOpponent.predict_move` sees.
+
+Usage:
+    python -m ai_game.batch_sim --matches 100000
+    python -m ai_game.batch_sim --player greedy --ai ensemble
+    python -m ai_game.batch_sim --check        # compare against Fighter
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from .fighter import MOVE_ATTACK, MOVE_SPECIAL, MOVE_REGEN, MOVE_MP_COST
+
+MAX_HP = 100
+MAX_MP = 50
+MAX_ROUNDS = 200
+
+Policy = Callable[..., np.ndarray]
+
+
+# ---------------------------------------------------------------------------
+# Policies
+# ---------------------------------------------------------------------------
+
+
+def random_policy(hp, mp, opp_hp, opp_mp, opp_move, rng) -> np.ndarray:
+    """Uniform over all three moves, affordable or not (like the ML AI)."""
+    return rng.integers(1, 4, size=hp.shape[0])
+
+
+def valid_random_policy(hp, mp, opp_hp, opp_mp, opp_move, rng) -> np.ndarray:
+    """Uniform over the moves the GUI/CLI would accept at the current MP."""
+    n_valid = (
+        1
+        + (mp >= MOVE_MP_COST[MOVE_ATTACK]).astype(np.int64)
+        + (mp >= MOVE_MP_COST[MOVE_SPECIAL]).astype(np.int64)
+    )
+    pick = (rng.random(hp.shape[0]) * n_valid).astype(np.int64)
+    return np.array([MOVE_REGEN, MOVE_ATTACK, MOVE_SPECIAL])[pick]
+
+
+def greedy_policy(hp, mp, opp_hp, opp_mp, opp_move, rng) -> np.ndarray:
+    """Strongest affordable move."""
+    return np.where(
+        mp >= MOVE_MP_COST[MOVE_SPECIAL],
+        MOVE_SPECIAL,
+        np.where(mp >= MOVE_MP_COST[MOVE_ATTACK], MOVE_ATTACK, MOVE_REGEN),
+    )
+
+
+def ensemble_policy(ai) -> Policy:
+    """
+    Freeze an `AdaptiveAIOpponent`'s current decision table into a policy.
+    Opponent moves the table does not cover are answered at random.
+    """
+    lut = np.zeros(4, dtype=np.int64)
+    for move in (1, 2, 3):
+        entry = ai._decision_table.get(move) if ai._models_fitted else None
+        lut[move] = entry[0] if entry else 0
+
+    def policy(hp, mp, opp_hp, opp_mp, opp_move, rng) -> np.ndarray:
+        moves = lut[np.clip(opp_move, 0, 3)]
+        missing = moves == 0
+        if missing.any():
+            moves[missing] = rng.integers(1, 4, size=int(missing.sum()))
+        return moves
+
+    return policy
+
+
+POLICIES = {
+    "random": random_policy,
+    "valid": valid_random_policy,
+    "greedy": greedy_policy,
+}
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+
+def _apply_moves(moves: np.ndarray, mp: np.ndarray, rng) -> np.ndarray:
+    """Apply moves in place on `mp`; return damage per match."""
+    # Both damage ranges are 11 wide: 10–20 and 25–35
+    roll = rng.integers(0, 11, size=moves.shape[0])
+    attack = (moves == MOVE_ATTACK) & (mp >= MOVE_MP_COST[MOVE_ATTACK])
+    special = (moves == MOVE_SPECIAL) & (mp >= MOVE_MP_COST[MOVE_SPECIAL])
+    regen = moves == MOVE_REGEN
+    mp -= MOVE_MP_COST[MOVE_ATTACK] * attack + MOVE_MP_COST[MOVE_SPECIAL] * special
+    np.minimum(mp + 5 * regen, MAX_MP, out=mp)
+    return np.where(attack, 10 + roll, np.where(special, 25 + roll, 0))
+
+
+def simulate(
+    n_matches: int,
+    player_policy: Policy = valid_random_policy,
+    ai_policy: Policy = random_policy,
+    seed: Optional[int] = None,
+    max_rounds: int = MAX_ROUNDS,
+    record_moves: bool = False,
+) -> dict:
+    """
+    Play `n_matches` matches to completion.
+
+    Returns a dict of per-match arrays:
+      winner (0=player, 1=AI, -1=draw), rounds,
+      player_damage, ai_damage, player_hp, ai_hp, player_mp, ai_mp
+    plus, with `record_moves`, flat `player_moves` / `ai_moves` arrays of
+    every round played (the (player_move, ai_move) pairs the ensemble trains on).
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_matches)
+    p_hp = np.full(n_matches, MAX_HP, dtype=np.int64)
+    a_hp = np.full(n_matches, MAX_HP, dtype=np.int64)
+    p_mp = np.full(n_matches, MAX_MP, dtype=np.int64)
+    a_mp = np.full(n_matches, MAX_MP, dtype=np.int64)
+    p_dealt = np.zeros(n_matches, dtype=np.int64)
+    a_dealt = np.zeros(n_matches, dtype=np.int64)
+    last_ai = np.zeros(n_matches, dtype=np.int64)
+
+    out = {
+        "winner": np.full(n_matches, -1, dtype=np.int8),
+        "rounds": np.full(n_matches, max_rounds, dtype=np.int32),
+        "player_damage": np.zeros(n_matches, dtype=np.int64),
+        "ai_damage": np.zeros(n_matches, dtype=np.int64),
+        "player_hp": np.zeros(n_matches, dtype=np.int64),
+        "ai_hp": np.zeros(n_matches, dtype=np.int64),
+        "player_mp": np.zeros(n_matches, dtype=np.int64),
+        "ai_mp": np.zeros(n_matches, dtype=np.int64),
+    }
+    moves_log = []
+
+    def retire(mask, winner, rnd):
+        done_ids = ids[mask]
+        out["winner"][done_ids] = winner
+        out["rounds"][done_ids] = rnd
+        out["player_damage"][done_ids] = p_dealt[mask]
+        out["ai_damage"][done_ids] = a_dealt[mask]
+        out["player_hp"][done_ids] = p_hp[mask]
+        out["ai_hp"][done_ids] = a_hp[mask]
+        out["player_mp"][done_ids] = p_mp[mask]
+        out["ai_mp"][done_ids] = a_mp[mask]
+
+    for rnd in range(1, max_rounds + 1):
+        if ids.size == 0:
+            break
+
+        p_moves = np.asarray(player_policy(p_hp, p_mp, a_hp, a_mp, last_ai, rng))
+        dmg = _apply_moves(p_moves, p_mp, rng)
+        a_hp = np.maximum(a_hp - dmg, 0)
+        p_dealt += dmg
+
+        a_moves = np.asarray(ai_policy(a_hp, a_mp, p_hp, p_mp, p_moves, rng))
+        dmg = _apply_moves(a_moves, a_mp, rng)
+        p_hp = np.maximum(p_hp - dmg, 0)
+        a_dealt += dmg
+        last_ai = a_moves
+
+        if record_moves:
+            moves_log.append((p_moves, a_moves))
+
+        p_dead = p_hp == 0
+        done = p_dead | (a_hp == 0)
+        if done.any():
+            # Player defeat is checked first, as in BattleEngine
+            retire(done, np.where(p_dead[done], 1, 0), rnd)
+            keep = ~done
+            ids, p_hp, a_hp, p_mp, a_mp = ids[keep], p_hp[keep], a_hp[keep], p_mp[keep], a_mp[keep]
+            p_dealt, a_dealt, last_ai = p_dealt[keep], a_dealt[keep], last_ai[keep]
+
+    if ids.size:
+        retire(np.ones(ids.size, dtype=bool), -1, max_rounds)
+
+    if record_moves:
+        out["player_moves"] = np.concatenate([p for p, _ in moves_log]) if moves_log else np.zeros(0, np.int64)
+        out["ai_moves"] = np.concatenate([a for _, a in moves_log]) if moves_log else np.zeros(0, np.int64)
+    return out
+
+
+def summarize(result: dict) -> dict:
+    n = len(result["winner"])
+    return {
+        "matches": n,
+        "player_win_rate": float(np.mean(result["winner"] == 0)),
+        "ai_win_rate": float(np.mean(result["winner"] == 1)),
+        "draw_rate": float(np.mean(result["winner"] == -1)),
+        "mean_rounds": float(np.mean(result["rounds"])),
+        "total_rounds": int(np.sum(result["rounds"])),
+        "mean_player_damage": float(np.mean(result["player_damage"])),
+        "mean_ai_damage": float(np.mean(result["ai_damage"])),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Scalar reference + statistical check
+# ---------------------------------------------------------------------------
+
+
+def simulate_scalar(
+    n_matches: int,
+    player_policy: Policy = valid_random_policy,
+    ai_policy: Policy = random_policy,
+    seed: Optional[int] = None,
+    max_rounds: int = MAX_ROUNDS,
+) -> dict:
+    """
+    Reference implementation: one match at a time with `Fighter` objects,
+    in the same order as `BattleEngine.execute_player_move` (without the
+    tracker and model updates). Policies are called on length-1 arrays.
+    """
+    from .fighter import Fighter
+
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    keys = ("winner", "rounds", "player_damage", "ai_damage",
+            "player_hp", "ai_hp", "player_mp", "ai_mp")
+    out = {k: [] for k in keys}
+
+    def one(x):
+        return np.array([x], dtype=np.int64)
+
+    for _ in range(n_matches):
+        player, ai = Fighter("P"), Fighter("AI")
+        last_ai, winner, rnd = 0, -1, max_rounds
+        for r in range(1, max_rounds + 1):
+            p_move = int(player_policy(one(player.health), one(player.mp), one(ai.health),
+                                       one(ai.mp), one(last_ai), rng)[0])
+            ai.take_damage(player.execute_move(p_move))
+            a_move = int(ai_policy(one(ai.health), one(ai.mp), one(player.health),
+                                   one(player.mp), one(p_move), rng)[0])
+            player.take_damage(ai.execute_move(a_move))
+            last_ai = a_move
+            if not player.is_alive():
+                winner, rnd = 1, r
+                break
+            if not ai.is_alive():
+                winner, rnd = 0, r
+                break
+        for k, v in zip(keys, (winner, rnd, player.total_damage_dealt, ai.total_damage_dealt,
+                               player.health, ai.health, player.mp, ai.mp)):
+            out[k].append(v)
+    return {k: np.array(v) for k, v in out.items()}
+
+
+def equivalence_check(
+    n_matches: int = 20000,
+    player_policy: Policy = valid_random_policy,
+    ai_policy: Policy = random_policy,
+    seed: int = 0,
+    z_limit: float = 4.0,
+) -> dict:
+    """
+    Two-sample z-tests on win rate, round count and damage between
+    `simulate` and `simulate_scalar`. Returns {metric: (z, passed)}.
+    """
+    vec = simulate(n_matches, player_policy, ai_policy, seed=seed)
+    ref = simulate_scalar(n_matches, player_policy, ai_policy, seed=seed + 1)
+
+    report = {}
+    for name, a, b in (
+        ("player_win_rate", vec["winner"] == 0, ref["winner"] == 0),
+        ("ai_win_rate", vec["winner"] == 1, ref["winner"] == 1),
+        ("rounds", vec["rounds"], ref["rounds"]),
+        ("player_damage", vec["player_damage"], ref["player_damage"]),
+        ("ai_damage", vec["ai_damage"], ref["ai_damage"]),
+        ("player_mp", vec["player_mp"], ref["player_mp"]),
+        ("ai_mp", vec["ai_mp"], ref["ai_mp"]),
+    ):
+        a, b = a.astype(float), b.astype(float)
+        se = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+        z = 0.0 if se == 0 else float((a.mean() - b.mean()) / se)
+        report[name] = (round(z, 2), abs(z) <= z_limit)
+    return report
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorised batch battle simulator")
+    parser.add_argument("--matches", type=int, default=100000)
+    parser.add_argument("--player", choices=sorted(POLICIES), default="valid")
+    parser.add_argument("--ai", choices=sorted(POLICIES) + ["ensemble"], default="random",
+                        help="'ensemble' freezes the ML opponent trained on logs/")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    parser.add_argument("--check", action="store_true",
+                        help="Statistical equivalence check against the scalar Fighter rules")
+    args = parser.parse_args()
+
+    player_policy = POLICIES[args.player]
+    if args.ai == "ensemble":
+        from .ai_opponent import AdaptiveAIOpponent
+        ai = AdaptiveAIOpponent("AI")
+        ai.load_history()
+        ai_policy = ensemble_policy(ai)
+    else:
+        ai_policy = POLICIES[args.ai]
+
+    if args.check:
+        n = min(args.matches, 20000)
+        print(f"Comparing vectorised vs scalar over {n} matches each...")
+        report = equivalence_check(n, player_policy, ai_policy, seed=args.seed or 0)
+        for metric, (z, ok) in report.items():
+            print(f"  {metric:<16} z={z:+6.2f}  {'ok' if ok else 'MISMATCH'}")
+        print("PASS" if all(ok for _, ok in report.values()) else "FAIL")
+        return
+
+    start = time.perf_counter()
+    result = simulate(args.matches, player_policy, ai_policy,
+                      seed=args.seed, max_rounds=args.max_rounds)
+    elapsed = time.perf_counter() - start
+    s = summarize(result)
+    print(f"Matches    : {s['matches']}  ({s['total_rounds']} rounds in {elapsed:.2f}s, "
+          f"{s['total_rounds'] / max(elapsed, 1e-9):,.0f} rounds/s)")
+    print(f"Player wins: {100 * s['player_win_rate']:.1f}%   "
+          f"AI wins: {100 * s['ai_win_rate']:.1f}%   Draws: {100 * s['draw_rate']:.1f}%")
+    print(f"Mean rounds: {s['mean_rounds']:.2f}   "
+          f"Mean damage — player: {s['mean_player_damage']:.1f}  AI: {s['mean_ai_damage']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
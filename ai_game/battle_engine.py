@@ -2,6 +2,8 @@
 
 Can be driven step-by-step by a GUI or run in a loop by the CLI.
 Both the ML-ensemble AI and the RL agent are supported via `use_rl`.
+With `background_training=True` the ML ensemble is refit on a worker thread
+(see training_worker.py) instead of inside `execute_player_move`.
 """
 
 from typing import List, Optional
@@ -10,6 +12,7 @@ from .fighter import Fighter, MOVE_NAMES
 from .ai_opponent import AdaptiveAIOpponent
 from .rl_agent import QLearningAgent
 from .damage_tracker import MatchTracker
+from .training_worker import BackgroundTrainer
 
 MAX_HP = 100
 MAX_MP = 50
@@ -25,6 +28,8 @@ class BattleEngine:
         rl_agent: Optional[QLearningAgent] = None,
         use_rl: bool = False,
         tracker: Optional[MatchTracker] = None,
+        background_training: bool = False,
+        max_staleness: int = 5,
     ):
         self.player = player
         self.ai = ai
@@ -32,6 +37,11 @@ class BattleEngine:
         self.use_rl = use_rl and rl_agent is not None
         self.tracker = tracker or MatchTracker()
 
+        # Incremental mode is already O(1) per round; only full refits move off-thread
+        self.trainer: Optional[BackgroundTrainer] = None
+        if background_training and not self.use_rl and not getattr(ai, "incremental", False):
+            self.trainer = BackgroundTrainer(ai, max_staleness=max_staleness)
+
         self.round_num: int = 0
         self.game_over: bool = False
         self.winner: Optional[str] = None
@@ -77,6 +87,8 @@ class BattleEngine:
             ai_move = self._rl_ai_move()
             ai_confidence = 0.0
         else:
+            if self.trainer is not None:
+                self.trainer.before_predict()
             ai_move, ai_confidence = self.ai.predict_move(player_move)
 
         ai_dmg = self.ai.execute_move(ai_move)
@@ -101,7 +113,9 @@ class BattleEngine:
             )
 
         # --- Update ML model ---
-        if not self.use_rl:
+        if self.trainer is not None:
+            self.trainer.record(player_move, ai_move)
+        elif not self.use_rl:
             self.ai.update_and_train(player_move, ai_move)
 
         # --- Record round ---
@@ -141,6 +155,12 @@ class BattleEngine:
             "winner": self.winner,
         }
 
+    def close(self):
+        """Stop the background training worker, if any, and flush the round log."""
+        if self.trainer is not None:
+            self.trainer.close()
+        self.tracker.close()
+
     # ------------------------------------------------------------------
     # RL move helper
     # ------------------------------------------------------------------
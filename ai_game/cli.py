@@ -1,7 +1,8 @@
 """CLI / headless entry point.
 
 Usage:
-    python -m ai_game.cli [--profile NAME] [--rl]
+    python -m ai_game.cli [--profile NAME] [--rl] [--qtable PATH] [--incremental]
+                          [--segmented-log [--history-segments K]]
 """
 
 import argparse
@@ -14,18 +15,38 @@ def main():
     parser.add_argument(
         "--rl", action="store_true", help="Use RL agent instead of ML ensemble"
     )
+    parser.add_argument(
+        "--qtable", default=None,
+        help="Q-table file for --rl (default: outputs/qtable.npz)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="O(1) online updates for the ML ensemble instead of a full refit per round",
+    )
+    parser.add_argument(
+        "--segmented-log", action="store_true",
+        help="Write rounds to rotating segments in logs/segments/ instead of game_logs.csv",
+    )
+    parser.add_argument(
+        "--history-segments", type=int, default=8,
+        help="Segments the AI trains on with --segmented-log",
+    )
     args = parser.parse_args()
 
     from .fighter import Fighter
     from .ai_opponent import AdaptiveAIOpponent
     from .rl_agent import QLearningAgent
-    from .profiles import PlayerProfile
+    from .profiles import ProfileStore
     from .damage_tracker import MatchTracker
     from .battle_engine import BattleEngine
-    from .visualize import plot_damage_per_round, plot_cumulative_damage
+    from .plot_pool import match_rows, render_match
+    from .match_journal import recover, report
 
     print("=== AI Fighting Game (CLI Mode) ===")
-    profile = PlayerProfile.load_or_create(args.profile)
+    # Finish matches a previous run left mid-way
+    report(recover())
+    profiles = ProfileStore()
+    profile = profiles.get(args.profile)
     print(
         f"Profile: {profile.name}  |  "
         f"Games: {profile.games_played}  |  "
@@ -36,18 +57,23 @@ def main():
         print(f"Last played: {profile.last_played}")
 
     player = Fighter(profile.name)
-    ai = AdaptiveAIOpponent("AI")
-    ai.load_history()
+    ai = AdaptiveAIOpponent("AI", incremental=args.incremental)
+    if args.segmented_log:
+        from .segment_log import compact
+        compact()
+        ai.load_history(last_segments=args.history_segments)
+    else:
+        ai.load_history()
 
     rl_agent = None
     if args.rl:
         rl_agent = QLearningAgent()
-        if rl_agent.load():
+        if rl_agent.load(args.qtable):
             print("RL agent loaded from disk.")
         else:
             print("No saved RL agent; using untrained agent.")
 
-    tracker = MatchTracker()
+    tracker = MatchTracker(segmented=args.segmented_log)
     engine = BattleEngine(player, ai, rl_agent=rl_agent, use_rl=args.rl, tracker=tracker)
 
     ai_type = "RL" if args.rl else "ML-Ensemble"
@@ -90,22 +116,21 @@ def main():
 
     # Save match logs and profile
     tracker.save()
-    profile.record_match(
+    profile = profiles.record_match(
+        profile.name,
         won=(engine.winner == profile.name),
         damage_dealt=player.total_damage_dealt,
         damage_taken=player.total_damage_taken,
         moves=player.total_moves,
         move_usage=player.move_usage,
+        match_id=tracker.match_id,
+        rounds=engine.round_num,
     )
-    profile.save()
     print(f"Profile saved: {profile.name} ({profile.wins}W / {profile.losses}L)")
 
-    # Generate and save plots
-    p1 = plot_damage_per_round(tracker.match_id)
-    p2 = plot_cumulative_damage(tracker.match_id)
-    for p in (p1, p2):
-        if p:
-            print(f"Plot saved: {p}")
+    # Generate and save plots (skipped if already rendered from the same rounds)
+    for p in render_match(tracker.match_id, match_rows(tracker.rounds)):
+        print(f"Plot saved: {p}")
 
 
 if __name__ == "__main__":
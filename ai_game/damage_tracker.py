@@ -4,10 +4,13 @@ import csv
 import json
 import os
 import datetime
-from dataclasses import dataclass, field, asdict
-from typing import List
+from dataclasses import dataclass, field, fields, asdict, astuple
+from typing import List, Optional
+
+from .log_writer import BufferedCSVWriter
 
 LOGS_DIR = os.path.join(os.path.dirname(__file__), "..", "logs")
+GLOBAL_LOG = os.path.join(LOGS_DIR, "game_logs.csv")
 
 
 @dataclass
@@ -29,23 +32,63 @@ class RoundRecord:
     )
 
 
+# Columns of the global log: the RoundRecord fields plus the match id
+GLOBAL_LOG_FIELDS = [f.name for f in fields(RoundRecord)] + ["match_id"]
+
+
 class MatchTracker:
     """
     Tracks per-round data for a single match.
 
     On each round it:
-    - Appends to a global `logs/game_logs.csv`
+    - Queues a row for the global `logs/game_logs.csv` (see log_writer.py)
     - Accumulates records in memory
 
-    At the end of a match call `save()` to write per-match CSV and JSONL.
+    Global-log rows are written every `flush_rows` rows / `flush_ms`
+    milliseconds if set, and always by `flush()`, `save()` and `close()`.
+    At the end of a match call `save()` to write per-match CSV and JSONL and
+    append the match to the columnar round store (round_store.py).
+
+    With an `io` worker (io_worker.IOWorker) all of this disk work is queued
+    on its thread; `save()` and `close()` then return a Future.
+
+    With `journal` (default), every round is first appended to a write-ahead
+    journal (match_journal.py) that `save()` deletes, so a match cut short
+    by a crash or quit is finalized by `match_journal.recover()` on the next
+    start.
+
+    With `segmented`, global-log rows go to this process's rotating segment
+    in logs/segments/ (segment_log.py) instead of game_logs.csv; the writer
+    is shared by every tracker of the process, so `close()` only flushes it.
     """
 
-    def __init__(self, match_id: str = None):
+    def __init__(
+        self,
+        match_id: str = None,
+        flush_rows: Optional[int] = None,
+        flush_ms: Optional[float] = None,
+        store=None,
+        io=None,
+        journal: bool = True,
+        segmented: bool = False,
+    ):
         if match_id is None:
             match_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         self.match_id = match_id
         self.rounds: List[RoundRecord] = []
+        self.store = store
+        self.io = io
         os.makedirs(LOGS_DIR, exist_ok=True)
+        self.segmented = segmented
+        if segmented:
+            from .segment_log import shared_writer
+            self._global_log = shared_writer(flush_rows=flush_rows, flush_ms=flush_ms, io=io)
+        else:
+            self._global_log = BufferedCSVWriter(
+                GLOBAL_LOG, GLOBAL_LOG_FIELDS, flush_rows=flush_rows, flush_ms=flush_ms, io=io
+            )
+        self._use_journal = journal
+        self._journal = None
 
     # ------------------------------------------------------------------
     # Recording
@@ -80,38 +123,76 @@ class MatchTracker:
             ai_hp_delta=ai_hp_delta,
             ai_confidence=ai_confidence,
         )
+        if self._use_journal:
+            if self._journal is None:
+                from .match_journal import MatchJournal
+                self._journal = MatchJournal(self.match_id, io=self.io, segmented=self.segmented)
+            self._journal.append(rec)
         self.rounds.append(rec)
         self._append_global_log(rec)
 
     def _append_global_log(self, rec: RoundRecord):
-        global_csv = os.path.join(LOGS_DIR, "game_logs.csv")
-        row = {**asdict(rec), "match_id": self.match_id}
-        fieldnames = list(asdict(rec).keys()) + ["match_id"]
-        write_header = not os.path.exists(global_csv)
-        with open(global_csv, "a", newline="") as fh:
-            writer = csv.DictWriter(fh, fieldnames=fieldnames)
-            if write_header:
-                writer.writeheader()
-            writer.writerow(row)
+        self._global_log.append(astuple(rec) + (self.match_id,))
+
+    def flush(self):
+        """Write any queued global-log rows."""
+        return self._run(self._global_log.flush)
+
+    def close(self):
+        """Flush the global log and release its file handle (and the journal's)."""
+        return self._run(self._close)
+
+    def _close(self):
+        if self.segmented:
+            self._global_log.flush()
+        else:
+            self._global_log.close()
+        if self._journal is not None:
+            self._journal.release()
+
+    def _run(self, fn, *args):
+        if self.io is not None:
+            return self.io.submit(fn, *args)
+        return fn(*args)
 
     # ------------------------------------------------------------------
     # Persistence
     # ------------------------------------------------------------------
 
     def save(self):
-        """Write per-match CSV and JSONL files to logs/."""
-        if not self.rounds:
-            return
+        """
+        Flush the global log; write per-match CSV and JSONL files to logs/
+        and append the match to `store` (default: the RoundStore in logs/rounds/).
+        """
+        return self._run(self._save, list(self.rounds))
+
+    def _save(self, rounds: List[RoundRecord]):
+        self._global_log.flush()
+        if rounds:
+            self._write_match_files(rounds)
+        if self._journal is not None:
+            self._journal.commit()
+
+    def _write_match_files(self, rounds: List[RoundRecord], store: bool = True):
         match_csv = os.path.join(LOGS_DIR, f"match_{self.match_id}.csv")
         match_jsonl = os.path.join(LOGS_DIR, f"match_{self.match_id}.jsonl")
 
-        fieldnames = list(asdict(self.rounds[0]).keys())
+        fieldnames = list(asdict(rounds[0]).keys())
         with open(match_csv, "w", newline="") as fh:
             writer = csv.DictWriter(fh, fieldnames=fieldnames)
             writer.writeheader()
-            for r in self.rounds:
+            for r in rounds:
                 writer.writerow(asdict(r))
 
         with open(match_jsonl, "w") as fh:
-            for r in self.rounds:
+            for r in rounds:
                 fh.write(json.dumps(asdict(r)) + "\n")
+
+        if store:
+            self._store().append_match(self.match_id, rounds)
+
+    def _store(self):
+        if self.store is None:
+            from .round_store import RoundStore
+            self.store = RoundStore()
+        return self.store
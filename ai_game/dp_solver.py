@@ -0,0 +1,430 @@
+"""Exact dynamic-programming solver for FightEnv.
+
+Value iteration over the unbinned FightEnv state space against a known
+opponent policy, giving the optimal policy and its value as a ground-truth
+baseline for the tabular Q-learner.
+
+State:
+  (agent_hp, agent_mp, opp_hp, opp_mp) with HP ∈ 0..100 and MP ∈ {0, 5, …, 50}
+  (MP only ever moves in steps of 5), i.e. 101 × 11 × 101 × 11 ≈ 1.2M states.
+  The last opponent move is not part of the state: it does not affect the
+  dynamics, so the optimal policy ignores it.
+
+Transitions and rewards follow FightEnv.step exactly: the agent acts, then
+the opponent acts on the resulting state (both with fallback-to-regen),
+damage is uniform over 10–20 / 25–35, and a fight the agent wins counts as
+a win even if the opponent's reply would have been lethal. Returns are
+discounted with the Q-learner's gamma; the MAX_ROUNDS truncation is not
+modelled (γ^50 < 0.08 and fights rarely last that long).
+
+Opponent policies are given as action probabilities over the state the
+opponent sees when it moves (after the agent's move):
+  random  — uniform over all three actions (FightEnv's opponent)
+  valid   — uniform over the affordable actions
+  greedy  — strongest affordable action
+
+Each sweep is a handful of whole-array NumPy operations; the 11-wide damage
+expectations are windowed sums over cumulative sums along the HP axes.
+
+Usage:
+    python -m ai_game.dp_solver                      # solve + compare saved agent
+    python -m ai_game.dp_solver --opponent greedy
+    python -m ai_game.dp_solver --export outputs/qtable_optimal.npz
+    python -m ai_game.dp_solver --mc-episodes 200000  # Monte-Carlo cross-check
+"""
+
+import argparse
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+from .rl_env import MAX_HP, MAX_MP, MAX_DAMAGE, HP_BINS, MP_BINS
+
+MP_STEP = 5
+N_HP = MAX_HP + 1
+N_MP = MAX_MP // MP_STEP + 1
+N_ACTIONS = 3
+
+# Per action (0=Attack, 1=Regen, 2=Special): MP cost and damage range
+_COST = (10, 0, 20)
+_DAMAGE = ((10, 20), (0, 0), (25, 35))
+_PAD = 35  # largest damage; padding rows in front of the HP axes
+
+DEFAULT_EXPORT_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "outputs", "qtable_optimal.npz"
+)
+
+
+def _action_tables():
+    """Per action: effective mask, next MP index and mean damage, each over MP index."""
+    mp = np.arange(N_MP) * MP_STEP
+    effective, next_mp, mean_dmg = [], [], []
+    for a in range(N_ACTIONS):
+        eff = (mp >= _COST[a]) & (_COST[a] > 0)
+        effective.append(eff)
+        next_mp.append(
+            np.where(eff, mp - _COST[a], np.minimum(mp + MP_STEP, MAX_MP)) // MP_STEP
+        )
+        mean_dmg.append(np.where(eff, sum(_DAMAGE[a]) / 2, 0.0))
+    return effective, next_mp, mean_dmg
+
+
+_EFFECTIVE, _NEXT_MP, _MEAN_DMG = _action_tables()
+
+
+# ---------------------------------------------------------------------------
+# Opponent policies
+# ---------------------------------------------------------------------------
+
+
+def opponent_probs(name: str = "random") -> np.ndarray:
+    """
+    Opponent action probabilities over the post-agent-move state, shape
+    (N_HP, N_MP, N_HP, N_MP, 3) indexed like the value function
+    (agent_hp, agent_mp, opp_hp, opp_mp). The built-in opponents only look
+    at their own MP, so the table is a broadcast view.
+    """
+    mp = np.arange(N_MP) * MP_STEP
+    can_attack = mp >= _COST[0]
+    can_special = mp >= _COST[2]
+    if name == "random":
+        probs = np.full((N_MP, N_ACTIONS), 1.0 / N_ACTIONS)
+    elif name == "valid":
+        allowed = np.stack([can_attack, np.ones(N_MP, dtype=bool), can_special], axis=1)
+        probs = allowed / allowed.sum(axis=1, keepdims=True)
+    elif name == "greedy":
+        best = np.where(can_special, 2, np.where(can_attack, 0, 1))
+        probs = np.eye(N_ACTIONS)[best]
+    else:
+        raise ValueError(f"Unknown opponent policy: {name!r}")
+    return np.broadcast_to(probs, (N_HP, N_MP, N_HP) + probs.shape)
+
+
+# ---------------------------------------------------------------------------
+# Bellman backup
+# ---------------------------------------------------------------------------
+
+
+def _window_mean(padded: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """
+    Mean of padded[_PAD + h - d] over d ∈ [lo, hi] for every h along axis 0,
+    where `padded` holds _PAD leading rows in front of the N_HP real ones.
+    """
+    cs = np.concatenate(
+        [np.zeros((1,) + padded.shape[1:]), np.cumsum(padded, axis=0)], axis=0
+    )
+    h = np.arange(N_HP)
+    return (cs[_PAD + h - lo + 1] - cs[_PAD + h - hi]) / (hi - lo + 1)
+
+
+def _q_values(V: np.ndarray, opp: np.ndarray, gamma: float) -> np.ndarray:
+    """
+    One Bellman backup: Q(s, a) for every state, shape (N_HP, N_MP, N_HP, N_MP, 3).
+    `V` is (N_HP, N_MP, N_HP, N_MP), or has a trailing last-opponent-move
+    axis of length 4 when evaluating a policy that reads it.
+    """
+    with_last = V.ndim == 5
+
+    # C(X): expected return once the agent has moved, X = post-move state.
+    # The opponent's reply and the agent's death are folded in here.
+    opp_won = np.arange(N_HP)[None, None, :, None] == 0
+    C = np.zeros((N_HP, N_MP, N_HP, N_MP))
+    for b in range(N_ACTIONS):
+        Vb = V[:, :, :, _NEXT_MP[b]]
+        if with_last:
+            Vb = Vb[..., b + 1]
+        # Continuation by agent HP after the reply; HP ≤ 0 is a loss (−1)
+        padded = np.concatenate([np.full((_PAD + 1,) + Vb.shape[1:], -1.0), gamma * Vb[1:]])
+        lo, hi = _DAMAGE[b]
+        hit = _window_mean(padded, lo, hi) if hi else padded[_PAD:]
+        cont = np.where(_EFFECTIVE[b][None, None, None, :], hit, padded[_PAD:])
+        value = np.where(opp_won, 1.0, cont) - _MEAN_DMG[b][None, None, None, :] / MAX_DAMAGE * 0.5
+        C += opp[..., b] * value
+
+    Q = np.empty((N_HP, N_MP, N_HP, N_MP, N_ACTIONS))
+    for a in range(N_ACTIONS):
+        Ca = C[:, _NEXT_MP[a]]
+        lo, hi = _DAMAGE[a]
+        if hi:
+            # Opponent HP clamps at 0: pad with copies of the HP-0 slice
+            padded = np.concatenate(
+                [np.broadcast_to(Ca[:, :, :1], Ca.shape[:2] + (_PAD,) + Ca.shape[3:]), Ca],
+                axis=2,
+            )
+            hit = np.moveaxis(_window_mean(np.moveaxis(padded, 2, 0), lo, hi), 0, 2)
+            Ca = np.where(_EFFECTIVE[a][None, :, None, None], hit, Ca)
+        Q[..., a] = Ca + _MEAN_DMG[a][None, :, None, None] / MAX_DAMAGE * 0.5
+    return Q
+
+
+def _iterate(backup, V: np.ndarray, tol: float, max_sweeps: int):
+    """Run `V ← backup(V)` until the sup-norm change on live states is below tol."""
+    live = (slice(1, None), slice(None), slice(1, None))
+    for sweep in range(1, max_sweeps + 1):
+        V_new = backup(V)
+        delta = float(np.abs(V_new[live] - V[live]).max())
+        V = V_new
+        if delta < tol:
+            break
+    return V, sweep, delta
+
+
+# ---------------------------------------------------------------------------
+# Solve / evaluate
+# ---------------------------------------------------------------------------
+
+
+def solve(
+    opponent: str = "random",
+    gamma: float = 0.95,
+    tol: float = 1e-6,
+    max_sweeps: int = 1000,
+) -> dict:
+    """
+    Optimal Q-values and policy against `opponent`.
+
+    Returns a dict with `q` (N_HP, N_MP, N_HP, N_MP, 3), `policy` (argmax
+    actions), `value` (V*), `start_value` (V* of the initial state),
+    `sweeps`, `delta` and `seconds`.
+    """
+    opp = opponent_probs(opponent)
+    t0 = time.perf_counter()
+    V, sweeps, delta = _iterate(
+        lambda V: _q_values(V, opp, gamma).max(axis=-1),
+        np.zeros((N_HP, N_MP, N_HP, N_MP)),
+        tol, max_sweeps,
+    )
+    q = _q_values(V, opp, gamma)
+    return {
+        "opponent": opponent,
+        "gamma": gamma,
+        "q": q,
+        "policy": q.argmax(axis=-1).astype(np.int8),
+        "value": V,
+        "start_value": float(V[MAX_HP, N_MP - 1, MAX_HP, N_MP - 1]),
+        "sweeps": sweeps,
+        "delta": delta,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def _obs_bins():
+    """Per HP value and MP index, the FightEnv observation bin."""
+    hp_bin = np.minimum(np.arange(N_HP) * HP_BINS // MAX_HP, HP_BINS - 1)
+    mp_bin = np.minimum(np.arange(N_MP) * MP_STEP * MP_BINS // MAX_MP, MP_BINS - 1)
+    return hp_bin, mp_bin
+
+
+def tabular_policy(q_table: np.ndarray) -> np.ndarray:
+    """
+    Greedy action of a binned Q-table (QLearningAgent layout) for every exact
+    state and last opponent move: shape (N_HP, N_MP, N_HP, N_MP, 4).
+    """
+    from .rl_agent import OBS_DIMS
+
+    hp_bin, mp_bin = _obs_bins()
+    greedy = np.asarray(q_table).argmax(axis=1).reshape(OBS_DIMS)
+    return greedy[np.ix_(hp_bin, mp_bin, hp_bin, mp_bin, np.arange(4))]
+
+
+def evaluate_policy(
+    policy: np.ndarray,
+    opponent: str = "random",
+    gamma: float = 0.95,
+    tol: float = 1e-6,
+    max_sweeps: int = 1000,
+) -> float:
+    """
+    Exact discounted value of the initial state under a deterministic policy,
+    given as actions over (agent_hp, agent_mp, opp_hp, opp_mp[, last_opp_move]).
+    """
+    opp = opponent_probs(opponent)
+    if policy.ndim == 4:
+        V0 = np.zeros((N_HP, N_MP, N_HP, N_MP))
+    else:
+        V0 = np.zeros((N_HP, N_MP, N_HP, N_MP, 4))
+
+    def backup(V):
+        Q = _q_values(V, opp, gamma)
+        if V.ndim == 4:
+            return np.take_along_axis(Q, policy[..., None].astype(np.int64), axis=-1)[..., 0]
+        # Q does not depend on the last move; pick per last-move policy slice
+        return np.take_along_axis(Q[..., None, :], policy[..., None].astype(np.int64), axis=-1)[..., 0]
+
+    V, _, _ = _iterate(backup, V0, tol, max_sweeps)
+    start = V[MAX_HP, N_MP - 1, MAX_HP, N_MP - 1]
+    return float(start if V.ndim == 4 else start[0])
+
+
+def to_qtable(result: dict, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Aggregate exact Q-values into a binned (2500, 3) table for QLearningAgent.
+    Each bin averages the Q-values of its exact states, weighted by `weights`
+    over (agent_hp, agent_mp, opp_hp, opp_mp) — e.g. visit counts of the
+    optimal policy — or uniformly over live states. The last-move component
+    is irrelevant to the optimal policy, so all four copies are equal.
+    """
+    from .rl_agent import OBS_DIMS, N_STATES
+
+    hp_bin, mp_bin = _obs_bins()
+    w = np.zeros((N_HP, N_MP, N_HP, N_MP))
+    w[1:, :, 1:, :] = 1e-6
+    if weights is not None:
+        w += weights
+    bins = (
+        ((hp_bin[:, None, None, None] * MP_BINS + mp_bin[None, :, None, None]) * HP_BINS
+         + hp_bin[None, None, :, None]) * MP_BINS
+        + mp_bin[None, None, None, :]
+    ).ravel()
+    n_bins = N_STATES // OBS_DIMS[-1]
+    total = np.bincount(bins, weights=w.ravel(), minlength=n_bins)
+    q = np.stack(
+        [
+            np.bincount(bins, weights=(w * result["q"][..., a]).ravel(), minlength=n_bins)
+            for a in range(N_ACTIONS)
+        ],
+        axis=1,
+    ) / np.maximum(total, 1e-12)[:, None]
+    return np.repeat(q, OBS_DIMS[-1], axis=0).astype(np.float32)
+
+
+def export_agent(result: dict, path: str = DEFAULT_EXPORT_PATH, weights=None):
+    """Save the aggregated optimal Q-table as a greedy QLearningAgent file."""
+    from .rl_agent import QLearningAgent
+
+    agent = QLearningAgent(gamma=result["gamma"], epsilon=0.0, epsilon_min=0.0)
+    agent.q_table = to_qtable(result, weights)
+    agent.visited[:] = True
+    agent.save(path)
+    return agent
+
+
+# ---------------------------------------------------------------------------
+# Monte-Carlo cross-check (FightEnv's random opponent only)
+# ---------------------------------------------------------------------------
+
+
+def rollout(
+    choose,
+    n_episodes: int,
+    gamma: float = 0.95,
+    num_envs: int = 4096,
+    seed: Optional[int] = 0,
+    visits: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    Play `n_episodes` FightVectorEnv episodes with `choose(obs, raw_state)`
+    and return the mean discounted return and win rate. With `visits`
+    ((N_HP, N_MP, N_HP, N_MP) array), exact-state visit counts are added to it.
+    """
+    from .rl_env import FightVectorEnv
+
+    env = FightVectorEnv(num_envs)
+    obs, _ = env.reset(seed=seed)
+    returns = np.zeros(num_envs)
+    done_returns, wins = [], 0
+    while len(done_returns) < n_episodes:
+        raw = env.raw_state()
+        if visits is not None:
+            np.add.at(
+                visits,
+                (raw["agent_hp"], raw["agent_mp"] // MP_STEP, raw["opp_hp"], raw["opp_mp"] // MP_STEP),
+                1,
+            )
+        obs, rewards, term, trunc, _ = env.step(choose(obs, raw))
+        returns += gamma ** raw["round"] * rewards
+        done = term | trunc
+        if done.any():
+            done_returns.extend(returns[done].tolist())
+            wins += int((term & (rewards > 0)).sum())
+            returns[done] = 0.0
+    n = len(done_returns)
+    return {"episodes": n, "mean_return": float(np.mean(done_returns)), "win_rate": wins / n}
+
+
+def exact_chooser(policy: np.ndarray):
+    def choose(obs, raw):
+        return policy[raw["agent_hp"], raw["agent_mp"] // MP_STEP, raw["opp_hp"], raw["opp_mp"] // MP_STEP]
+    return choose
+
+
+def agent_chooser(agent):
+    def choose(obs, raw):
+        return agent.q_table[agent.state_ids(obs)].argmax(axis=1)
+    return choose
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact DP solver for FightEnv")
+    parser.add_argument("--opponent", default="random", choices=["random", "valid", "greedy"])
+    parser.add_argument("--gamma", type=float, default=None,
+                        help="Discount factor (default: the Q-learner's gamma)")
+    parser.add_argument("--tol", type=float, default=1e-6, help="Value-iteration tolerance")
+    parser.add_argument("--qtable", default=None,
+                        help="Q-table to compare against (default: the saved RL agent)")
+    parser.add_argument("--export", default=None, metavar="PATH",
+                        help=f"Write the binned optimal Q-table (e.g. {os.path.relpath(DEFAULT_EXPORT_PATH)})")
+    parser.add_argument("--mc-episodes", type=int, default=0,
+                        help="Also play this many episodes per policy (random opponent only)")
+    args = parser.parse_args()
+
+    from .rl_agent import QLearningAgent
+
+    learned = QLearningAgent()
+    has_learned = learned.load(args.qtable)
+    gamma = args.gamma if args.gamma is not None else learned.gamma
+
+    print(f"Solving FightEnv vs {args.opponent} opponent (γ={gamma}, "
+          f"{N_HP * N_MP * N_HP * N_MP:,} states)...")
+    result = solve(args.opponent, gamma, args.tol)
+    print(f"  converged in {result['sweeps']} sweeps, {result['seconds']:.2f}s "
+          f"(Δ={result['delta']:.1e})")
+    mix = np.bincount(result["policy"][1:, :, 1:, :].ravel(), minlength=3) / result["policy"][1:, :, 1:, :].size
+    print(f"  optimal action mix over live states: "
+          f"attack {mix[0]:.1%}  regen {mix[1]:.1%}  special {mix[2]:.1%}")
+
+    weights = None
+    if args.opponent == "random":
+        # Visit counts of the optimal policy weight the binned aggregation
+        weights = np.zeros((N_HP, N_MP, N_HP, N_MP))
+        rollout(exact_chooser(result["policy"]), 20000, gamma, visits=weights)
+
+    binned = to_qtable(result, weights)
+    rows = [("optimal (exact state)", result["start_value"], None)]
+    rows.append(("optimal, binned", evaluate_policy(tabular_policy(binned), args.opponent, gamma, args.tol), binned))
+    if has_learned:
+        rows.append(("learned Q-table", evaluate_policy(tabular_policy(learned.q_table), args.opponent, gamma, args.tol), learned.q_table))
+
+    print("\nDiscounted value of the initial state (exact):")
+    for label, value, _ in rows:
+        gap = result["start_value"] - value
+        print(f"  {label:<24} {value:+.4f}   gap {gap:.4f}")
+    if not has_learned:
+        print("  (no saved Q-table to compare — run python -m ai_game.train_rl)")
+
+    if args.mc_episodes and args.opponent == "random":
+        print(f"\nMonte-Carlo check ({args.mc_episodes} episodes each):")
+        choosers = [("optimal (exact state)", exact_chooser(result["policy"]))]
+        for label, _, table in rows[1:]:
+            agent = QLearningAgent()
+            agent.q_table = table
+            choosers.append((label, agent_chooser(agent)))
+        for label, choose in choosers:
+            mc = rollout(choose, args.mc_episodes, gamma)
+            print(f"  {label:<24} return {mc['mean_return']:+.4f}   win rate {mc['win_rate']:.1%}")
+
+    if args.export:
+        export_agent(result, args.export, weights)
+        print(f"\nBinned optimal Q-table saved: {args.export}")
+        print(f"Play against it with --rl --qtable {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Advisory inter-process file locks (fcntl on POSIX, msvcrt on Windows).
+
+Locks are held on an open file handle and released when it is unlocked or
+closed, including when the owning process dies.
+"""
+
+import contextlib
+import errno
+import os
+
+# msvcrt locks are mandatory: lock a byte far past any data, not the data
+_LOCK_OFFSET = 1 << 30
+
+
+def try_lock(fh) -> bool:
+    """Take an exclusive lock without waiting. False if another process holds it."""
+    return _lock(fh, blocking=False)
+
+
+def lock(fh):
+    """Take an exclusive lock, waiting for it. Raises OSError if it can't be taken."""
+    _lock(fh, blocking=True)
+
+
+def unlock(fh):
+    try:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(_LOCK_OFFSET)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def locked(path: str):
+    """Hold an exclusive lock on the lock file `path` for the block."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as fh:
+        lock(fh)
+        try:
+            yield
+        finally:
+            unlock(fh)
+
+
+def _lock(fh, blocking: bool) -> bool:
+    try:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(_LOCK_OFFSET)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                    return True
+                except OSError as exc:
+                    # EACCES / EDEADLOCK: held by another process; retry
+                    if not blocking or exc.errno not in (errno.EACCES, errno.EDEADLK):
+                        raise
+                    import time
+                    time.sleep(0.01)
+        else:
+            import fcntl
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(fh.fileno(), flags)
+            return True
+    except OSError:
+        # A blocking lock only fails on a real error (bad handle, no lock
+        # support on the filesystem, ...): never let the caller go on unlocked
+        if blocking:
+            raise
+        return False
@@ -1,27 +1,51 @@
 """Pygame GUI entry point.
 
 Usage:
-    python -m ai_game.gui [--rl]
+    python -m ai_game.gui [--rl] [--incremental] [--background-training [--max-staleness N]]
 
 Screens:
   MENU   — select/create profile, start game, view stats, toggle AI type
   GAME   — HP/MP bars, round counter, damage events, ensemble confidence
-  END    — winner, summary stats, plot damage button
+  END    — winner, summary stats, damage charts, save plots button
   STATS  — per-profile statistics
+  BOARD  — leaderboard over all profiles (leaderboard.py)
+
+Log and profile output is queued on an IOWorker thread (io_worker.py) and
+charts are drawn in a PlotPool process (plot_pool.py), so no frame waits on
+the disk or on matplotlib. The end-screen charts come back as RGBA buffers
+and are blitted into the window; PNGs are written only on "Save Plots".
+The loop only draws when there is input or pending background work.
 """
 
 import argparse
 import os
 import sys
+from collections import OrderedDict
 
 
 # ---------------------------------------------------------------------------
 # Helpers used across screens
 # ---------------------------------------------------------------------------
 
+# Rendered text and buttons, keyed by what they show (LRU)
+_SURFACE_CACHE: "OrderedDict[tuple, object]" = OrderedDict()
+_SURFACE_CACHE_SIZE = 1024
+
+
+def _cached(key, make):
+    surf = _SURFACE_CACHE.get(key)
+    if surf is None:
+        surf = _SURFACE_CACHE[key] = make()
+        if len(_SURFACE_CACHE) > _SURFACE_CACHE_SIZE:
+            _SURFACE_CACHE.popitem(last=False)
+    else:
+        _SURFACE_CACHE.move_to_end(key)
+    return surf
+
+
 def _txt(surface, text, x, y, fnt, color, center=False):
-    import pygame
-    surf = fnt.render(str(text), True, color)
+    text = str(text)
+    surf = _cached(("txt", text, fnt, color), lambda: fnt.render(text, True, color))
     rect = surf.get_rect()
     if center:
         rect.center = (x, y)
@@ -40,12 +64,63 @@ def _bar(surface, x, y, w, h, val, max_val, fg, bg=(50, 50, 50)):
 
 def _btn(surface, x, y, w, h, label, fnt, color, hovered=False):
     import pygame
-    col = tuple(min(255, c + 30) for c in color) if hovered else color
-    pygame.draw.rect(surface, col, (x, y, w, h), border_radius=8)
-    _txt(surface, label, x + w // 2, y + h // 2, fnt, (240, 240, 240), center=True)
+
+    def make():
+        col = tuple(min(255, c + 30) for c in color) if hovered else color
+        btn = pygame.Surface((w, h), pygame.SRCALPHA)
+        pygame.draw.rect(btn, col, (0, 0, w, h), border_radius=8)
+        _txt(btn, label, w // 2, h // 2, fnt, (240, 240, 240), center=True)
+        return btn
+
+    surface.blit(_cached(("btn", w, h, label, fnt, color, hovered), make), (x, y))
     return pygame.Rect(x, y, w, h)
 
 
+# ---------------------------------------------------------------------------
+# I/O jobs (run on the IOWorker thread)
+# ---------------------------------------------------------------------------
+
+def _save_match_profile(store, name, won, damage_dealt, damage_taken, moves, move_usage,
+                        match_id=None, rounds=0):
+    store.record_match(
+        name,
+        won=won,
+        damage_dealt=damage_dealt,
+        damage_taken=damage_taken,
+        moves=moves,
+        move_usage=move_usage,
+        match_id=match_id,
+        rounds=rounds,
+    )
+
+
+# (metric, minimum games) shown on the leaderboard screen; click cycles
+_BOARD_VIEWS = [("wins", 1), ("win_rate", 5), ("damage_per_game", 5), ("games_played", 1)]
+
+
+def _report_io_error(fn, exc):
+    print(f"[io] {getattr(fn, '__qualname__', fn)} failed: {exc!r}")
+
+
+def _query_stats(store, name):
+    from .profile_history import summary
+    try:
+        trends = summary(name, profiles_dir=store.directory)
+    except (OSError, ValueError):
+        trends = {"matches": 0}
+    return {"profile": store.get(name), "trends": trends}
+
+
+def _query_leaderboard(board, by, min_games, name):
+    board.refresh()
+    return {
+        "rows": board.top(10, by, min_games),
+        "pct": board.percentiles(by, (50, 90, 99), min_games),
+        "rank": board.rank(name, by, min_games),
+        "total": len(board),
+    }
+
+
 # ---------------------------------------------------------------------------
 # Game state container (avoids nonlocal juggling)
 # ---------------------------------------------------------------------------
@@ -57,6 +132,7 @@ class _State:
         self.profile_input_active = False
         self.profile_input_text = ""
         self.use_rl = False
+        self.incremental = False
 
         # Per-game objects
         self.engine = None
@@ -66,6 +142,27 @@ class _State:
         self.rl_agent = None
         self.logs = []
         self.end_plots = []
+        self.plot_job = None
+        self.end_charts = []
+        self.chart_job = None
+        self.io = None
+        self.plots = None
+        self.profiles = None
+
+        # Game screen: static layer, and the state each widget was last drawn
+        # with (empty = redraw the whole window)
+        self.game_layer = None
+        self.drawn = {}
+
+        # Stats screen
+        self.stats_job = None
+        self.stats_result = None
+
+        # Leaderboard screen
+        self.board = None
+        self.board_view = 0
+        self.board_job = None
+        self.board_result = None
 
 
 # ---------------------------------------------------------------------------
@@ -75,6 +172,20 @@ class _State:
 def main():
     parser = argparse.ArgumentParser(description="AI Fighting Game — GUI mode")
     parser.add_argument("--rl", action="store_true", help="Use RL agent instead of ML ensemble")
+    parser.add_argument("--qtable", default=None,
+                        help="Q-table file for --rl (default: outputs/qtable.npz)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="O(1) online updates for the ML ensemble instead of a full refit per round")
+    parser.add_argument("--background-training", action="store_true",
+                        help="Refit the ML ensemble on a worker thread instead of in the frame loop")
+    parser.add_argument("--max-staleness", type=int, default=5,
+                        help="Rounds the AI may predict behind its training data (background mode)")
+    parser.add_argument("--segmented-log", action="store_true",
+                        help="Write rounds to rotating segments in logs/segments/ instead of game_logs.csv")
+    parser.add_argument("--history-segments", type=int, default=8,
+                        help="Segments the AI trains on with --segmented-log")
+    parser.add_argument("--plot-workers", type=int, default=1,
+                        help="Processes rendering plots (0 = one background thread)")
     args = parser.parse_args()
 
     try:
@@ -86,16 +197,27 @@ def main():
     from .fighter import Fighter
     from .ai_opponent import AdaptiveAIOpponent
     from .rl_agent import QLearningAgent
-    from .profiles import PlayerProfile
+    from .profiles import PlayerProfile, ProfileStore
     from .damage_tracker import MatchTracker
     from .battle_engine import BattleEngine
-    from .visualize import plot_damage_per_round, plot_cumulative_damage
+    from .io_worker import IOWorker
+    from .plot_pool import PlotPool, match_rows
+    from .match_journal import recover, report
+
+    # Finish matches a previous run left mid-way
+    report(recover())
 
     pygame.init()
     W, H = 1000, 700
     screen = pygame.display.set_mode((W, H))
     pygame.display.set_caption("AI Fighting Game")
     clock = pygame.time.Clock()
+    FPS = 30  # frame cap while input or background work keeps frames coming
+
+    # End-screen chart slots
+    CHART_W, CHART_H = 470, 310
+    CHART_X = (20, W - 20 - CHART_W)
+    CHART_Y = 160
 
     # Colours
     BLACK  = (10,  10,  10)
@@ -117,6 +239,13 @@ def main():
 
     st = _State()
     st.use_rl = args.rl
+    st.incremental = args.incremental
+    st.io = IOWorker(on_error=_report_io_error)
+    st.plots = PlotPool(args.plot_workers)
+    st.profiles = ProfileStore()
+    if args.segmented_log:
+        from .segment_log import compact
+        st.io.submit(compact)
 
     try:
         bg_img = pygame.image.load("assets/bg.jpg").convert()
@@ -128,57 +257,185 @@ def main():
         bg_img, player_img, ai_img = None, None, None
 
     # ------------------------------------------------------------------
+    def build_game_layer():
+        # Everything on the game screen that does not change during a match
+        layer = pygame.Surface((W, H)).convert()
+        if bg_img:
+            layer.blit(bg_img, (0, 0))
+        else:
+            layer.fill(BLACK)
+        if player_img and ai_img:
+            layer.blit(player_img, (100, 360))
+            layer.blit(ai_img, (W - 250, 360))
+        panel = pygame.Surface((W - 80, 395), pygame.SRCALPHA)
+        panel.fill((50, 50, 50, 180))  # Semi-transparent dark gray
+        pygame.draw.rect(panel, DGRAY, panel.get_rect(), 2, border_radius=6)
+        layer.blit(panel, (40, 155))
+        _txt(layer, "Battle Log", 55, 162, f_sm, GRAY)
+        _txt(layer, "[RL AI]" if st.use_rl else "[ML Ensemble]", W - 140, 18, f_sm, GRAY)
+        return layer
+
     def new_game():
+        if st.engine:
+            st.engine.close()
+        st.game_layer = build_game_layer()
+        st.drawn.clear()
         st.logs = []
         st.end_plots = []
+        st.plot_job = None
+        st.end_charts = []
+        st.chart_job = None
+        st.plots.warm()
         st.player = Fighter(st.selected_profile)
-        st.ai_fighter = AdaptiveAIOpponent("AI")
-        st.ai_fighter.load_history()
+        st.ai_fighter = AdaptiveAIOpponent("AI", incremental=st.incremental)
+        # Train on every round written so far (normally nothing is pending)
+        st.io.drain()
+        if args.segmented_log:
+            st.ai_fighter.load_history(last_segments=args.history_segments)
+        else:
+            st.ai_fighter.load_history()
 
         st.rl_agent = None
         if st.use_rl:
             st.rl_agent = QLearningAgent()
-            st.rl_agent.load()
+            st.rl_agent.load(args.qtable)
 
-        st.tracker = MatchTracker()
+        st.tracker = MatchTracker(io=st.io, segmented=args.segmented_log)
         st.engine = BattleEngine(
             st.player, st.ai_fighter,
             rl_agent=st.rl_agent,
             use_rl=st.use_rl,
             tracker=st.tracker,
+            background_training=args.background_training,
+            max_staleness=args.max_staleness,
         )
 
     def finalize_match():
         if st.tracker:
             st.tracker.save()
-        profile = PlayerProfile.load_or_create(st.selected_profile)
         if st.engine and st.player:
-            profile.record_match(
-                won=(st.engine.winner == st.selected_profile),
-                damage_dealt=st.player.total_damage_dealt,
-                damage_taken=st.player.total_damage_taken,
-                moves=st.player.total_moves,
-                move_usage=st.player.move_usage,
+            st.io.submit(
+                _save_match_profile,
+                st.profiles,
+                st.selected_profile,
+                st.engine.winner == st.selected_profile,
+                st.player.total_damage_dealt,
+                st.player.total_damage_taken,
+                st.player.total_moves,
+                dict(st.player.move_usage),
+                st.tracker.match_id if st.tracker else None,
+                st.engine.round_num,
+            )
+        if st.tracker and st.tracker.rounds:
+            # Drawn in the plot pool from the rounds in memory, shown on the end screen
+            st.chart_job = st.plots.submit_images(
+                st.tracker.match_id, match_rows(st.tracker.rounds), size=(CHART_W, CHART_H)
             )
-            profile.save()
-        if st.tracker:
-            p1 = plot_damage_per_round(st.tracker.match_id)
-            p2 = plot_cumulative_damage(st.tracker.match_id)
-            st.end_plots = [p for p in (p1, p2) if p]
+
+    def draw_trends(trends, x, y, w=340):
+        # Recent-form panel of the stats screen (profile_history.summary())
+        _txt(screen, "Recent form", x, y, f_md, YELLOW)
+        if not trends["matches"]:
+            _txt(screen, "No match history yet", x, y + 46, f_sm, GRAY)
+            return
+        n = trends["recent"]
+        _txt(screen, f"Last {n}: {100 * trends['recent_win_rate']:.0f}% wins  "
+                      f"(all {trends['matches']}: {100 * trends['overall_win_rate']:.0f}%)",
+             x, y + 46, f_sm, WHITE)
+        _txt(screen, f"Avg damage dealt (last {n}): {trends['recent_damage']:.1f}",
+             x, y + 76, f_sm, WHITE)
+
+        # Rolling win rate, oldest to newest
+        box = pygame.Rect(x, y + 110, w, 110)
+        pygame.draw.rect(screen, (40, 40, 55), box, border_radius=6)
+        mid = box.y + box.h // 2
+        pygame.draw.line(screen, (70, 70, 90), (box.x, mid), (box.right, mid))
+        trend = trends["trend"]
+        if len(trend) > 1:
+            step = (w - 10) / (len(trend) - 1)
+            points = [(box.x + 5 + i * step, box.bottom - 5 - v * (box.h - 10)) for i, v in enumerate(trend)]
+            pygame.draw.lines(screen, LBLUE, False, points, 2)
+        _txt(screen, f"Win rate over the last {len(trend)} matches", x, box.bottom + 6, f_sm, GRAY)
+
+        for i, (label, share, col) in enumerate(zip(("Attack", "Special", "Regen"), trends["recent_mix"],
+                                                    (RED, ORANGE, GREEN))):
+            yy = y + 264 + i * 34
+            _txt(screen, label, x, yy, f_sm, GRAY)
+            _bar(screen, x + 90, yy + 4, w - 150, 16, share, 1.0, col)
+            _txt(screen, f"{100 * share:.0f}%", x + w - 50, yy, f_sm, WHITE)
+        drift = trends["drift"]
+        _txt(screen, "Move-mix drift: " + ("—" if drift is None else f"{drift:.2f}"),
+             x, y + 372, f_sm, WHITE)
+
+    def query_board():
+        # Queued behind any pending profile save, so the result includes it
+        if st.board is None:
+            from .leaderboard import Leaderboard
+            st.board = Leaderboard(st.profiles.directory)
+        by, min_games = _BOARD_VIEWS[st.board_view]
+        st.board_job = st.io.submit(_query_leaderboard, st.board, by, min_games, st.selected_profile)
+
+    def query_stats():
+        # Queued behind any pending profile save, so the result includes it
+        st.stats_job = st.io.submit(_query_stats, st.profiles, st.selected_profile)
+
+    def poll_stats_job():
+        if st.stats_job is not None and st.stats_job.done():
+            if st.stats_job.exception() is None:
+                st.stats_result = st.stats_job.result()
+            st.stats_job = None
+
+    def poll_board_job():
+        if st.board_job is not None and st.board_job.done():
+            if st.board_job.exception() is None:
+                st.board_result = st.board_job.result()
+            st.board_job = None
+
+    def poll_plot_jobs():
+        if st.chart_job is not None and st.chart_job.done():
+            if st.chart_job.exception() is None:
+                st.end_charts = [
+                    pygame.image.frombuffer(data, size, "RGBA").convert()
+                    for _, data, size in st.chart_job.result()
+                ]
+            st.chart_job = None
+        if st.plot_job is not None and st.plot_job.done():
+            if st.plot_job.exception() is None:
+                st.end_plots = st.plot_job.result()
+            st.plot_job = None
 
     # ------------------------------------------------------------------
+    # Frames are event driven: with nothing to do the loop sleeps in
+    # event.wait() until input arrives. Input is handled after a screen is
+    # drawn, so one more frame follows every batch of events to show its
+    # effect. While plot, stats or leaderboard jobs are pending, frames run at FPS
+    # to pick up their results.
     running = True
+    prev_screen = None
+    settle = True  # draw the first frame without waiting
     while running:
-        if st.screen == "game" and bg_img:
-            screen.blit(bg_img, (0, 0))
+        if settle:
+            events = pygame.event.get()
         else:
+            busy = any(job is not None
+                       for job in (st.chart_job, st.plot_job, st.board_job, st.stats_job))
+            first = pygame.event.wait(1000 // FPS if busy else 0)  # 0 = no timeout
+            events = ([first] if first.type != pygame.NOEVENT else []) + pygame.event.get()
+        settle = bool(events)
+
+        if st.screen != prev_screen:
+            prev_screen = st.screen
+            st.drawn.clear()
+        if st.screen != "game":
             screen.fill(BLACK)
+        dirty = None  # areas to update; None = the whole window
         mx, my = pygame.mouse.get_pos()
-        events = pygame.event.get()
 
         for ev in events:
             if ev.type == pygame.QUIT:
                 running = False
+            if ev.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                st.drawn.clear()
 
         # ==============================================================
         if st.screen == "menu":
@@ -202,7 +459,7 @@ def main():
 
             # Profile list
             _txt(screen, "Select:", 80, 257, f_sm, GRAY)
-            profiles = PlayerProfile.list_profiles()
+            profiles = st.profiles.names()
             prof_rects = []
             for i, pname in enumerate(profiles[:6]):
                 col = GREEN if pname == st.selected_profile else DGRAY
@@ -215,6 +472,8 @@ def main():
             ai_lbl = "AI: RL Agent" if st.use_rl else "AI: ML Ensemble"
             r_toggle = _btn(screen, 80, 338, 220, 38, ai_lbl, f_sm, ORANGE,
                             pygame.Rect(80, 338, 220, 38).collidepoint(mx, my))
+            r_board = _btn(screen, 320, 338, 220, 38, "Leaderboard", f_sm, LBLUE,
+                           pygame.Rect(320, 338, 220, 38).collidepoint(mx, my))
 
             # Main action buttons
             r_start = _btn(screen, 80, 400, 240, 52, "Start Game", f_md, GREEN,
@@ -245,7 +504,8 @@ def main():
                     if r_create.collidepoint(mx, my) and st.profile_input_text.strip():
                         st.selected_profile = st.profile_input_text.strip()
                         # Pre-create the profile file
-                        PlayerProfile(st.selected_profile).save()
+                        if st.selected_profile not in st.profiles:
+                            st.profiles.save(PlayerProfile(st.selected_profile))
                         st.profile_input_text = ""
 
                     for r, pname in prof_rects:
@@ -260,8 +520,15 @@ def main():
                         st.screen = "game"
 
                     if r_stats.collidepoint(mx, my):
+                        st.stats_result = None
+                        query_stats()
                         st.screen = "stats"
 
+                    if r_board.collidepoint(mx, my):
+                        st.board_result = None
+                        query_board()
+                        st.screen = "board"
+
                     if r_quit.collidepoint(mx, my):
                         running = False
 
@@ -276,29 +543,41 @@ def main():
             aif = st.ai_fighter
             eng = st.engine
 
-            # Header
-            _txt(screen, f"Round {eng.round_num}", W // 2, 18, f_md, YELLOW, center=True)
-            ai_lbl = "[RL AI]" if st.use_rl else "[ML Ensemble]"
-            _txt(screen, ai_lbl, W - 140, 18, f_sm, GRAY)
+            # Static layer (background, fighters, log panel) once; after that
+            # only widgets whose state changed are redrawn and updated
+            full = not st.drawn
+            if full:
+                screen.blit(st.game_layer, (0, 0))
+            dirty = []
+
+            def widget(name, rect, state):
+                if st.drawn.get(name) == state:
+                    return False
+                st.drawn[name] = state
+                rect = pygame.Rect(rect)
+                screen.blit(st.game_layer, rect, rect)
+                dirty.append(rect)
+                return True
 
-            # Display characters
-            if player_img and ai_img:
-                screen.blit(player_img, (100, 360))
-                screen.blit(ai_img, (W - 250, 360))
+            # Header
+            if widget("round", (W // 2 - 100, 0, 200, 36), eng.round_num):
+                _txt(screen, f"Round {eng.round_num}", W // 2, 18, f_md, YELLOW, center=True)
 
             # Player bars
-            _txt(screen, p.name, 40, 52, f_md, GREEN)
-            _bar(screen, 40, 78, 340, 22, p.health, 100, GREEN)
-            _txt(screen, f"HP {p.health}/100", 390, 78, f_sm, GREEN)
-            _bar(screen, 40, 106, 340, 14, p.mp, 50, BLUE)
-            _txt(screen, f"MP {p.mp}/50", 390, 106, f_sm, BLUE)
+            if widget("player", (40, 52, 455, 72), (p.health, p.mp)):
+                _txt(screen, p.name, 40, 52, f_md, GREEN)
+                _bar(screen, 40, 78, 340, 22, p.health, 100, GREEN)
+                _txt(screen, f"HP {p.health}/100", 390, 78, f_sm, GREEN)
+                _bar(screen, 40, 106, 340, 14, p.mp, 50, BLUE)
+                _txt(screen, f"MP {p.mp}/50", 390, 106, f_sm, BLUE)
 
             # AI bars
-            _txt(screen, "AI", W - 380, 52, f_md, RED)
-            _bar(screen, W - 380, 78, 330, 22, aif.health, 100, RED)
-            _txt(screen, f"HP {aif.health}/100", W - 380 - 115, 78, f_sm, RED)
-            _bar(screen, W - 380, 106, 330, 14, aif.mp, 50, ORANGE)
-            _txt(screen, f"MP {aif.mp}/50", W - 380 - 115, 106, f_sm, ORANGE)
+            if widget("ai", (W - 495, 52, 445, 72), (aif.health, aif.mp)):
+                _txt(screen, "AI", W - 380, 52, f_md, RED)
+                _bar(screen, W - 380, 78, 330, 22, aif.health, 100, RED)
+                _txt(screen, f"HP {aif.health}/100", W - 380 - 115, 78, f_sm, RED)
+                _bar(screen, W - 380, 106, 330, 14, aif.mp, 50, ORANGE)
+                _txt(screen, f"MP {aif.mp}/50", W - 380 - 115, 106, f_sm, ORANGE)
 
             # Ensemble confidence
             if not st.use_rl:
@@ -307,27 +586,25 @@ def main():
                         f"RF:{c.get('rf',0):.0f}%  "
                         f"NN:{c.get('nn',0):.0f}%  "
                         f"NB:{c.get('nb',0):.0f}%")
-                _txt(screen, ctxt, W // 2, 132, f_sm, GRAY, center=True)
-
-            # Battle log
-            s = pygame.Surface((W - 80, 395), pygame.SRCALPHA)
-            s.fill((50, 50, 50, 180))  # Semi-transparent dark gray
-            pygame.draw.rect(s, DGRAY, s.get_rect(), 2, border_radius=6)
-            screen.blit(s, (40, 155))
-            _txt(screen, "Battle Log", 55, 162, f_sm, GRAY)
-            for i, entry in enumerate(st.logs[-16:]):
-                col = YELLOW if "defeated" in entry.lower() else WHITE
-                _txt(screen, entry[:90], 55, 182 + i * 22, f_sm, col)
+                if widget("confidence", (40, 124, W - 80, 18), ctxt):
+                    _txt(screen, ctxt, W // 2, 132, f_sm, GRAY, center=True)
+
+            # Battle log (entries are only ever appended during a match)
+            if widget("log", (44, 180, W - 88, 16 * 22), len(st.logs)):
+                for i, entry in enumerate(st.logs[-16:]):
+                    col = YELLOW if "defeated" in entry.lower() else WHITE
+                    _txt(screen, entry[:90], 55, 182 + i * 22, f_sm, col)
 
             # Move buttons
-            r_atk  = _btn(screen,  50, 572, 200, 52, "1 — Attack",   f_sm, BLUE,
-                          pygame.Rect( 50, 572, 200, 52).collidepoint(mx, my))
-            r_spc  = _btn(screen, 270, 572, 200, 52, "2 — Special",  f_sm, ORANGE,
-                          pygame.Rect(270, 572, 200, 52).collidepoint(mx, my))
-            r_rgn  = _btn(screen, 490, 572, 200, 52, "3 — Regen",    f_sm, GREEN,
-                          pygame.Rect(490, 572, 200, 52).collidepoint(mx, my))
-            r_back = _btn(screen, 720, 572, 200, 52, "Menu (Esc)",   f_sm, GRAY,
-                          pygame.Rect(720, 572, 200, 52).collidepoint(mx, my))
+            buttons = [(50, "1 — Attack", BLUE), (270, "2 — Special", ORANGE),
+                       (490, "3 — Regen", GREEN), (720, "Menu (Esc)", GRAY)]
+            r_atk, r_spc, r_rgn, r_back = [pygame.Rect(x, 572, 200, 52) for x, _, _ in buttons]
+            hovered = tuple(r.collidepoint(mx, my) for r in (r_atk, r_spc, r_rgn, r_back))
+            if widget("buttons", (50, 572, 870, 52), hovered):
+                for (x, label, color), hov in zip(buttons, hovered):
+                    _btn(screen, x, 572, 200, 52, label, f_sm, color, hov)
+            if full:
+                dirty = None
 
             def do_move(move):
                 if move == 1 and p.mp < 10:
@@ -368,47 +645,46 @@ def main():
             eng = st.engine
             winner = eng.winner if eng else "?"
             col = GREEN if winner == st.selected_profile else RED
-            _txt(screen, f"{winner} WINS!", W // 2, 95, f_xl, col, center=True)
-            _txt(screen, "Match Summary", W // 2, 170, f_lg, WHITE, center=True)
+            _txt(screen, f"{winner} WINS!", W // 2, 50, f_xl, col, center=True)
 
             if st.player:
-                _txt(screen, f"Damage dealt  : {st.player.total_damage_dealt}",
-                     W // 2, 225, f_md, GREEN, center=True)
-                _txt(screen, f"Damage taken  : {st.player.total_damage_taken}",
-                     W // 2, 262, f_md, RED, center=True)
-                _txt(screen, f"Rounds played : {eng.round_num}",
-                     W // 2, 298, f_md, WHITE, center=True)
+                _txt(screen, f"Damage dealt: {st.player.total_damage_dealt}",
+                     W // 2 - 280, 105, f_md, GREEN, center=True)
+                _txt(screen, f"Damage taken: {st.player.total_damage_taken}",
+                     W // 2, 105, f_md, RED, center=True)
+                _txt(screen, f"Rounds played: {eng.round_num}",
+                     W // 2 + 280, 105, f_md, WHITE, center=True)
                 if st.ai_fighter and not st.use_rl:
                     _txt(screen,
                          f"Final ensemble confidence: {st.ai_fighter.ensemble_confidence:.1f}%",
-                         W // 2, 334, f_sm, GRAY, center=True)
-
-            for i, p in enumerate(st.end_plots):
-                _txt(screen, f"Saved: {os.path.basename(p)}", W // 2, 368 + i * 26,
-                     f_sm, GRAY, center=True)
-
-            r_plot   = _btn(screen, W // 2 - 310, 480, 280, 48, "Generate Plots", f_md, LBLUE,
-                            pygame.Rect(W // 2 - 310, 480, 280, 48).collidepoint(mx, my))
-            r_replay = _btn(screen, W // 2 +  30, 480, 280, 48, "Play Again",     f_md, GREEN,
-                            pygame.Rect(W // 2 +  30, 480, 280, 48).collidepoint(mx, my))
-            r_home   = _btn(screen, W // 2 - 130, 548, 260, 48, "Main Menu",      f_md, GRAY,
-                            pygame.Rect(W // 2 - 130, 548, 260, 48).collidepoint(mx, my))
+                         W // 2, 138, f_sm, GRAY, center=True)
+
+            # Match charts (damage per round, cumulative damage)
+            poll_plot_jobs()
+            for i, chart in enumerate(st.end_charts):
+                screen.blit(chart, (CHART_X[i], CHART_Y))
+            if st.chart_job is not None:
+                _txt(screen, "Drawing charts…", W // 2, CHART_Y + CHART_H // 2, f_sm, GRAY, center=True)
+            if st.plot_job is not None:
+                _txt(screen, "Saving plots…", W // 2, 482, f_sm, GRAY, center=True)
+            elif st.end_plots:
+                _txt(screen, "Saved: " + ", ".join(os.path.basename(p) for p in st.end_plots),
+                     W // 2, 482, f_sm, GRAY, center=True)
+
+            r_plot   = _btn(screen, W // 2 - 310, 510, 280, 48, "Save Plots", f_md, LBLUE,
+                            pygame.Rect(W // 2 - 310, 510, 280, 48).collidepoint(mx, my))
+            r_replay = _btn(screen, W // 2 +  30, 510, 280, 48, "Play Again", f_md, GREEN,
+                            pygame.Rect(W // 2 +  30, 510, 280, 48).collidepoint(mx, my))
+            r_home   = _btn(screen, W // 2 - 130, 578, 260, 48, "Main Menu",  f_md, GRAY,
+                            pygame.Rect(W // 2 - 130, 578, 260, 48).collidepoint(mx, my))
 
             for ev in events:
                 if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
-                    if r_plot.collidepoint(mx, my) and st.tracker:
-                        p1 = plot_damage_per_round(st.tracker.match_id)
-                        p2 = plot_cumulative_damage(st.tracker.match_id)
-                        st.end_plots = [p for p in (p1, p2) if p]
-                        import platform
-                        import subprocess
-                        for p in st.end_plots:
-                            if platform.system() == 'Windows':
-                                os.startfile(p)
-                            elif platform.system() == 'Darwin':
-                                subprocess.call(('open', p))
-                            else:
-                                subprocess.call(('xdg-open', p))
+                    if r_plot.collidepoint(mx, my) and st.tracker and st.plot_job is None:
+                        # PNGs to outputs/; charts already saved from the same rounds come back at once
+                        st.plot_job = st.plots.submit_match(
+                            st.tracker.match_id, match_rows(st.tracker.rounds)
+                        )
 
                     if r_replay.collidepoint(mx, my):
                         new_game()
@@ -420,25 +696,34 @@ def main():
         # ==============================================================
         elif st.screen == "stats":
         # ==============================================================
-            prof = PlayerProfile.load_or_create(st.selected_profile)
-            _txt(screen, f"Stats — {prof.name}", W // 2, 45, f_lg, YELLOW, center=True)
-
-            rows = [
-                ("Games played",       prof.games_played),
-                ("Wins",               prof.wins),
-                ("Losses",             prof.losses),
-                ("Win rate",           f"{100 * prof.wins / max(1, prof.games_played):.1f}%"),
-                ("Total damage dealt", prof.total_damage_dealt),
-                ("Total damage taken", prof.total_damage_taken),
-                ("Total moves",        prof.total_moves),
-                ("Attack uses",        prof.move_usage_counts.get(1, 0)),
-                ("Special uses",       prof.move_usage_counts.get(2, 0)),
-                ("Regen uses",         prof.move_usage_counts.get(3, 0)),
-                ("Last played",        prof.last_played or "—"),
-            ]
+            _txt(screen, f"Stats — {st.selected_profile}", W // 2, 45, f_lg, YELLOW, center=True)
+
+            # Profile and match history are read on the IO worker
+            poll_stats_job()
+            res = st.stats_result
+            if res is None:
+                _txt(screen, "Loading…", W // 2, 300, f_md, GRAY, center=True)
+                rows = []
+            else:
+                prof = res["profile"]
+                rows = [
+                    ("Games played",       prof.games_played),
+                    ("Wins",               prof.wins),
+                    ("Losses",             prof.losses),
+                    ("Win rate",           f"{100 * prof.wins / max(1, prof.games_played):.1f}%"),
+                    ("Total damage dealt", prof.total_damage_dealt),
+                    ("Total damage taken", prof.total_damage_taken),
+                    ("Total moves",        prof.total_moves),
+                    ("Attack uses",        prof.move_usage_counts.get(1, 0)),
+                    ("Special uses",       prof.move_usage_counts.get(2, 0)),
+                    ("Regen uses",         prof.move_usage_counts.get(3, 0)),
+                    ("Last played",        prof.last_played or "—"),
+                ]
             for i, (label, val) in enumerate(rows):
-                _txt(screen, f"{label}:", 180, 105 + i * 46, f_md, GRAY)
-                _txt(screen, str(val),    500, 105 + i * 46, f_md, WHITE)
+                _txt(screen, f"{label}:", 70, 105 + i * 46, f_md, GRAY)
+                _txt(screen, str(val),    330, 105 + i * 46, f_md, WHITE)
+            if res is not None:
+                draw_trends(res["trends"], 600, 105)
 
             r_back = _btn(screen, W // 2 - 100, 628, 200, 46, "Back", f_md, LBLUE,
                           pygame.Rect(W // 2 - 100, 628, 200, 46).collidepoint(mx, my))
@@ -449,9 +734,70 @@ def main():
                 if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
                     st.screen = "menu"
 
-        pygame.display.flip()
-        clock.tick(30)
+        # ==============================================================
+        elif st.screen == "board":
+        # ==============================================================
+            by, min_games = _BOARD_VIEWS[st.board_view]
+            _txt(screen, "Leaderboard", W // 2, 45, f_lg, YELLOW, center=True)
+            r_view = _btn(screen, W // 2 - 150, 85, 300, 38,
+                          f"By: {by.replace('_', ' ')}" + (f" (≥{min_games} games)" if min_games > 1 else ""),
+                          f_sm, ORANGE, pygame.Rect(W // 2 - 150, 85, 300, 38).collidepoint(mx, my))
+
+            poll_board_job()
+            res = st.board_result
+            if res is None:
+                _txt(screen, "Loading…", W // 2, 300, f_md, GRAY, center=True)
+            else:
+                _txt(screen, "#", 120, 145, f_sm, GRAY)
+                _txt(screen, "Player", 170, 145, f_sm, GRAY)
+                _txt(screen, by.replace("_", " ").title(), 480, 145, f_sm, GRAY)
+                _txt(screen, "Games", 660, 145, f_sm, GRAY)
+                _txt(screen, "W / L", 780, 145, f_sm, GRAY)
+                for i, row in enumerate(res["rows"]):
+                    y = 180 + i * 36
+                    col = GREEN if row["name"] == st.selected_profile else WHITE
+                    value = row[by]
+                    shown = f"{100 * value:.1f}%" if by == "win_rate" else \
+                        f"{value:.1f}" if by.endswith("per_game") else f"{int(value)}"
+                    _txt(screen, str(i + 1), 120, y, f_md, col)
+                    _txt(screen, row["name"][:20], 170, y, f_md, col)
+                    _txt(screen, shown, 480, y, f_md, col)
+                    _txt(screen, str(row["games_played"]), 660, y, f_md, col)
+                    _txt(screen, f"{row['wins']} / {row['losses']}", 780, y, f_md, col)
+                if not res["rows"]:
+                    _txt(screen, "No ranked players yet", W // 2, 300, f_md, GRAY, center=True)
+                pct = res["pct"]
+                fmt = (lambda v: f"{100 * v:.1f}%") if by == "win_rate" else (lambda v: f"{v:.1f}")
+                if res["rows"]:
+                    _txt(screen, f"Median {fmt(pct[50])}   ·   p90 {fmt(pct[90])}   ·   p99 {fmt(pct[99])}"
+                         f"   ·   {res['total']} profiles", W // 2, 556, f_sm, GRAY, center=True)
+                rank = res["rank"]
+                _txt(screen, f"{st.selected_profile}: " + (f"#{rank}" if rank else "not ranked"),
+                     W // 2, 588, f_sm, LBLUE, center=True)
+
+            r_back = _btn(screen, W // 2 - 100, 628, 200, 46, "Back", f_md, LBLUE,
+                          pygame.Rect(W // 2 - 100, 628, 200, 46).collidepoint(mx, my))
+            for ev in events:
+                if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
+                    if r_view.collidepoint(mx, my):
+                        st.board_view = (st.board_view + 1) % len(_BOARD_VIEWS)
+                        query_board()
+                    if r_back.collidepoint(mx, my):
+                        st.screen = "menu"
+                if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
+                    st.screen = "menu"
 
+        if dirty is None:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+        clock.tick(FPS)
+
+    if st.engine:
+        st.engine.close()
+    # Drain queued log / profile writes and pending plots before exiting
+    st.io.close()
+    st.plots.shutdown()
     pygame.quit()
 
 
@@ -0,0 +1,237 @@
+"""Incremental tail reader for the global round log.
+
+`HistoryReader` remembers the byte offset it has consumed in an append-only
+CSV (default `logs/game_logs.csv`) and on each `read()` parses only the
+complete rows appended since, projected to the requested columns as NumPy
+arrays. Its `checkpoint()` — offset, header and a hash of the bytes just
+before the offset — can be stored by the caller and restored later; a log
+that was truncated, replaced or rewritten no longer matches, and reading
+restarts from the top (`reset` is then True after `read()`).
+
+`HistoryCache` keeps the arrays read so far, optionally persisted to an
+`.npz` file with the checkpoint, so a later process only parses new rows.
+`shared()` returns one cache per (path, columns) for the current process.
+
+Users: `AdaptiveAIOpponent.load_history` (with its snapshot),
+`visualize` (global-log fallback for a match) and `matrix.py`.
+
+Usage:
+    from ai_game.history_reader import HistoryCache
+    cache = HistoryCache(columns=["player_move", "ai_move"], cache_file="outputs/h.npz")
+    arrays = cache.refresh()       # {"player_move": ndarray, "ai_move": ndarray}
+"""
+
+import csv
+import hashlib
+import io
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .damage_tracker import GLOBAL_LOG, GLOBAL_LOG_FIELDS
+
+# Bytes of the log just before the checkpoint offset that must still match
+CHECK_BYTES = 256
+
+_STR_COLUMNS = ("timestamp", "match_id")
+# dtype per global-log column; anything else is parsed as float
+DTYPES: Dict[str, np.dtype] = {
+    name: np.dtype(object) if name in _STR_COLUMNS
+    else np.dtype(np.float64) if name == "ai_confidence"
+    else np.dtype(np.int64)
+    for name in GLOBAL_LOG_FIELDS
+}
+
+_SHARED: Dict[Tuple[str, Tuple[str, ...]], "HistoryCache"] = {}
+
+
+def _check(fh, offset: int) -> str:
+    start = max(0, offset - CHECK_BYTES)
+    fh.seek(start)
+    return hashlib.sha1(fh.read(offset - start)).hexdigest()
+
+
+def _empty(columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    return {c: np.zeros(0, dtype=DTYPES.get(c, np.float64)) for c in columns}
+
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+
+class HistoryReader:
+    """Parse only the rows appended to a CSV log since the last read."""
+
+    def __init__(
+        self,
+        path: str = GLOBAL_LOG,
+        columns: Optional[Sequence[str]] = None,
+        checkpoint: Optional[dict] = None,
+    ):
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self.offset = 0
+        self.header: Optional[bytes] = None
+        self.reset = False
+        self.rows_read = 0
+        self.bytes_read = 0
+        self._tail_check = ""
+        if checkpoint is not None:
+            self.restore(checkpoint)
+
+    def checkpoint(self) -> dict:
+        """Position to resume from; store it with whatever was built from the rows."""
+        return {"offset": self.offset, "header": self.header, "check": self._tail_check}
+
+    def restore(self, checkpoint: dict) -> bool:
+        """Resume from a checkpoint. False (and start over) if the log no longer matches it."""
+        self.offset, self.header, self._tail_check = 0, None, ""
+        try:
+            offset, header, check = checkpoint["offset"], checkpoint["header"], checkpoint["check"]
+            with open(self.path, "rb") as fh:
+                if not self._valid(fh, offset, header, check):
+                    return False
+        except (OSError, KeyError, TypeError):
+            return False
+        self.offset, self.header, self._tail_check = offset, header, check
+        return True
+
+    def read(self) -> Dict[str, np.ndarray]:
+        """Arrays for the complete rows appended since the last read."""
+        self.reset = False
+        try:
+            with open(self.path, "rb") as fh:
+                if self.header is not None and not self._valid(
+                    fh, self.offset, self.header, self._tail_check
+                ):
+                    self.offset, self.header, self.reset = 0, None, True
+                if self.header is None:
+                    fh.seek(0)
+                    self.header = fh.readline()
+                    self.offset = len(self.header)
+                fh.seek(self.offset)
+                data = fh.read()
+                end = data.rfind(b"\n") + 1  # leave a row that is still being written
+                self.offset += end
+                self._tail_check = _check(fh, self.offset)
+        except OSError:
+            return _empty(self.columns or [])
+
+        names = next(csv.reader([self.header.decode("utf-8", "replace")]), [])
+        arrays = _parse(data[:end], names, self.columns or names)
+        self.bytes_read += end
+        self.rows_read += len(next(iter(arrays.values()), ()))
+        return arrays
+
+    @staticmethod
+    def _valid(fh, offset: int, header: bytes, check: str) -> bool:
+        fh.seek(0)
+        if fh.readline() != header:
+            return False
+        size = os.fstat(fh.fileno()).st_size
+        if not len(header) <= offset <= size:
+            return False
+        return _check(fh, offset) == check
+
+
+def _parse(data: bytes, names: Sequence[str], columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Project CSV rows (no header) onto `columns`; rows with bad values are dropped."""
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise KeyError(f"columns not in log: {missing}")
+    if not data:
+        return _empty(columns)
+    import pandas as pd
+
+    kwargs = dict(header=None, names=list(names), usecols=list(columns), on_bad_lines="skip")
+    try:
+        # Fast path: every value parses as its column's dtype
+        df = pd.read_csv(io.BytesIO(data), dtype={c: DTYPES.get(c, np.float64) for c in columns}, **kwargs)
+        return {c: df[c].to_numpy() for c in columns}
+    except ValueError:
+        pass
+
+    df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, **kwargs)
+    ok = np.ones(len(df), dtype=bool)
+    parsed = {}
+    for c in columns:
+        if DTYPES.get(c) == object:
+            parsed[c] = df[c].to_numpy(dtype=object)
+            continue
+        values = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64)
+        ok &= ~np.isnan(values)
+        parsed[c] = values
+    return {
+        c: v[ok] if v.dtype == object else v[ok].astype(DTYPES.get(c, np.float64))
+        for c, v in parsed.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+class HistoryCache:
+    """All rows read so far by a HistoryReader, optionally persisted between runs."""
+
+    def __init__(
+        self,
+        path: str = GLOBAL_LOG,
+        columns: Sequence[str] = ("player_move", "ai_move"),
+        cache_file: Optional[str] = None,
+    ):
+        self.columns = list(columns)
+        self.cache_file = cache_file
+        self.reader = HistoryReader(path, self.columns)
+        self.arrays = _empty(self.columns)
+        if cache_file is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.arrays[self.columns[0]])
+
+    def refresh(self) -> Dict[str, np.ndarray]:
+        """Read new rows (all rows if the log changed) and return every column."""
+        new = self.reader.read()
+        if self.reader.reset:
+            self.arrays = _empty(self.columns)
+        if self.reader.reset or len(next(iter(new.values()), ())):
+            self.arrays = {c: np.concatenate([self.arrays[c], new[c]]) for c in self.columns}
+            if self.cache_file is not None:
+                self._save()
+        return self.arrays
+
+    def _load(self):
+        try:
+            with np.load(self.cache_file, allow_pickle=True) as npz:
+                if list(npz["columns"]) != self.columns:
+                    return
+                checkpoint = npz["checkpoint"].item()
+                arrays = {c: npz[f"col_{c}"] for c in self.columns}
+        except (OSError, KeyError, ValueError):
+            return
+        if self.reader.restore(checkpoint):
+            self.arrays = arrays
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp = f"{self.cache_file}.tmp.npz"
+        np.savez(
+            tmp,
+            columns=np.array(self.columns),
+            checkpoint=np.array(self.reader.checkpoint(), dtype=object),
+            **{f"col_{c}": a for c, a in self.arrays.items()},
+        )
+        os.replace(tmp, self.cache_file)
+
+
+def shared(path: str = GLOBAL_LOG, columns: Sequence[str] = ("player_move", "ai_move")) -> HistoryCache:
+    """The process-wide cache for `path` and `columns` (in memory only)."""
+    key = (os.path.abspath(path), tuple(columns))
+    cache = _SHARED.get(key)
+    if cache is None:
+        cache = _SHARED[key] = HistoryCache(path, columns)
+    return cache
@@ -0,0 +1,153 @@
+"""Dedicated writer thread for log and profile output.
+
+The GUI submits disk work (global-log flushes, per-match files, profile
+saves) to an `IOWorker` instead of doing it inside a frame. Jobs run one
+at a time in submission order, so a job queued after a `MatchTracker.save`
+job always sees the files it writes. Plots render in a separate process
+pool (plot_pool.py).
+
+Errors:
+  A failed job's exception is set on its Future and counted in
+  `stats()["errors"]`; `on_error(fn, exc)`, if given, is also called on the
+  worker thread (for fire-and-forget jobs nobody waits on).
+
+Backpressure:
+  The queue holds at most `maxsize` jobs. `submit` blocks while it is full,
+  so a producer that outpaces the disk slows down instead of growing memory
+  without bound. Waits are counted in `stats()["blocked_submits"]`.
+
+Drain on exit:
+  `close()` runs every queued job before the thread stops; jobs submitted
+  after that run inline. Workers still open at interpreter exit are closed
+  by an atexit hook that runs before the log writers are flushed.
+"""
+
+import atexit
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from . import log_writer  # noqa: F401 — its atexit hook must run after ours
+
+IO_QUEUE_SIZE = 64
+
+_OPEN_WORKERS = weakref.WeakSet()
+
+
+class IOWorker:
+    """Runs submitted I/O jobs in order on a daemon thread."""
+
+    def __init__(self, maxsize: int = IO_QUEUE_SIZE, name: str = "io-writer",
+                 on_error: Optional[Callable] = None):
+        self.on_error = on_error
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+        self._cond = threading.Condition()
+        self._unfinished = 0
+        self._closed = False
+
+        # Counters
+        self.jobs_done: int = 0
+        self.errors: int = 0
+        self.blocked_submits: int = 0
+        self.max_depth: int = 0
+        self.busy_seconds: float = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        _OPEN_WORKERS.add(self)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue `fn(*args, **kwargs)`; blocks while the queue is full."""
+        fut: Future = Future()
+        if self._closed or threading.current_thread() is self._thread:
+            # After close (or from inside a job) run inline
+            self._execute(fut, fn, args, kwargs)
+            return fut
+        with self._cond:
+            self._unfinished += 1
+        job = (fut, fn, args, kwargs)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.blocked_submits += 1
+            self._queue.put(job)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return fut
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted job has finished. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._unfinished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Run all queued jobs, then stop the thread."""
+        if self._closed:
+            return
+        self.drain(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        _OPEN_WORKERS.discard(self)
+
+    @property
+    def pending(self) -> int:
+        return self._unfinished
+
+    def stats(self) -> dict:
+        return {
+            "jobs_done": self.jobs_done,
+            "errors": self.errors,
+            "pending": self._unfinished,
+            "max_depth": self.max_depth,
+            "blocked_submits": self.blocked_submits,
+            "busy_seconds": self.busy_seconds,
+        }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _execute(self, fut: Future, fn: Callable, args, kwargs):
+        if not fut.set_running_or_notify_cancel():
+            return
+        t0 = time.perf_counter()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            self.errors += 1
+            fut.set_exception(exc)
+            if self.on_error is not None:
+                self.on_error(fn, exc)
+        finally:
+            self.busy_seconds += time.perf_counter() - t0
+            self.jobs_done += 1
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._execute(*job)
+            with self._cond:
+                self._unfinished -= 1
+                self._cond.notify_all()
+
+
+@atexit.register
+def close_all():
+    """Drain and stop every open worker (also runs at interpreter exit)."""
+    for worker in list(_OPEN_WORKERS):
+        worker.close()
@@ -0,0 +1,390 @@
+"""Leaderboard and population statistics over all player profiles.
+
+Rollup layout (`profiles/leaderboard/`):
+  base.npz      every profile's counters at the last compaction:
+                names + an int64 matrix with one column per STAT_COLUMNS
+  updates.log   one JSON line per profile save since then, carrying the
+                profile's new counters (not a delta, so replaying a line
+                twice is harmless)
+  rollup.lock   serialises appends and compaction
+
+`ProfileStore.save()` (and so every `update()` / `record_matches()`) calls
+`record()`, which appends one line — O(1) however many profiles exist. Once
+the log passes COMPACT_BYTES it is folded into a new base.npz. Without a base
+(first use, or profiles written before the leaderboard existed) the rollup is
+rebuilt once from the ProfileStore summaries.
+
+A `Leaderboard` keeps the rollup in NumPy arrays and `refresh()` replays only
+the log lines appended since its last call, so top-K queries
+(`argpartition`) and percentiles over 100k profiles take milliseconds
+without reading a single profile file.
+
+Usage:
+    python -m ai_game.leaderboard                      # top 10 by wins
+    python -m ai_game.leaderboard --by win_rate --min-games 10 --top 20
+    python -m ai_game.leaderboard --percentiles win_rate 50 90 99
+    python -m ai_game.leaderboard --stats
+    python -m ai_game.leaderboard --rebuild
+"""
+
+import argparse
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .filelock import locked
+from .profiles import PROFILES_DIR, PlayerProfile
+
+STAT_COLUMNS = [
+    "games_played", "wins", "losses",
+    "total_damage_dealt", "total_damage_taken", "total_moves",
+    "move_1", "move_2", "move_3",
+]
+# Derived per-profile metrics available to top() / percentiles()
+METRICS = (
+    "wins", "games_played", "win_rate", "losses",
+    "damage_per_game", "damage_taken_per_game", "damage_ratio",
+)
+COMPACT_BYTES = 1024 * 1024
+
+_BASE = "base.npz"
+_LOG = "updates.log"
+_LOCK = "rollup.lock"
+_COL = {name: i for i, name in enumerate(STAT_COLUMNS)}
+
+
+def _stats_of(profile: PlayerProfile) -> List[int]:
+    usage = profile.move_usage_counts
+    return [
+        profile.games_played, profile.wins, profile.losses,
+        profile.total_damage_dealt, profile.total_damage_taken, profile.total_moves,
+        usage.get(1, 0), usage.get(2, 0), usage.get(3, 0),
+    ]
+
+
+def _stats_of_summary(summary: dict) -> List[int]:
+    usage = {int(k): v for k, v in (summary.get("move_usage_counts") or {}).items()}
+    return [int(summary.get(c, 0) or 0) for c in STAT_COLUMNS[:6]] + [
+        usage.get(1, 0), usage.get(2, 0), usage.get(3, 0)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+
+def rollup_dir(profiles_dir: Optional[str] = None) -> str:
+    return os.path.join(profiles_dir or PROFILES_DIR, "leaderboard")
+
+
+def record(profile: PlayerProfile, profiles_dir: Optional[str] = None):
+    """Log a saved profile's counters; compacts once the log is large."""
+    directory = rollup_dir(profiles_dir)
+    os.makedirs(directory, exist_ok=True)
+    line = json.dumps({"name": profile.name, "stats": _stats_of(profile)}) + "\n"
+    with locked(os.path.join(directory, _LOCK)):
+        with open(os.path.join(directory, _LOG), "a") as fh:
+            fh.write(line)
+            size = fh.tell()
+        if size >= COMPACT_BYTES:
+            _compact_locked(profiles_dir)
+
+
+def compact(profiles_dir: Optional[str] = None):
+    """Fold updates.log into base.npz."""
+    with locked(os.path.join(rollup_dir(profiles_dir), _LOCK)):
+        _compact_locked(profiles_dir)
+
+
+def rebuild(profiles_dir: Optional[str] = None):
+    """Recreate the rollup from the profiles themselves (via the summary index)."""
+    os.makedirs(rollup_dir(profiles_dir), exist_ok=True)
+    with locked(os.path.join(rollup_dir(profiles_dir), _LOCK)):
+        _rebuild_locked(profiles_dir)
+
+
+def _rebuild_locked(profiles_dir: Optional[str]):
+    from .profiles import ProfileStore
+
+    summaries = ProfileStore(profiles_dir).summaries()
+    names = list(summaries)
+    stats = np.array([_stats_of_summary(summaries[n]) for n in names], dtype=np.int64)
+    _write_base(profiles_dir, names, stats.reshape(len(names), len(STAT_COLUMNS)))
+
+
+def _compact_locked(profiles_dir: Optional[str]):
+    if not os.path.exists(os.path.join(rollup_dir(profiles_dir), _BASE)):
+        _rebuild_locked(profiles_dir)  # the log alone misses older profiles
+        return
+    board = Leaderboard(profiles_dir, auto_rebuild=False)
+    board.refresh()
+    n = len(board)
+    _write_base(profiles_dir, board._names[:n], board._stats[:n])
+
+
+def _write_base(profiles_dir: Optional[str], names: Sequence[str], stats: np.ndarray):
+    """Replace base.npz and empty the log (caller holds the lock)."""
+    directory = rollup_dir(profiles_dir)
+    path = os.path.join(directory, _BASE)
+    tmp = os.path.join(directory, f"base.{os.getpid()}.tmp.npz")
+    np.savez(tmp, names=np.array(names, dtype=str), stats=stats)
+    os.replace(tmp, path)
+    open(os.path.join(directory, _LOG), "w").close()
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+class Leaderboard:
+    """In-memory rollup of every profile's counters with top-K / percentile queries."""
+
+    def __init__(self, profiles_dir: Optional[str] = None, auto_rebuild: bool = True):
+        self.profiles_dir = profiles_dir
+        self.directory = rollup_dir(profiles_dir)
+        self.auto_rebuild = auto_rebuild
+        self._lock = threading.Lock()
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._stats = np.zeros((0, len(STAT_COLUMNS)), dtype=np.int64)
+        self._base_id = None
+        self._offset = 0
+        self._metrics: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def refresh(self) -> bool:
+        """Apply log lines appended since the last call (reloads after a compaction)."""
+        with self._lock:
+            base_path = os.path.join(self.directory, _BASE)
+            try:
+                st = os.stat(base_path)
+                base_id = (st.st_ino, st.st_mtime_ns)
+            except OSError:
+                if not self.auto_rebuild:
+                    base_id = None
+                else:
+                    rebuild(self.profiles_dir)
+                    st = os.stat(base_path)
+                    base_id = (st.st_ino, st.st_mtime_ns)
+            changed = False
+            if base_id != self._base_id:
+                self._load_base(base_path if base_id is not None else None)
+                self._base_id, self._offset, changed = base_id, 0, True
+            try:
+                with open(os.path.join(self.directory, _LOG), "rb") as fh:
+                    size = os.fstat(fh.fileno()).st_size
+                    if size < self._offset:
+                        self._offset = 0  # emptied by a compaction we have not seen yet
+                    fh.seek(self._offset)
+                    data = fh.read()
+            except OSError:
+                data = b""
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                    self._set(entry["name"], entry["stats"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                changed = True
+            self._offset += end
+            if changed:
+                self._metrics = {}
+            return changed
+
+    def metric(self, name: str) -> np.ndarray:
+        """Per-profile values of `name` (see METRICS), aligned with names()."""
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric {name!r}; choose from {METRICS}")
+        cached = self._metrics.get(name)
+        if cached is not None:
+            return cached
+        s = self._stats[: len(self._names)]
+        games = np.maximum(s[:, _COL["games_played"]], 1).astype(np.float64)
+        if name == "win_rate":
+            values = s[:, _COL["wins"]] / games
+        elif name == "damage_per_game":
+            values = s[:, _COL["total_damage_dealt"]] / games
+        elif name == "damage_taken_per_game":
+            values = s[:, _COL["total_damage_taken"]] / games
+        elif name == "damage_ratio":
+            values = s[:, _COL["total_damage_dealt"]] / np.maximum(s[:, _COL["total_damage_taken"]], 1)
+        else:
+            values = s[:, _COL[name]].astype(np.float64)
+        self._metrics[name] = values
+        return values
+
+    def names(self) -> List[str]:
+        return self._names
+
+    def top(self, k: int = 10, by: str = "wins", min_games: int = 1) -> List[dict]:
+        """The `k` best profiles by `by` among those with at least `min_games` games."""
+        values = self.metric(by)
+        eligible = np.flatnonzero(self._stats[: len(self._names), _COL["games_played"]] >= min_games)
+        if len(eligible) == 0 or k <= 0:
+            return []
+        vals = values[eligible]
+        if k < len(vals):
+            part = np.argpartition(-vals, k - 1)[:k]
+        else:
+            part = np.arange(len(vals))
+        # Ties broken by games played, then name
+        order = sorted(
+            part,
+            key=lambda i: (-vals[i], -self._stats[eligible[i], 0], self._names[eligible[i]]),
+        )
+        return [self.row(self._names[eligible[i]], by) for i in order]
+
+    def row(self, name: str, by: Optional[str] = None) -> Optional[dict]:
+        i = self._rows.get(name)
+        if i is None:
+            return None
+        out = {"name": name, **{c: int(v) for c, v in zip(STAT_COLUMNS, self._stats[i])}}
+        out["win_rate"] = out["wins"] / max(1, out["games_played"])
+        if by is not None and by not in out:
+            out[by] = float(self.metric(by)[i])
+        return out
+
+    def rank(self, name: str, by: str = "wins", min_games: int = 1) -> Optional[int]:
+        """1-based rank of `name` (None if absent or below `min_games`)."""
+        i = self._rows.get(name)
+        if i is None or self._stats[i, _COL["games_played"]] < min_games:
+            return None
+        values = self.metric(by)
+        eligible = self._stats[: len(self._names), _COL["games_played"]] >= min_games
+        return int(np.count_nonzero(eligible & (values > values[i]))) + 1
+
+    def percentiles(self, by: str = "win_rate", qs: Sequence[float] = (50, 90, 99),
+                    min_games: int = 1) -> Dict[float, float]:
+        if not all(0 <= q <= 100 for q in qs):
+            raise ValueError(f"Percentiles must be between 0 and 100, got {list(qs)}")
+        values = self._sorted(by, min_games)
+        if not len(values):
+            return {q: float("nan") for q in qs}
+        # Same linear interpolation as np.percentile, on the cached sort
+        pos = np.asarray(qs, dtype=np.float64) / 100.0 * (len(values) - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, len(values) - 1)
+        result = values[lo] + (values[hi] - values[lo]) * (pos - lo)
+        return dict(zip(qs, result.tolist()))
+
+    def _sorted(self, by: str, min_games: int) -> np.ndarray:
+        key = f"{by}/sorted/{min_games}"
+        cached = self._metrics.get(key)
+        if cached is None:
+            values = self.metric(by)
+            mask = self._stats[: len(self._names), _COL["games_played"]] >= min_games
+            cached = self._metrics[key] = np.sort(values[mask])
+        return cached
+
+    def stats(self) -> dict:
+        """Population totals: profiles, games, win-rate quartiles, move mix, damage per game."""
+        s = self._stats[: len(self._names)]
+        totals = s.sum(axis=0) if len(s) else np.zeros(len(STAT_COLUMNS), dtype=np.int64)
+        moves = totals[_COL["move_1"]: _COL["move_3"] + 1]
+        games = int(totals[_COL["games_played"]])
+        return {
+            "profiles": len(self._names),
+            "active_profiles": int(np.count_nonzero(s[:, 0])) if len(s) else 0,
+            "games": games,
+            "win_rate_quartiles": self.percentiles("win_rate", (25, 50, 75)),
+            "move_mix": (moves / max(1, moves.sum())).tolist(),
+            "damage_per_game": totals[_COL["total_damage_dealt"]] / max(1, games),
+            "damage_taken_per_game": totals[_COL["total_damage_taken"]] / max(1, games),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _load_base(self, path: Optional[str]):
+        names, stats = [], np.zeros((0, len(STAT_COLUMNS)), dtype=np.int64)
+        if path is not None:
+            try:
+                with np.load(path) as npz:
+                    names = npz["names"].tolist()
+                    stats = npz["stats"].astype(np.int64).reshape(len(names), len(STAT_COLUMNS))
+            except (OSError, ValueError, KeyError):
+                names, stats = [], stats
+        self._names = names
+        self._rows = {n: i for i, n in enumerate(names)}
+        self._stats = stats.copy()
+
+    def _set(self, name: str, stats: Sequence[int]):
+        i = self._rows.get(name)
+        if i is None:
+            i = len(self._names)
+            if i == len(self._stats):
+                grown = np.zeros((max(16, 2 * i), len(STAT_COLUMNS)), dtype=np.int64)
+                grown[:i] = self._stats
+                self._stats = grown
+            self._names.append(name)
+            self._rows[name] = i
+        self._stats[i] = stats
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Player leaderboard and population stats")
+    parser.add_argument("--top", type=int, default=10, help="Rows to show")
+    parser.add_argument("--by", choices=METRICS, default="wins", help="Ranking metric")
+    parser.add_argument("--min-games", type=int, default=1, help="Ignore profiles with fewer games")
+    parser.add_argument("--percentiles", nargs="+", metavar=("METRIC", "Q"),
+                        help="e.g. --percentiles win_rate 50 90 99")
+    parser.add_argument("--rank", metavar="NAME", help="Show one profile's rank")
+    parser.add_argument("--stats", action="store_true", help="Population statistics")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the rollup from profiles/")
+    args = parser.parse_args()
+    if args.percentiles:
+        metric, qs = args.percentiles[0], args.percentiles[1:]
+        if metric not in METRICS:
+            parser.error(f"--percentiles: unknown metric {metric!r} (choose from {', '.join(METRICS)})")
+        try:
+            qs = [float(q) for q in qs] or [50, 90, 99]
+        except ValueError:
+            parser.error(f"--percentiles: percentiles must be numbers, got {' '.join(qs)}")
+        if not all(0 <= q <= 100 for q in qs):
+            parser.error("--percentiles: percentiles must be between 0 and 100")
+
+    if args.rebuild:
+        rebuild()
+    board = Leaderboard()
+    board.refresh()
+
+    if args.percentiles:
+        for q, v in board.percentiles(metric, qs, args.min_games).items():
+            print(f"  {metric} p{q:g}: {v:.3f}")
+    elif args.stats:
+        s = board.stats()
+        print(f"Profiles: {s['profiles']} ({s['active_profiles']} with games)  |  Games: {s['games']}")
+        q = s["win_rate_quartiles"]
+        print(f"Win rate quartiles: {q[25]:.3f} / {q[50]:.3f} / {q[75]:.3f}")
+        mix = s["move_mix"]
+        print(f"Move mix: Attack {mix[0]:.1%}  Special {mix[1]:.1%}  Regen {mix[2]:.1%}")
+        print(f"Damage per game: dealt {s['damage_per_game']:.1f}  taken {s['damage_taken_per_game']:.1f}")
+    elif args.rank:
+        r = board.rank(args.rank, args.by, args.min_games)
+        print(f"{args.rank}: " + (f"#{r} of {len(board)} by {args.by}" if r else "not ranked"))
+    else:
+        print(f"{'#':>4}  {'Player':<20} {args.by:>12} {'Games':>7} {'W':>6} {'L':>6}")
+        for i, row in enumerate(board.top(args.top, args.by, args.min_games), 1):
+            value = row[args.by]
+            shown = f"{value:.3f}" if args.by in ("win_rate", "damage_ratio") else f"{value:.1f}" \
+                if args.by.endswith("per_game") else f"{int(value)}"
+            print(f"{i:>4}  {row['name'][:20]:<20} {shown:>12} {row['games_played']:>7} "
+                  f"{row['wins']:>6} {row['losses']:>6}")
+
+
+if __name__ == "__main__":
+    main()
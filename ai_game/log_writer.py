@@ -0,0 +1,166 @@
+"""Buffered, batched CSV appender for the global round log.
+
+`MatchTracker` used to open, append one row and close `logs/game_logs.csv`
+on every round. `BufferedCSVWriter` keeps rows in memory and writes them in
+one `writerows` call through a handle that stays open between flushes.
+
+Flush policy (any combination):
+  flush_rows — flush once this many rows are pending
+  flush_ms   — flush when the oldest pending row is this old; checked on
+               each append (there is no timer thread)
+  explicit   — `flush()` (MatchTracker calls it at match end) and `close()`
+With neither threshold set, rows are written only by explicit flushes.
+Given an `io` worker (io_worker.IOWorker), threshold flushes are queued on
+it instead of running inside `append`.
+Every writer still open at interpreter exit is flushed and closed: the
+module holds a reference to each writer until `close()`, so dropping one
+without closing it keeps its rows for that exit flush.
+
+The bytes written are the same as `csv.DictWriter` with the same field
+names: a header when the file is new or empty, then one row per record.
+"""
+
+import atexit
+import csv
+import os
+import threading
+import time
+from typing import List, Optional, Sequence
+
+# Writers not yet closed (strong references, see the module docstring)
+_OPEN_WRITERS: set = set()
+
+
+class BufferedCSVWriter:
+    """Append rows to a CSV file in batches."""
+
+    def __init__(
+        self,
+        path: str,
+        fieldnames: Sequence[str],
+        flush_rows: Optional[int] = None,
+        flush_ms: Optional[float] = None,
+        io=None,
+    ):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_ms = flush_ms
+        self.io = io
+        self._flush_queued = False
+
+        # _lock guards the buffer only, so appends never wait on the disk;
+        # _write_lock serialises flushes and keeps rows in order
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: List[list] = []
+        self._oldest: float = 0.0
+        self._fh = None
+        self._csv = None
+        self._closed = False
+
+        # Counters
+        self.rows_written: int = 0
+        self.flushes: int = 0
+
+        _OPEN_WRITERS.add(self)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def append(self, row: Sequence):
+        """Queue one row (values in `fieldnames` order); may trigger a flush."""
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"append to closed writer for {self.path}")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(row)
+            if not self._due():
+                return
+            if self.io is not None:
+                if self._flush_queued:
+                    return
+                self._flush_queued = True
+        if self.io is not None:
+            self.io.submit(self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        """Write all pending rows and flush the file handle."""
+        with self._write_lock:
+            self._write(self._take())
+
+    def close(self):
+        """Flush and release the file handle. Further appends raise."""
+        with self._write_lock:
+            with self._lock:
+                if self._closed:
+                    return
+                self._closed = True
+                rows = self._take_locked()
+            self._write(rows)
+            self._release()
+        _OPEN_WRITERS.discard(self)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _due(self) -> bool:
+        if self.flush_rows is not None and len(self._pending) >= self.flush_rows:
+            return True
+        if self.flush_ms is not None:
+            return (time.monotonic() - self._oldest) * 1000.0 >= self.flush_ms
+        return False
+
+    def _take(self) -> List[list]:
+        with self._lock:
+            return self._take_locked()
+
+    def _take_locked(self) -> List[list]:
+        rows, self._pending = self._pending, []
+        self._flush_queued = False
+        return rows
+
+    def _write(self, rows: List[list]):
+        if not rows:
+            return
+        self._ensure_open()
+        self._csv.writerows(rows)
+        self._fh.flush()
+        self.rows_written += len(rows)
+        self.flushes += 1
+
+    def _ensure_open(self):
+        """Open (or reopen, if the file was removed or replaced) in append mode."""
+        if self._fh is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._fh.fileno()).st_ino:
+                    return
+            except OSError:
+                pass
+            self._fh.close()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fh = open(self.path, "a", newline="")
+        self._csv = csv.writer(self._fh)
+        if self._fh.tell() == 0:
+            self._csv.writerow(self.fieldnames)
+
+    def _release(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = self._csv = None
+
+
+@atexit.register
+def close_all():
+    """Flush and close every open writer (also runs at interpreter exit)."""
+    for writer in list(_OPEN_WRITERS):
+        writer.close()
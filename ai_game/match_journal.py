@@ -0,0 +1,329 @@
+"""Write-ahead journal for matches in progress.
+
+`MatchTracker` appends every round to `logs/journal/<match_id>.wal` before
+anything else sees it, and deletes the journal once `save()` has written the
+per-match files. A journal left behind therefore means the process died (or
+the user quit) mid-match, and `recover()` — run at GUI/CLI startup — repairs
+it on the next start.
+
+File format (JSON lines):
+  {"type": "begin", "match_id": ..., "log_offset": <game_logs.csv size>,
+   "segmented": <rows go to logs/segments/>, "started": <epoch seconds>}
+  {"type": "round", ...RoundRecord fields...}      one per round
+A torn last line (crash during a write) is ignored.
+
+Durability:
+  Each record is flushed to the OS immediately, so a crashed process loses
+  nothing. fsync — needed only to survive an OS crash or power loss — is
+  batched: every `fsync_every` records or `fsync_ms` milliseconds, queued
+  on the tracker's IOWorker when it has one.
+
+Recovery, per abandoned journal:
+  finalize — append the rounds missing from game_logs.csv (rows written
+             after `log_offset` are matched by match_id), then write
+             match_<id>.csv/.jsonl and the round-store entry, as save() would
+  discard  — remove the match's rows from game_logs.csv and delete its files
+With a segmented log (segment_log.py) the rows are looked for in segments
+modified since the match started instead.
+Journals still locked by a live process are left alone.
+
+Usage:
+    python -m ai_game.match_journal              # finalize abandoned matches
+    python -m ai_game.match_journal --discard
+    python -m ai_game.match_journal --dry-run
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from dataclasses import asdict, astuple
+from typing import List
+
+from .damage_tracker import LOGS_DIR, GLOBAL_LOG, GLOBAL_LOG_FIELDS, RoundRecord
+from .filelock import try_lock, unlock
+
+JOURNAL_DIR = os.path.join(LOGS_DIR, "journal")
+FSYNC_EVERY = 16
+FSYNC_MS = 1000.0
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+
+class MatchJournal:
+    """Append-only journal of one live match."""
+
+    def __init__(
+        self,
+        match_id: str,
+        directory: str = JOURNAL_DIR,
+        fsync_every: int = FSYNC_EVERY,
+        fsync_ms: float = FSYNC_MS,
+        io=None,
+        segmented: bool = False,
+    ):
+        self.match_id = match_id
+        self.fsync_every = fsync_every
+        self.fsync_ms = fsync_ms
+        self.io = io
+        self.path = os.path.join(directory, f"{match_id}.wal")
+
+        os.makedirs(directory, exist_ok=True)
+        self._fh = open(self.path, "a")
+        try_lock(self._fh)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.syncs = 0
+        if self._fh.tell() == 0:
+            try:
+                offset = os.path.getsize(GLOBAL_LOG)
+            except OSError:
+                offset = 0
+            self._write({
+                "type": "begin", "match_id": match_id, "log_offset": offset,
+                "segmented": segmented, "started": time.time(),
+            })
+
+    def append(self, rec: RoundRecord):
+        self._write({"type": "round", **asdict(rec)})
+
+    def commit(self):
+        """The match is saved: drop the journal."""
+        if self._fh is None:
+            return
+        self.release()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def release(self):
+        """Close without committing; the match is recovered on a later start."""
+        if self._fh is None:
+            return
+        unlock(self._fh)
+        self._fh.close()
+        self._fh = None
+
+    def sync(self):
+        fh = self._fh
+        if fh is None:
+            return
+        try:
+            os.fsync(fh.fileno())
+        except (OSError, ValueError):
+            return  # closed by commit() meanwhile
+        self.syncs += 1
+
+    def _write(self, record: dict):
+        self._fh.write(json.dumps(record) + "\n")
+        self._fh.flush()
+        self._unsynced += 1
+        now = time.monotonic()
+        if (
+            self._unsynced >= self.fsync_every
+            or (now - self._last_sync) * 1000.0 >= self.fsync_ms
+        ):
+            self._unsynced = 0
+            self._last_sync = now
+            if self.io is not None:
+                self.io.submit(self.sync)
+            else:
+                self.sync()
+
+
+# ---------------------------------------------------------------------------
+# Recovery
+# ---------------------------------------------------------------------------
+
+
+def _read_journal(path: str):
+    """(header, rounds) from a journal; a torn trailing line is skipped."""
+    header, rounds = None, []
+    with open(path) as fh:
+        for line in fh:
+            if not line.endswith("\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            kind = record.pop("type", None)
+            if kind == "begin":
+                header = record
+            elif kind == "round":
+                rounds.append(RoundRecord(**record))
+    return header, rounds
+
+
+def _repair_log_tail(path: str):
+    """Cut a half-written last row so appends start on a fresh line."""
+    try:
+        with open(path, "rb+") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            fh.seek(max(0, size - 4096))
+            tail = fh.read()
+            if tail.endswith(b"\n"):
+                return
+            cut = tail.rfind(b"\n")
+            fh.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+    except OSError:
+        pass
+
+
+def _log_rows_after(path: str, offset: int):
+    """Rows of game_logs.csv starting at the first full line at/after `offset`."""
+    with open(path, "rb") as fh:
+        size = fh.seek(0, os.SEEK_END)
+        if offset > size:
+            offset = 0  # log was truncated or replaced since the match began
+        fh.seek(offset)
+        data = fh.read()
+    if offset == 0:
+        data = data.split(b"\n", 1)[1] if b"\n" in data else b""  # header
+    return offset, data
+
+
+def _finalize(match_id: str, rounds: List[RoundRecord], header: dict):
+    from .damage_tracker import MatchTracker
+    from .log_writer import BufferedCSVWriter
+
+    # Global log: add the rounds that never got flushed
+    if header.get("segmented"):
+        from .segment_log import SegmentedLogWriter, match_row_count
+        missing = rounds[match_row_count(match_id, header.get("started", 0.0)):]
+        make_writer = SegmentedLogWriter
+    else:
+        missing = rounds[_log_row_count(match_id, header.get("log_offset", 0)):]
+        make_writer = lambda: BufferedCSVWriter(GLOBAL_LOG, GLOBAL_LOG_FIELDS)  # noqa: E731
+    if missing:
+        writer = make_writer()
+        for rec in missing:
+            writer.append(astuple(rec) + (match_id,))
+        writer.close()
+
+    # Per-match files and round store, skipping a store entry that made it
+    tracker = MatchTracker(match_id, journal=False)
+    store_range = tracker._store().match_range(match_id)
+    if store_range is not None and store_range[1] - store_range[0] == len(rounds):
+        tracker._write_match_files(rounds, store=False)
+    else:
+        tracker._write_match_files(rounds)
+    tracker.close()
+
+
+def _log_row_count(match_id: str, log_offset: int) -> int:
+    """Rows of `match_id` in game_logs.csv after `log_offset`."""
+    written = 0
+    if os.path.exists(GLOBAL_LOG):
+        _repair_log_tail(GLOBAL_LOG)
+        _, data = _log_rows_after(GLOBAL_LOG, log_offset)
+        for row in csv.reader(io.StringIO(data.decode("utf-8", "replace"))):
+            if row and row[-1] == match_id:
+                written += 1
+    return written
+
+
+def _discard(match_id: str, header: dict):
+    log_offset = header.get("log_offset", 0)
+    if header.get("segmented"):
+        from .segment_log import remove_match_rows
+        remove_match_rows(match_id, header.get("started", 0.0))
+    elif os.path.exists(GLOBAL_LOG):
+        _repair_log_tail(GLOBAL_LOG)
+        offset, data = _log_rows_after(GLOBAL_LOG, log_offset)
+        lines = data.splitlines(keepends=True)
+        kept = [
+            line for line in lines
+            if next(csv.reader([line.decode("utf-8", "replace")]), [None])[-1] != match_id
+        ]
+        if len(kept) != len(lines):
+            with open(GLOBAL_LOG, "rb+") as fh:
+                if offset == 0:
+                    header = fh.readline()
+                    fh.seek(len(header))
+                else:
+                    fh.seek(offset)
+                fh.write(b"".join(kept))
+                fh.truncate()
+    for ext in ("csv", "jsonl"):
+        try:
+            os.remove(os.path.join(LOGS_DIR, f"match_{match_id}.{ext}"))
+        except OSError:
+            pass
+
+
+def recover(
+    policy: str = "finalize",
+    directory: str = JOURNAL_DIR,
+    min_rounds: int = 1,
+    dry_run: bool = False,
+) -> List[dict]:
+    """
+    Finalize or discard every abandoned journal in `directory`. Matches with
+    fewer than `min_rounds` rounds are always discarded. Returns one
+    {"match_id", "rounds", "action"} dict per journal handled.
+    """
+    if policy not in ("finalize", "discard"):
+        raise ValueError(f"Unknown recovery policy: {policy!r}")
+    if not os.path.isdir(directory):
+        return []
+
+    results = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".wal"):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "a") as lock_fh:
+            if not try_lock(lock_fh):
+                continue  # a live process still owns this match
+            try:
+                header, rounds = _read_journal(path)
+                header = header or {}
+                match_id = header.get("match_id", name[:-4])
+                action = policy if len(rounds) >= min_rounds else "discard"
+                if not dry_run:
+                    if action == "finalize":
+                        _finalize(match_id, rounds, header)
+                    else:
+                        _discard(match_id, header)
+                    os.remove(path)
+                results.append({"match_id": match_id, "rounds": len(rounds), "action": action})
+            finally:
+                unlock(lock_fh)
+    return results
+
+
+def report(results: List[dict], dry_run: bool = False):
+    verb = "Abandoned" if dry_run else "Recovered"
+    for r in results:
+        print(f"{verb} match {r['match_id']} ({r['rounds']} rounds): {r['action']}")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recover matches interrupted mid-game")
+    parser.add_argument("--discard", action="store_true",
+                        help="Remove abandoned matches instead of finalizing them")
+    parser.add_argument("--dry-run", action="store_true", help="Only list abandoned matches")
+    args = parser.parse_args()
+
+    results = recover("discard" if args.discard else "finalize", dry_run=args.dry_run)
+    if not results:
+        print("No abandoned matches.")
+    report(results, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Background plot rendering with a render cache keyed by match content.
+
+`PlotPool.submit_match()` returns a `concurrent.futures.Future` for the
+per-match charts (damage per round, cumulative damage). Rendering runs in
+a process pool, so matplotlib's import and drawing never hold the GIL of
+the GUI process. The pool is created on first use with the "spawn" start
+method: forking the threaded GUI process is unsafe.
+
+Render cache:
+  Each chart is keyed by a SHA-1 of what is drawn: RENDER_VERSION, the
+  chart kind, the match id and the (round_num, player_damage, ai_damage)
+  rows. `outputs/render_cache.json` maps output file name -> key, so an
+  unchanged match is never re-rendered (report.py keeps one per report
+  directory). submit_match() checks the index
+  before dispatching and returns an already-completed future on a hit.
+  Workers update the index under an advisory lock (temp file + rename).
+  Bump RENDER_VERSION when a chart's appearance changes.
+
+In-memory charts:
+  `PlotPool.submit_images()` draws the same charts into Agg buffers and
+  returns their RGBA bytes instead of files, for the GUI's end screen
+  (pygame.image.frombuffer); these are not cached or written to disk.
+
+Callers that hold the match in memory (MatchTracker.rounds) pass the rows
+in; otherwise they are read as visualize does (round store, match CSV,
+global log).
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .filelock import locked
+from .visualize import OUTPUTS_DIR
+
+RENDER_VERSION = 1
+CACHE_INDEX_NAME = "render_cache.json"
+# Per-match charts: outputs/<kind>_<match_id>.png, drawn by visualize.plot_<kind>
+MATCH_PLOTS = ("damage_per_round", "cumulative_damage")
+_ROW_FIELDS = ("round_num", "player_damage", "ai_damage")
+
+# index path -> ((mtime_ns, size), index) as last read
+_INDEX_CACHE: Dict[str, tuple] = {}
+
+
+def match_rows(rounds) -> List[dict]:
+    """Plot rows from MatchTracker.rounds (RoundRecord objects)."""
+    return [{f: int(getattr(r, f)) for f in _ROW_FIELDS} for r in rounds]
+
+
+def render_key(kind: str, match_id: str, rows: Sequence[dict]) -> str:
+    h = hashlib.sha1(f"{RENDER_VERSION}|{kind}|{match_id}|".encode())
+    for r in rows:
+        h.update(("%d,%d,%d;" % tuple(int(r[f]) for f in _ROW_FIELDS)).encode())
+    return h.hexdigest()
+
+
+def _output_path(kind: str, match_id: str) -> str:
+    return os.path.join(OUTPUTS_DIR, f"{kind}_{match_id}.png")
+
+
+# ---------------------------------------------------------------------------
+# Cache index
+# ---------------------------------------------------------------------------
+
+
+def read_index(directory: str = OUTPUTS_DIR) -> Dict[str, str]:
+    """Output file name -> render key; re-parsed only when the file changes."""
+    path = os.path.join(directory, CACHE_INDEX_NAME)
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached_index = _INDEX_CACHE.get(path)
+        if cached_index is not None and cached_index[0] == stamp:
+            return cached_index[1]
+        with open(path) as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    _INDEX_CACHE[path] = (stamp, index)
+    return index
+
+
+def record(entries: Dict[str, str], directory: str = OUTPUTS_DIR):
+    """Add rendered files (name -> key) to the directory's index."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, CACHE_INDEX_NAME)
+    with locked(f"{path}.lock"):
+        index = dict(read_index(directory))
+        index.update(entries)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(index, fh, indent=0)
+        os.replace(tmp, path)
+
+
+def cached(kind: str, match_id: str, key: str, index: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """Path of the chart if it is on disk and was rendered from the same data."""
+    path = _output_path(kind, match_id)
+    index = read_index() if index is None else index
+    if index.get(os.path.basename(path)) == key and os.path.exists(path):
+        return path
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Rendering (runs in the pool's worker processes)
+# ---------------------------------------------------------------------------
+
+
+def render_match(
+    match_id: str,
+    rows: Optional[List[dict]] = None,
+    kinds: Sequence[str] = MATCH_PLOTS,
+    force: bool = False,
+) -> List[str]:
+    """Render the match charts that are missing or stale; returns every chart path."""
+    from . import visualize
+
+    if rows is None:
+        rows = visualize._load_match_csv(match_id)
+    if not rows:
+        return []
+    index = read_index()
+    paths, rendered = [], {}
+    for kind in kinds:
+        key = render_key(kind, match_id, rows)
+        path = None if force else cached(kind, match_id, key, index)
+        if path is None:
+            path = getattr(visualize, f"plot_{kind}")(match_id, rows=rows)
+            if path:
+                rendered[os.path.basename(path)] = key
+        if path:
+            paths.append(path)
+    if rendered:
+        record(rendered)
+    return paths
+
+
+def match_images(
+    match_id: str,
+    rows: List[dict],
+    kinds: Sequence[str] = MATCH_PLOTS,
+    size: Tuple[int, int] = (470, 300),
+) -> List[tuple]:
+    """(kind, RGBA bytes, (width, height)) of each match chart, drawn in memory."""
+    from .visualize import render_match_chart
+
+    return [(kind, *render_match_chart(kind, match_id, rows, size)) for kind in kinds]
+
+
+def _warm():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+
+class PlotPool:
+    """
+    Process pool for plot jobs. `max_workers=0` renders on one background
+    thread instead (no extra processes).
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor = None
+        self._warmed = False
+
+        # Counters
+        self.submitted: int = 0
+        self.cache_hits: int = 0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Run a picklable module-level `fn` in the pool."""
+        self.submitted += 1
+        return self._pool().submit(fn, *args, **kwargs)
+
+    def submit_match(self, match_id: str, rows: Optional[List[dict]] = None,
+                     kinds: Sequence[str] = MATCH_PLOTS) -> Future:
+        """Future of the match's chart paths; already done if every chart is cached."""
+        if rows is not None:
+            index = read_index()
+            hits = [cached(k, match_id, render_key(k, match_id, rows), index) for k in kinds]
+            if all(hits):
+                self.cache_hits += 1
+                fut: Future = Future()
+                fut.set_result(hits)
+                return fut
+        return self.submit(render_match, match_id, rows, tuple(kinds))
+
+    def submit_images(self, match_id: str, rows: List[dict],
+                      kinds: Sequence[str] = MATCH_PLOTS,
+                      size: Tuple[int, int] = (470, 300)) -> Future:
+        """Future of match_images(): the charts as RGBA buffers, no files."""
+        return self.submit(match_images, match_id, rows, tuple(kinds), size)
+
+    def warm(self):
+        """Start the workers and import matplotlib there ahead of the first plot."""
+        if not self._warmed:
+            self._warmed = True
+            for _ in range(max(1, self.max_workers)):
+                self._pool().submit(_warm)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            if self.max_workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(1, thread_name_prefix="plot")
+        return self._executor
+
+    def __enter__(self) -> "PlotPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
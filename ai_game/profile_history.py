@@ -0,0 +1,274 @@
+"""Per-profile append-only history of match summaries.
+
+Each profile gets `profiles/history/<name>.bin`: a 16-byte header (magic,
+version, record size) followed by one fixed-width record per match
+(RECORD_DTYPE). Records are only ever appended, so a file is read with a
+single `np.fromfile` (or memory-mapped) and the last N matches are the
+last N * itemsize bytes. A torn record left by a crash is ignored by
+readers and cut off by the next append, which holds an advisory lock.
+
+`ProfileStore.record_match()` / `record_matches()` / `ProfileBatch` append
+here in the same step that updates the profile's counters; profiles
+updated through `update()` alone (or played before this existed) have no
+history for those matches.
+
+Queries (all vectorised over the record array):
+  last(name, n)                 the most recent n records
+  between(name, start, end)     records in a timestamp range
+  rolling_win_rate(r, window)   win rate over a trailing window
+  move_mix(r, window)           trailing attack/special/regen shares
+  move_mix_drift(r, window)     total-variation distance between each
+                                window's move mix and the window before
+
+Usage:
+    python -m ai_game.profile_history NAME [--last 20] [--window 10] [--plot]
+"""
+
+import argparse
+import datetime
+import os
+import struct
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .filelock import lock, unlock
+from .profiles import PROFILES_DIR
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),       # epoch seconds at match end
+    ("match_id", "S24"),
+    ("won", "u1"),
+    ("rounds", "<u2"),
+    ("damage_dealt", "<i4"),
+    ("damage_taken", "<i4"),
+    ("moves", "<i4"),
+    ("move_1", "<u2"),
+    ("move_2", "<u2"),
+    ("move_3", "<u2"),
+])
+_MAGIC = b"AIPH"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, reserved
+HEADER_LEN = _HEADER.size
+
+# path -> ((size, mtime_ns), records)
+_CACHE: Dict[str, Tuple[tuple, np.ndarray]] = {}
+
+
+def history_path(name: str, profiles_dir: Optional[str] = None) -> str:
+    return os.path.join(profiles_dir or PROFILES_DIR, "history", f"{name}.bin")
+
+
+def to_records(results: Iterable[dict]) -> np.ndarray:
+    """record_match results (keyword dicts, optionally with match_id / rounds) as records."""
+    results = list(results)
+    recs = np.zeros(len(results), dtype=RECORD_DTYPE)
+    now = int(time.time())
+    for i, r in enumerate(results):
+        usage = {int(k): v for k, v in r.get("move_usage", {}).items()}
+        recs[i] = (
+            r.get("timestamp", now), str(r.get("match_id") or "").encode()[:24],
+            bool(r["won"]), r.get("rounds", 0),
+            r["damage_dealt"], r["damage_taken"], r["moves"],
+            usage.get(1, 0), usage.get(2, 0), usage.get(3, 0),
+        )
+    return recs
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+
+def append(name: str, results: Iterable[dict], profiles_dir: Optional[str] = None) -> int:
+    """Append one record per result; returns the number written."""
+    recs = to_records(results)
+    if not len(recs):
+        return 0
+    path = history_path(name, profiles_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as fh:
+        lock(fh)
+        try:
+            size = fh.seek(0, os.SEEK_END)
+            if size < HEADER_LEN:
+                fh.truncate(0)
+                fh.write(_HEADER.pack(_MAGIC, _VERSION, RECORD_DTYPE.itemsize, 0))
+            else:
+                torn = (size - HEADER_LEN) % RECORD_DTYPE.itemsize
+                if torn:
+                    fh.truncate(size - torn)
+            fh.write(recs.tobytes())
+        finally:
+            unlock(fh)
+    return len(recs)
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+
+def load(name: str, profiles_dir: Optional[str] = None) -> np.ndarray:
+    """Every record of `name`, oldest first (cached until the file changes)."""
+    path = history_path(name, profiles_dir)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    key = (st.st_size, st.st_mtime_ns)
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "rb") as fh:
+        header = fh.read(HEADER_LEN)
+        if len(header) < HEADER_LEN:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        magic, version, itemsize, _ = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION or itemsize != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: not a version {_VERSION} profile history")
+        n = (st.st_size - HEADER_LEN) // itemsize
+        recs = np.fromfile(fh, dtype=RECORD_DTYPE, count=n)
+    _CACHE[path] = (key, recs)
+    return recs
+
+
+def last(name: str, n: int, profiles_dir: Optional[str] = None) -> np.ndarray:
+    """The `n` most recent records."""
+    path = history_path(name, profiles_dir)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    total = max(0, (size - HEADER_LEN) // RECORD_DTYPE.itemsize)
+    if n >= total:
+        return load(name, profiles_dir)
+    # Read only the tail
+    with open(path, "rb") as fh:
+        fh.seek(HEADER_LEN + (total - n) * RECORD_DTYPE.itemsize)
+        return np.fromfile(fh, dtype=RECORD_DTYPE, count=n)
+
+
+def between(name: str, start: Optional[float] = None, end: Optional[float] = None,
+            profiles_dir: Optional[str] = None) -> np.ndarray:
+    """
+    Records with start <= timestamp < end (epoch seconds; None = open), in
+    file order. Timestamps are when each match was recorded, and batched or
+    concurrent writers can append them out of order, so this is a mask
+    rather than a binary search.
+    """
+    recs = load(name, profiles_dir)
+    ts = recs["timestamp"]
+    keep = np.ones(len(recs), dtype=bool)
+    if start is not None:
+        keep &= ts >= start
+    if end is not None:
+        keep &= ts < end
+    return recs[keep]
+
+
+# ---------------------------------------------------------------------------
+# Trends
+# ---------------------------------------------------------------------------
+
+
+def _trailing_sum(x: np.ndarray, window: int) -> np.ndarray:
+    c = np.cumsum(x, axis=0, dtype=np.float64)
+    out = c.copy()
+    out[window:] -= c[:-window]
+    return out
+
+
+def rolling_win_rate(recs: np.ndarray, window: int = 10) -> np.ndarray:
+    """Win rate over the last `window` matches (fewer at the start), per match."""
+    if not len(recs):
+        return np.zeros(0)
+    counts = np.minimum(np.arange(1, len(recs) + 1), window)
+    return _trailing_sum(recs["won"].astype(np.float64), window) / counts
+
+
+def move_mix(recs: np.ndarray, window: int = 10) -> np.ndarray:
+    """(n, 3) attack / special / regen shares over the last `window` matches."""
+    if not len(recs):
+        return np.zeros((0, 3))
+    usage = np.stack([recs["move_1"], recs["move_2"], recs["move_3"]], axis=1).astype(np.float64)
+    sums = _trailing_sum(usage, window)
+    totals = sums.sum(axis=1, keepdims=True)
+    return np.divide(sums, totals, out=np.full_like(sums, 1 / 3), where=totals > 0)
+
+
+def move_mix_drift(recs: np.ndarray, window: int = 10) -> np.ndarray:
+    """
+    Total-variation distance (0..1) between the move mix of the window
+    ending at each match and of the window before it; NaN for the first
+    2 * window - 1 matches.
+    """
+    mix = move_mix(recs, window)
+    drift = np.full(len(mix), np.nan)
+    if len(mix) >= 2 * window:
+        drift[2 * window - 1:] = 0.5 * np.abs(mix[2 * window - 1:] - mix[window - 1:-window]).sum(axis=1)
+    return drift
+
+
+def summary(name: str, window: int = 10, span: int = 100,
+            profiles_dir: Optional[str] = None) -> dict:
+    """Recent-form figures for the stats screen; the trend covers the last `span` matches."""
+    recs = load(name, profiles_dir)
+    if not len(recs):
+        return {"matches": 0}
+    tail = recs[-(span + 2 * window):]
+    recent = recs[-window:]
+    drift = move_mix_drift(tail, window)
+    return {
+        "matches": len(recs),
+        "recent": len(recent),
+        "recent_win_rate": float(recent["won"].mean()),
+        "overall_win_rate": float(recs["won"].mean()),
+        "recent_damage": float(recent["damage_dealt"].mean()),
+        "recent_mix": move_mix(recent, window)[-1].tolist(),
+        "drift": None if np.isnan(drift[-1]) else float(drift[-1]),
+        "trend": rolling_win_rate(tail, window)[-span:],
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-profile match history")
+    parser.add_argument("name", help="Profile name")
+    parser.add_argument("--last", type=int, default=20, help="Matches to list")
+    parser.add_argument("--window", type=int, default=10, help="Rolling window (matches)")
+    parser.add_argument("--plot", action="store_true", help="Save a trend chart to outputs/")
+    args = parser.parse_args()
+
+    recs = load(args.name)
+    if not len(recs):
+        print(f"No match history for {args.name}.")
+        return
+    rate = rolling_win_rate(recs, args.window)
+    mix = move_mix(recs, args.window)
+    drift = move_mix_drift(recs, args.window)
+    start = max(0, len(recs) - args.last)
+    print(f"{args.name}: {len(recs)} matches  |  win rate {recs['won'].mean():.1%}")
+    print(f"{'When':<17} {'Match':<16} {'W':>1} {'Dealt':>6} {'Taken':>6} "
+          f"{'Win% (' + str(args.window) + ')':>10} {'Atk/Spc/Rgn':>14} {'Drift':>6}")
+    for i in range(start, len(recs)):
+        r = recs[i]
+        when = datetime.datetime.fromtimestamp(int(r["timestamp"])).strftime("%Y-%m-%d %H:%M")
+        m = mix[i]
+        d = "" if np.isnan(drift[i]) else f"{drift[i]:.2f}"
+        print(f"{when:<17} {r['match_id'].decode()[:16]:<16} {'W' if r['won'] else 'L':>1} "
+              f"{r['damage_dealt']:>6} {r['damage_taken']:>6} {rate[i]:>10.0%} "
+              f"{m[0]:>4.0%}/{m[1]:>4.0%}/{m[2]:>4.0%} {d:>6}")
+    if args.plot:
+        from .visualize import plot_profile_trends
+        print(f"Plot saved: {plot_profile_trends(args.name, args.window)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,48 @@
-"""Player profile system — persistent per-player stats stored as JSON."""
+"""Player profile system — persistent per-player stats stored as JSON.
+
+`ProfileStore` is the cached front end the GUI and CLI use:
+  - names() and get() are served from memory and revalidated with one
+    stat() of the profiles directory (names) or profile file (get);
+    profiles are written by rename, so any change shows in the mtimes
+  - summaries() returns per-profile summary stats from the index file
+    `profiles/profiles.index`, re-reading only the profiles whose mtime
+    differs from the one recorded there
+  - save() / update() write the profile and refresh the cache and the
+    in-memory index (written to disk by the next summaries()), and log the
+    new counters to the leaderboard rollup (leaderboard.py)
+
+Concurrent writers (several game instances, parallel simulations):
+  - every save writes a per-writer temp file and renames it into place, so
+    readers never see a truncated profile
+  - update() is a read-modify-write under an advisory lock on
+    `<name>.lock`, so concurrent updates of one profile are never lost
+  - `ProfileDelta` sums any number of record_match results, and
+    `record_matches()` / `ProfileBatch` apply them in one update
+
+record_match() / record_matches() / ProfileBatch also append one
+fixed-width record per match to the profile's history
+(profile_history.py), which trend queries read instead of the round logs.
+"""
 
 import json
 import os
+import threading
 import time
-from typing import Optional
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .filelock import locked
 
 PROFILES_DIR = os.path.join(os.path.dirname(__file__), "..", "profiles")
+INDEX_FILE = "profiles.index"
+INDEX_VERSION = 2
+# Advisory lock file taken by ProfileStore.update, next to <name>.json
+LOCK_SUFFIX = ".lock"
+# Profile fields kept in the index
+SUMMARY_FIELDS = (
+    "games_played", "wins", "losses",
+    "total_damage_dealt", "total_damage_taken", "total_moves", "move_usage_counts",
+    "last_played",
+)
 
 
 class PlayerProfile:
@@ -59,15 +96,20 @@ class PlayerProfile:
     # Persistence
     # ------------------------------------------------------------------
 
-    def save(self):
-        os.makedirs(PROFILES_DIR, exist_ok=True)
-        path = os.path.join(PROFILES_DIR, f"{self.name}.json")
-        with open(path, "w") as fh:
+    def save(self, directory: Optional[str] = None):
+        directory = directory or PROFILES_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}.json")
+        # Write-then-rename so a concurrent reader never sees a partial file;
+        # the temp name is per writer so concurrent saves cannot mix
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as fh:
             json.dump(self.to_dict(), fh, indent=2)
+        os.replace(tmp, path)
 
     @classmethod
-    def load(cls, name: str) -> Optional["PlayerProfile"]:
-        path = os.path.join(PROFILES_DIR, f"{name}.json")
+    def load(cls, name: str, directory: Optional[str] = None) -> Optional["PlayerProfile"]:
+        path = os.path.join(directory or PROFILES_DIR, f"{name}.json")
         if not os.path.exists(path):
             return None
         with open(path) as fh:
@@ -98,6 +140,29 @@ class PlayerProfile:
         move_usage: dict,
     ):
         """Called at the end of each match to update stats."""
+        delta = ProfileDelta()
+        delta.add(won, damage_dealt, damage_taken, moves, move_usage)
+        delta.apply(self)
+
+
+class ProfileDelta:
+    """Sum of any number of record_match results, applied to a profile in one step."""
+
+    def __init__(self):
+        self.games_played = 0
+        self.wins = 0
+        self.losses = 0
+        self.total_damage_dealt = 0
+        self.total_damage_taken = 0
+        self.total_moves = 0
+        self.move_usage_counts: dict = {}
+        self.last_played: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.games_played > 0
+
+    def add(self, won: bool, damage_dealt: int, damage_taken: int, moves: int, move_usage: dict):
+        """Same arguments as PlayerProfile.record_match."""
         self.games_played += 1
         if won:
             self.wins += 1
@@ -110,3 +175,269 @@ class PlayerProfile:
             key = int(move)
             self.move_usage_counts[key] = self.move_usage_counts.get(key, 0) + count
         self.last_played = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def apply(self, profile: PlayerProfile):
+        profile.games_played += self.games_played
+        profile.wins += self.wins
+        profile.losses += self.losses
+        profile.total_damage_dealt += self.total_damage_dealt
+        profile.total_damage_taken += self.total_damage_taken
+        profile.total_moves += self.total_moves
+        for key, count in self.move_usage_counts.items():
+            profile.move_usage_counts[key] = profile.move_usage_counts.get(key, 0) + count
+        if self.last_played is not None:
+            profile.last_played = self.last_played
+
+
+# ---------------------------------------------------------------------------
+# Cached store
+# ---------------------------------------------------------------------------
+
+
+class ProfileStore:
+    """In-memory cache of the profiles directory plus a summary index."""
+
+    def __init__(self, directory: Optional[str] = None, leaderboard: bool = True,
+                 history: bool = True):
+        self.directory = directory or PROFILES_DIR
+        # Keep the leaderboard rollup (leaderboard.py) in step with every save
+        self.leaderboard = leaderboard
+        # Append per-match records (profile_history.py) in record_match(es)
+        self.history = history
+        self._lock = threading.RLock()
+        self._dir_mtime: Optional[int] = None
+        self._names: List[str] = []
+        # name -> (file mtime_ns, profile)
+        self._profiles: Dict[str, tuple] = {}
+        self._index: Optional[Dict[str, dict]] = None
+        self._index_mtime: Optional[int] = None
+        self._index_dirty = False
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def names(self) -> List[str]:
+        """Sorted profile names; rescans the directory only when it changed."""
+        with self._lock:
+            mtime = self._stat_dir()
+            if mtime != self._dir_mtime:
+                os.makedirs(self.directory, exist_ok=True)
+                self._names = sorted(
+                    fn[:-5] for fn in os.listdir(self.directory) if fn.endswith(".json")
+                )
+                self._dir_mtime = self._stat_dir()
+            return self._names
+
+    def get(self, name: str) -> PlayerProfile:
+        """The saved profile `name` (a new, unsaved one if there is none). Do not mutate."""
+        with self._lock:
+            mtime = self._stat(name)
+            cached = self._profiles.get(name)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            profile = None
+            if mtime is not None:
+                try:
+                    profile = PlayerProfile.load(name, self.directory)
+                except (OSError, ValueError):
+                    profile = None
+            if profile is None:
+                profile = PlayerProfile(name)
+            self._profiles[name] = (mtime, profile)
+            return profile
+
+    def summaries(self) -> Dict[str, dict]:
+        """{name: {SUMMARY_FIELDS...}} for every profile, via the index file."""
+        with self._lock:
+            names = self.names()
+            if self._index is not None and self._index_mtime == self._dir_mtime:
+                return self._index
+            if self._index_dirty:
+                self._index_dirty = False
+                self._write_index(self._index)
+                if self._index_mtime == self._dir_mtime:
+                    return self._index
+            index = self._index if self._index is not None else self._read_index()
+            fresh, dirty = {}, False
+            for name in names:
+                mtime = self._stat(name)
+                entry = index.get(name)
+                if entry is None or entry["mtime_ns"] != mtime:
+                    entry = self._summary(self.get(name), mtime)
+                    dirty = True
+                fresh[name] = entry
+            self._index, self._index_mtime = fresh, self._dir_mtime
+            if dirty or len(fresh) != len(index):
+                self._write_index(fresh)
+            return fresh
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def __contains__(self, name: str) -> bool:
+        return self._stat(name) is not None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def save(self, profile: PlayerProfile):
+        """
+        Write `profile` and refresh the cache (and the index, if loaded).
+        Overwrites whatever is on disk; use update() to change a profile
+        other processes may also be updating.
+        """
+        profile.save(self.directory)
+        mtime = self._stat(profile.name)
+        if self.leaderboard:
+            from .leaderboard import record
+            record(profile, self.directory)
+        with self._lock:
+            self._profiles[profile.name] = (mtime, profile)
+            if profile.name not in self._names:
+                self._dir_mtime = None
+            if self._index is not None:
+                # Written by the next summaries() call
+                self._index = dict(self._index)
+                self._index[profile.name] = self._summary(profile, mtime)
+                self._index_dirty = True
+
+    def update(self, name: str, fn: Callable[[PlayerProfile], None]) -> PlayerProfile:
+        """
+        Read-modify-write of profile `name` under its advisory lock: `fn` is
+        applied to the profile as currently on disk, which is then saved.
+        """
+        with locked(os.path.join(self.directory, f"{name}{LOCK_SUFFIX}")):
+            try:
+                profile = PlayerProfile.load(name, self.directory)
+            except (OSError, ValueError):
+                profile = None
+            if profile is None:
+                profile = PlayerProfile(name)
+            fn(profile)
+            self.save(profile)
+        return profile
+
+    def record_match(self, name: str, won: bool, damage_dealt: int, damage_taken: int,
+                     moves: int, move_usage: dict, match_id: Optional[str] = None,
+                     rounds: int = 0) -> PlayerProfile:
+        """Update profile `name` with one match result and append it to its history."""
+        return self.record_matches(name, [dict(
+            won=won, damage_dealt=damage_dealt, damage_taken=damage_taken, moves=moves,
+            move_usage=move_usage, match_id=match_id, rounds=rounds,
+        )])
+
+    def record_matches(self, name: str, results: Iterable[dict]) -> PlayerProfile:
+        """
+        Apply many record_match results (keyword dicts, optionally with
+        match_id and rounds) in one update, then append them to the history.
+        """
+        results = list(results)
+        delta = ProfileDelta()
+        for r in results:
+            delta.add(r["won"], r["damage_dealt"], r["damage_taken"], r["moves"], r["move_usage"])
+        profile = self.update(name, delta.apply)
+        if self.history:
+            from .profile_history import append
+            append(name, results, self.directory)
+        return profile
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _stat_dir(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _stat(self, name: str) -> Optional[int]:
+        try:
+            return os.stat(os.path.join(self.directory, f"{name}.json")).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _summary(profile: PlayerProfile, mtime: Optional[int]) -> dict:
+        data = profile.to_dict()
+        entry = {k: data[k] for k in SUMMARY_FIELDS}
+        entry["mtime_ns"] = mtime
+        return entry
+
+    def _read_index(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("profiles", {})
+
+    def _write_index(self, index: Dict[str, dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as fh:
+                json.dump({"version": INDEX_VERSION, "profiles": index}, fh)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        # The rename touched the directory; keep the index current unless
+        # the profiles themselves changed meanwhile
+        self._dir_mtime = None
+        names = self.names()
+        self._index_mtime = self._dir_mtime if len(names) == len(index) and all(
+            n in index for n in names
+        ) else None
+
+
+class ProfileBatch:
+    """
+    Buffers record_match results per profile and writes each profile once
+    per flush (one locked read-modify-write, however many matches).
+
+    Flushes every `flush_every` results if set, on flush(), and when used
+    as a context manager, on exit.
+    """
+
+    def __init__(self, store: Optional[ProfileStore] = None, flush_every: Optional[int] = None):
+        self.store = store if store is not None else ProfileStore()
+        self.flush_every = flush_every
+        self._results: Dict[str, List[dict]] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def record_match(self, name: str, won: bool, damage_dealt: int, damage_taken: int,
+                     moves: int, move_usage: dict, match_id: Optional[str] = None,
+                     rounds: int = 0):
+        result = dict(
+            won=won, damage_dealt=damage_dealt, damage_taken=damage_taken, moves=moves,
+            move_usage=move_usage, match_id=match_id, rounds=rounds,
+            timestamp=int(time.time()),
+        )
+        with self._lock:
+            self._results.setdefault(name, []).append(result)
+            self._pending += 1
+            due = self.flush_every is not None and self._pending >= self.flush_every
+        if due:
+            self.flush()
+
+    def flush(self) -> Dict[str, PlayerProfile]:
+        """Apply all buffered results; returns the updated profiles."""
+        with self._lock:
+            results, self._results, self._pending = self._results, {}, 0
+        return {name: self.store.record_matches(name, rs) for name, rs in results.items()}
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def __enter__(self) -> "ProfileBatch":
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
@@ -0,0 +1,495 @@
+"""Batch report: per-match charts and aggregate dashboards for many matches.
+
+Matches come from the columnar round store (round_store.py — MatchTracker
+saves every GUI / CLI match there, and older logs can be added with
+`python -m ai_game.round_store --import`), selected by date range and/or
+profile (the match ids in each profile's history, profile_history.py).
+Output, in `outputs/report/` by default:
+
+  index.html         summary, dashboards and a table linking every match
+  matches/<id>.png   one card per match: damage per round + cumulative damage
+  damage.png         per-round and per-match damage distributions
+  rounds.png         match-length histogram by winner
+  moves.png          move-mix heatmaps (player x AI move, move share by round)
+
+Rendering runs on a PlotPool (plot_pool.py) in chunks of matches. Each
+card is keyed by a hash of its match's rows in the report directory's
+render cache (`render_cache.json`), so a rerun after more matches were
+played renders only the new ones; the dashboards are keyed by the whole
+selection. Cards reuse one figure per worker: the axes are drawn once per
+axis layout (jobs are sorted by layout) and per match only the bars,
+lines and title are redrawn over a saved copy of them.
+
+Usage:
+    python -m ai_game.report                                  # every stored match
+    python -m ai_game.report --since 2026-01-01 --until 2026-01-31
+    python -m ai_game.report --profile alice --workers 4 --out outputs/alice
+"""
+
+import argparse
+import datetime
+import hashlib
+import html
+import os
+import time
+from concurrent.futures import as_completed
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .plot_pool import PlotPool, read_index, record
+from .round_store import STORE_DIR, RoundStore
+from .visualize import OUTPUTS_DIR
+
+REPORT_DIR = os.path.join(OUTPUTS_DIR, "report")
+# Bump when the cards or dashboards change appearance
+REPORT_VERSION = 1
+CHUNK = 250
+# Rounds shown in the move-share-by-round heatmaps
+HEATMAP_ROUNDS = 30
+MOVE_NAMES = ("Attack", "Special", "Regen")
+DASHBOARDS = ("damage", "rounds", "moves")
+WINNERS = ("—", "Player", "AI")
+
+_COLUMNS = ("round_num", "player_move", "ai_move", "player_damage", "ai_damage",
+            "player_hp_after", "ai_hp_after")
+_CARD_COLUMNS = ("round_num", "player_damage", "ai_damage")
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+
+def match_times(store: RoundStore, index: np.ndarray) -> np.ndarray:
+    """Time of each match's first round (parsed from the match id when not recorded)."""
+    when = np.array(store.column("timestamp")[index["start"]], dtype="M8[us]")
+    for i in np.flatnonzero(np.isnat(when)):
+        try:
+            stamp = datetime.datetime.strptime(index["match_id"][i][:15].decode(), "%Y%m%d_%H%M%S")
+        except ValueError:
+            continue
+        when[i] = np.datetime64(stamp, "us")
+    return when
+
+
+def select_matches(
+    store: RoundStore,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    profiles: Sequence[str] = (),
+    last: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Index records (match_id, start, stop) of the chosen matches in store
+    order. `since` / `until` are inclusive dates (YYYY-MM-DD); `profiles`
+    keeps matches in any of those profiles' histories.
+    """
+    index = np.array(store.index())
+    index = index[index["stop"] > index["start"]]
+    # A match saved twice keeps its latest rows
+    _, rev_first = np.unique(index["match_id"][::-1], return_index=True)
+    index = index[np.sort(len(index) - 1 - rev_first)]
+    if since or until:
+        when = match_times(store, index)
+        keep = np.ones(len(index), dtype=bool)
+        if since:
+            keep &= when >= np.datetime64(since, "us")
+        if until:
+            keep &= when < np.datetime64(until, "us") + np.timedelta64(1, "D")
+        index = index[keep]
+    if profiles:
+        from .profile_history import load
+
+        wanted = np.concatenate([load(name)["match_id"] for name in profiles])
+        index = index[np.isin(index["match_id"], wanted.astype(index["match_id"].dtype))]
+    if last:
+        index = index[-last:]
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Aggregates
+# ---------------------------------------------------------------------------
+
+
+def aggregate(store: RoundStore, index: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-match figures and dashboard inputs for the selected matches (vectorised)."""
+    cols = store.columns(_COLUMNS)
+    lengths = (index["stop"] - index["start"]).astype(np.int64)
+    bounds = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    rows = np.repeat(index["start"] - bounds, lengths) + np.arange(int(lengths.sum()))
+    get = {c: np.asarray(cols[c][rows]) for c in _COLUMNS}
+
+    p_dmg = get["player_damage"].astype(np.int64)
+    a_dmg = get["ai_damage"].astype(np.int64)
+    last = bounds + lengths - 1
+    p_hp, a_hp = get["player_hp_after"][last], get["ai_hp_after"][last]
+    # Same rule as BattleEngine: player KO first means the AI won
+    winner = np.where(p_hp <= 0, 2, np.where(a_hp <= 0, 1, 0))
+
+    pm, am = get["player_move"].astype(np.int64), get["ai_move"].astype(np.int64)
+    valid = (pm >= 1) & (pm <= 3) & (am >= 1) & (am <= 3)
+    joint = np.bincount((pm[valid] - 1) * 3 + am[valid] - 1, minlength=9).reshape(3, 3)
+    round_idx = np.arange(len(rows)) - np.repeat(bounds, lengths)
+    early = round_idx < HEATMAP_ROUNDS
+
+    def by_round(moves):
+        ok = early & (moves >= 1) & (moves <= 3)
+        return np.bincount(round_idx[ok] * 3 + moves[ok] - 1,
+                           minlength=HEATMAP_ROUNDS * 3).reshape(HEATMAP_ROUNDS, 3)
+
+    return {
+        "rounds": lengths,
+        "player_total": np.add.reduceat(p_dmg, bounds) if len(bounds) else p_dmg,
+        "ai_total": np.add.reduceat(a_dmg, bounds) if len(bounds) else a_dmg,
+        "player_max": np.maximum.reduceat(p_dmg, bounds) if len(bounds) else p_dmg,
+        "ai_max": np.maximum.reduceat(a_dmg, bounds) if len(bounds) else a_dmg,
+        "last_round": get["round_num"][last].astype(np.int64),
+        "winner": winner,
+        "player_round_damage": np.bincount(p_dmg.clip(0)),
+        "ai_round_damage": np.bincount(a_dmg.clip(0)),
+        "joint_moves": joint,
+        "player_by_round": by_round(pm),
+        "ai_by_round": by_round(am),
+    }
+
+
+def _ceil_to(value, step):
+    return np.maximum(step, -(-np.asarray(value) // step) * step)
+
+
+def card_layouts(agg: Dict[str, np.ndarray]) -> np.ndarray:
+    """(last round, bar y-limit, cumulative y-limit) per match; equal rows share axes."""
+    return np.stack([
+        agg["last_round"],
+        _ceil_to(np.maximum(agg["player_max"], agg["ai_max"]), 10),
+        _ceil_to(np.maximum(agg["player_total"], agg["ai_total"]), 50),
+    ], axis=1)
+
+
+def card_key(store: RoundStore, match_id: bytes, start: int, stop: int, cols=None) -> str:
+    cols = cols if cols is not None else store.columns(_CARD_COLUMNS)
+    h = hashlib.sha1(b"%d|%s|" % (REPORT_VERSION, match_id))
+    for c in _CARD_COLUMNS:
+        h.update(np.ascontiguousarray(cols[c][start:stop]).tobytes())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Rendering (runs in the pool's worker processes)
+# ---------------------------------------------------------------------------
+
+
+class _MatchCard:
+    """Reusable two-panel match figure, redrawn by blitting the data artists."""
+
+    def __init__(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import PolyCollection
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Patch
+
+        self.fig = Figure(figsize=(8, 3), dpi=80)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax_bar, self.ax_cum = self.fig.subplots(1, 2)
+        self.fig.subplots_adjust(left=0.07, right=0.98, bottom=0.15, top=0.8, wspace=0.22)
+        self.ax_bar.set_title("Damage per round", fontsize=10)
+        self.ax_cum.set_title("Cumulative damage", fontsize=10)
+        self.ax_bar.set_xlabel("Round", fontsize=8)
+        self.ax_cum.set_xlabel("Round", fontsize=8)
+        for ax in (self.ax_bar, self.ax_cum):
+            ax.tick_params(labelsize=8)
+        self.ax_bar.legend(handles=[Patch(color="steelblue", label="Player"),
+                                    Patch(color="tomato", label="AI")],
+                           fontsize=7, loc="upper right")
+
+        self.bars = [PolyCollection([], facecolors=c, animated=True) for c in ("steelblue", "tomato")]
+        for bars in self.bars:
+            self.ax_bar.add_collection(bars)
+        self.lines = [
+            self.ax_cum.plot([], [], marker="o", markersize=3, color=c, animated=True)[0]
+            for c in ("steelblue", "tomato")
+        ]
+        self.title = self.fig.suptitle("", animated=True)
+        self._layout = None
+        self._background = None
+
+    @staticmethod
+    def _boxes(x, h, width=0.4):
+        x0, x1, z = x - width / 2, x + width / 2, np.zeros_like(h)
+        return np.stack([np.stack(p, axis=1) for p in ((x0, z), (x0, h), (x1, h), (x1, z))], axis=1)
+
+    def render(self, path: str, title: str, rounds, player, ai, layout):
+        from PIL import Image
+
+        layout = tuple(int(v) for v in layout)
+        if layout != self._layout:
+            last_round, bar_max, cum_max = layout
+            self.ax_bar.set_xlim(0.4, last_round + 0.6)
+            self.ax_bar.set_ylim(0, bar_max)
+            self.ax_cum.set_xlim(0.6, last_round + 0.4)
+            self.ax_cum.set_ylim(0, cum_max)
+            self.canvas.draw()  # everything but the animated artists
+            self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+            self._layout = layout
+        else:
+            self.canvas.restore_region(self._background)
+
+        rounds = np.asarray(rounds, dtype=np.float64)
+        player, ai = np.asarray(player, dtype=np.float64), np.asarray(ai, dtype=np.float64)
+        self.bars[0].set_verts(self._boxes(rounds - 0.2, player))
+        self.bars[1].set_verts(self._boxes(rounds + 0.2, ai))
+        self.lines[0].set_data(rounds, np.cumsum(player))
+        self.lines[1].set_data(rounds, np.cumsum(ai))
+        self.title.set_text(title)
+        for artist in (*self.bars, *self.lines, self.title):
+            self.fig.draw_artist(artist)
+
+        w, h = self.canvas.get_width_height()
+        Image.frombuffer("RGBA", (w, h), self.canvas.buffer_rgba(), "raw", "RGBA", 0, 1) \
+            .convert("RGB").save(path, compress_level=1)
+
+
+_CARD: Optional[_MatchCard] = None
+
+
+def _render_cards(store_root: str, out_dir: str, jobs: List[tuple]) -> Dict[str, str]:
+    """Render [(match_id, start, stop, key, layout)]; returns rendered name -> key."""
+    global _CARD
+    if _CARD is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        _CARD = _MatchCard()
+    cols = RoundStore(store_root).columns(_CARD_COLUMNS)
+    os.makedirs(os.path.join(out_dir, "matches"), exist_ok=True)
+    done = {}
+    for match_id, start, stop, key, layout in jobs:
+        name = f"matches/{match_id}.png"
+        _CARD.render(
+            os.path.join(out_dir, name), f"Match {match_id}",
+            cols["round_num"][start:stop], cols["player_damage"][start:stop],
+            cols["ai_damage"][start:stop], layout,
+        )
+        done[name] = key
+    return done
+
+
+def _render_dashboard(kind: str, out_dir: str, agg: Dict[str, np.ndarray], key: str) -> Dict[str, str]:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    colors = ("steelblue", "tomato")
+    if kind == "damage":
+        fig = Figure(figsize=(12, 4.5))
+        ax1, ax2 = fig.subplots(1, 2)
+        misses = []
+        for offset, side, col in ((-0.2, "player", colors[0]), (0.2, "ai", colors[1])):
+            label = "Player" if side == "player" else "AI"
+            counts = agg[f"{side}_round_damage"]
+            # Rounds without damage (regen, not enough MP) are most rounds; report them apart
+            misses.append(f"{label} {100 * counts[0] / max(1, counts.sum()):.0f}%")
+            ax1.bar(np.arange(1, len(counts)) + offset, counts[1:], 0.4, color=col, label=label)
+            ax2.hist(agg[f"{side}_total"], bins=40, alpha=0.6, color=col, label=label)
+        ax1.set_title("Damage per round (rounds without damage: " + ", ".join(misses) + ")")
+        ax1.set_xlabel("Damage")
+        ax1.set_ylabel("Rounds")
+        ax2.set_title("Damage per match")
+        ax2.set_xlabel("Total damage dealt")
+        ax2.set_ylabel("Matches")
+        ax1.legend()
+        ax2.legend()
+    elif kind == "rounds":
+        fig = Figure(figsize=(12, 4.5))
+        ax = fig.subplots()
+        rounds, winner = agg["rounds"], agg["winner"]
+        edges = np.arange(0.5, (rounds.max() if len(rounds) else 1) + 1.5)
+        stacks = [rounds[winner == w] for w in (1, 2, 0)]
+        ax.hist(stacks, bins=edges, stacked=True, color=("steelblue", "tomato", "grey"),
+                label=("Player won", "AI won", "Unfinished"))
+        ax.set_title(f"Match length ({len(rounds)} matches, median {np.median(rounds) if len(rounds) else 0:.0f} rounds)")
+        ax.set_xlabel("Rounds")
+        ax.set_ylabel("Matches")
+        ax.legend()
+    else:
+        fig = Figure(figsize=(15, 4.5))
+        ax1, ax2, ax3 = fig.subplots(1, 3, gridspec_kw={"width_ratios": (1, 2, 2)})
+        joint = agg["joint_moves"]
+        share = joint / max(1, joint.sum())
+        ax1.imshow(share, cmap="viridis")
+        for (i, j), v in np.ndenumerate(share):
+            ax1.text(j, i, f"{100 * v:.1f}%", ha="center", va="center",
+                     color="white" if v < share.max() / 2 else "black", fontsize=8)
+        ax1.set_xticks(range(3), MOVE_NAMES)
+        ax1.set_yticks(range(3), MOVE_NAMES)
+        ax1.set_xlabel("AI move")
+        ax1.set_ylabel("Player move")
+        ax1.set_title("Move pairs")
+        for ax, side in ((ax2, "player"), (ax3, "ai")):
+            counts = agg[f"{side}_by_round"].T.astype(np.float64)
+            totals = counts.sum(axis=0)
+            # Blank where no selected match lasted that long
+            mix = np.where(totals > 0, counts / np.maximum(1, totals), np.nan)
+            image = ax.imshow(mix, aspect="auto", cmap="magma", vmin=0, vmax=1,
+                              extent=(0.5, HEATMAP_ROUNDS + 0.5, 2.5, -0.5))
+            ax.set_yticks(range(3), MOVE_NAMES)
+            ax.set_xlabel("Round")
+            ax.set_title(f"{'Player' if side == 'player' else 'AI'} move share by round")
+        fig.colorbar(image, ax=[ax2, ax3], fraction=0.02)
+    if kind != "moves":
+        fig.tight_layout()
+    name = f"{kind}.png"
+    fig.savefig(os.path.join(out_dir, name), dpi=100)
+    return {name: key}
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+
+def build_report(
+    store: RoundStore,
+    index: np.ndarray,
+    out_dir: str = REPORT_DIR,
+    workers: int = 1,
+    chunk: int = CHUNK,
+    force: bool = False,
+    progress=None,
+) -> dict:
+    """Render what is missing or stale for the selected matches and write index.html."""
+    os.makedirs(out_dir, exist_ok=True)
+    agg = aggregate(store, index)
+    layouts = card_layouts(agg) if len(index) else np.zeros((0, 3), dtype=np.int64)
+    cols = store.columns(_CARD_COLUMNS)
+    keys = [card_key(store, m, s, e, cols) for m, s, e in zip(index["match_id"], index["start"], index["stop"])]
+    match_ids = [m.decode() for m in index["match_id"]]
+
+    cache = {} if force else read_index(out_dir)
+    todo = [
+        i for i, (m, k) in enumerate(zip(match_ids, keys))
+        if cache.get(f"matches/{m}.png") != k or not os.path.exists(os.path.join(out_dir, "matches", f"{m}.png"))
+    ]
+    # Cards with the same axes next to each other: fewer full redraws per worker
+    todo.sort(key=lambda i: tuple(layouts[i]))
+    jobs = [
+        (match_ids[i], int(index["start"][i]), int(index["stop"][i]), keys[i], tuple(layouts[i]))
+        for i in todo
+    ]
+    selection = hashlib.sha1(("|".join(keys)).encode()).hexdigest()
+    boards = [
+        d for d in DASHBOARDS
+        if force or cache.get(f"{d}.png") != selection or not os.path.exists(os.path.join(out_dir, f"{d}.png"))
+    ]
+
+    rendered = 0
+    with PlotPool(workers) as pool:
+        futures = {pool.submit(_render_dashboard, d, out_dir, agg, selection): 0 for d in boards}
+        for at in range(0, len(jobs), chunk):
+            batch = jobs[at:at + chunk]
+            futures[pool.submit(_render_cards, store.root, out_dir, batch)] = len(batch)
+        for fut in as_completed(futures):
+            record(fut.result(), out_dir)
+            rendered += futures[fut]
+            if progress is not None and futures[fut]:
+                progress(rendered, len(jobs))
+
+    _write_index(out_dir, index, match_ids, match_times(store, index), agg)
+    return {
+        "matches": len(index),
+        "rendered": len(jobs),
+        "skipped": len(index) - len(jobs),
+        "dashboards": len(boards),
+        "index": os.path.join(out_dir, "index.html"),
+    }
+
+
+def _write_index(out_dir: str, index: np.ndarray, match_ids: List[str], when: np.ndarray,
+                 agg: Dict[str, np.ndarray]):
+    n = len(index)
+    winner = agg["winner"]
+    dates = np.datetime_as_string(when, unit="s")
+    known = when[~np.isnat(when)]
+    span = " – ".join(np.datetime_as_string(np.array([known.min(), known.max()]), unit="s")) \
+        .replace("T", " ") if len(known) else "—"
+    summary = [
+        ("Matches", n),
+        ("Dates", span),
+        ("Rounds", int(agg["rounds"].sum())),
+        ("Median rounds", f"{np.median(agg['rounds']):.0f}" if n else "—"),
+        ("Player wins", f"{int((winner == 1).sum())} ({100 * (winner == 1).mean():.1f}%)" if n else "—"),
+        ("AI wins", f"{int((winner == 2).sum())} ({100 * (winner == 2).mean():.1f}%)" if n else "—"),
+        ("Avg damage / match", f"player {agg['player_total'].mean():.1f} · AI {agg['ai_total'].mean():.1f}" if n else "—"),
+    ]
+    out = [
+        "<!doctype html>",
+        '<html><head><meta charset="utf-8"><title>Match report</title>',
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+        "td,th{padding:2px 10px;text-align:right}td:first-child,th:first-child{text-align:left}"
+        "tr:nth-child(even){background:#f2f2f2}img{max-width:100%}</style></head><body>",
+        "<h1>Match report</h1>",
+        f"<p>Generated {time.strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        "<table>",
+        *(f"<tr><th>{k}</th><td>{html.escape(str(v))}</td></tr>" for k, v in summary),
+        "</table>",
+        "<h2>Dashboards</h2>",
+        *(f'<p><img src="{d}.png" alt="{d}"></p>' for d in DASHBOARDS),
+        "<h2>Matches</h2>",
+        "<table><tr><th>Match</th><th>Started</th><th>Rounds</th><th>Player dmg</th>"
+        "<th>AI dmg</th><th>Winner</th></tr>",
+    ]
+    for i in range(n - 1, -1, -1):
+        mid = html.escape(match_ids[i])
+        out.append(
+            f'<tr><td><a href="matches/{mid}.png">{mid}</a></td><td>{dates[i].replace("T", " ")}</td>'
+            f"<td>{agg['rounds'][i]}</td><td>{agg['player_total'][i]}</td>"
+            f"<td>{agg['ai_total'][i]}</td><td>{WINNERS[winner[i]]}</td></tr>"
+        )
+    out.append("</table></body></html>")
+    tmp = os.path.join(out_dir, f"index.html.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write("\n".join(out))
+    os.replace(tmp, os.path.join(out_dir, "index.html"))
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch match report (charts + dashboards)")
+    parser.add_argument("--store", default=STORE_DIR, help="Round store directory")
+    parser.add_argument("--out", default=REPORT_DIR, help="Report directory")
+    parser.add_argument("--since", default=None, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--until", default=None, help="Last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--profile", action="append", default=[],
+                        help="Only matches in this profile's history (repeatable)")
+    parser.add_argument("--last", type=int, default=None, help="Only the last N selected matches")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Rendering processes (0 = one background thread)")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="Matches per rendering job")
+    parser.add_argument("--force", action="store_true", help="Re-render everything")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    store = RoundStore(args.store)
+    index = select_matches(store, args.since, args.until, args.profile, args.last)
+    print(f"Selected {len(index)} of {store.n_matches} matches")
+    if not len(index):
+        return
+
+    def progress(done, total):
+        print(f"\r  rendered {done}/{total} cards", end="", flush=True)
+
+    stats = build_report(store, index, args.out, args.workers, args.chunk, args.force, progress)
+    if stats["rendered"]:
+        print()
+    print(f"{stats['rendered']} rendered, {stats['skipped']} unchanged, "
+          f"{stats['dashboards']} dashboards in {time.perf_counter() - t0:.1f}s")
+    print(f"Report: {stats['index']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""On-disk RL episode-reward log and downsampled summaries for plotting.
+
+`outputs/rl_rewards.bin`: a 16-byte header (magic, version, item size)
+followed by one little-endian float32 per finished training episode.
+`train_rl` appends to it through a buffered `RewardLog` (and truncates it
+when training starts from scratch), so the full curve of a multi-million
+episode run lives on disk, not in `QLearningAgent.episode_rewards`.
+
+`downsample()` reads the rewards in fixed-size chunks and reduces them to
+at most `points` buckets of equal width: per-bucket min, max and mean,
+plus a trailing moving average sampled at each bucket's last episode. The
+moving average carries its last `window - 1` values across chunks, so the
+result equals a full-array computation; memory is bounded by the chunk
+size and the plot always draws `points` values however long the run was.
+
+Usage:
+    python -m ai_game.reward_log --info
+    python -m ai_game.reward_log --plot [--points 2000] [--window 5000]
+"""
+
+import argparse
+import os
+import struct
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from .visualize import OUTPUTS_DIR
+
+REWARD_LOG = os.path.join(OUTPUTS_DIR, "rl_rewards.bin")
+DTYPE = np.dtype("<f4")
+CHUNK = 1 << 20
+_MAGIC = b"AIRW"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")  # magic, version, item size, reserved
+HEADER_LEN = _HEADER.size
+
+
+class RewardLog:
+    """Append-only float32 file of episode rewards, written in batches."""
+
+    def __init__(self, path: str = REWARD_LOG, flush_every: int = 65536):
+        self.path = path
+        self.flush_every = flush_every
+        self._pending: list = []
+
+    def __len__(self) -> int:
+        """Episodes on disk plus those not yet flushed."""
+        return episodes(self.path) + len(self._pending)
+
+    def reset(self):
+        """Drop every logged reward (a fresh training run)."""
+        self._pending = []
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def append(self, reward: float):
+        self._pending.append(reward)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def extend(self, rewards: Iterable[float]):
+        self._pending.extend(rewards)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        values = np.asarray(self._pending, dtype=DTYPE)
+        self._pending = []
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            if size < HEADER_LEN:
+                fh.truncate(0)
+                fh.write(_HEADER.pack(_MAGIC, _VERSION, DTYPE.itemsize, 0))
+            elif (size - HEADER_LEN) % DTYPE.itemsize:
+                # Cut off a value torn by a crash
+                fh.truncate(size - (size - HEADER_LEN) % DTYPE.itemsize)
+            fh.write(values.tobytes())
+
+    close = flush
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def episodes(path: str = REWARD_LOG) -> int:
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 0
+    return max(0, (size - HEADER_LEN) // DTYPE.itemsize)
+
+
+def read_chunks(path: str = REWARD_LOG, chunk: int = CHUNK) -> Iterator[np.ndarray]:
+    """The logged rewards, `chunk` values at a time, as float64 arrays."""
+    n = episodes(path)
+    if not n:
+        return
+    with open(path, "rb") as fh:
+        magic, version, itemsize, _ = _HEADER.unpack(fh.read(HEADER_LEN))
+        if magic != _MAGIC or version != _VERSION or itemsize != DTYPE.itemsize:
+            raise ValueError(f"{path}: not a version {_VERSION} reward log")
+        for start in range(0, n, chunk):
+            count = min(chunk, n - start)
+            yield np.fromfile(fh, dtype=DTYPE, count=count).astype(np.float64)
+
+
+# ---------------------------------------------------------------------------
+# Downsampling
+# ---------------------------------------------------------------------------
+
+
+def default_window(n: int) -> int:
+    """Moving-average window: 50 episodes, or 0.1% of the run if longer."""
+    return max(1, min(n, max(50, n // 1000)))
+
+
+def downsample(
+    chunks: Iterable[np.ndarray],
+    n: int,
+    points: int = 2000,
+    window: Optional[int] = None,
+) -> dict:
+    """
+    Reduce `n` rewards (given as consecutive chunks) to at most `points`
+    equal-width buckets. Returns arrays "episode" (last episode of each
+    bucket, 1-based), "min", "max", "mean" and "moving_avg" (NaN until a
+    full window has been seen), plus "bucket" and "window".
+    """
+    window = window or default_window(n)
+    bucket = max(1, -(-n // points))
+    n_buckets = -(-n // bucket) if n else 0
+    lo = np.empty(n_buckets)
+    hi = np.empty(n_buckets)
+    total = np.zeros(n_buckets)
+    ma = np.full(n_buckets, np.nan)
+
+    seen = 0
+    carry = np.zeros(0)           # last window-1 rewards before this chunk
+    for values in chunks:
+        if not len(values):
+            continue
+        first = seen // bucket
+        last = (seen + len(values) - 1) // bucket
+        # Bucket statistics: pad to whole buckets and reduce row-wise
+        head = seen - first * bucket
+        padded = np.full((last - first + 1) * bucket, np.nan)
+        padded[head:head + len(values)] = values
+        rows = padded.reshape(-1, bucket)
+        mins, maxs, sums = np.nanmin(rows, axis=1), np.nanmax(rows, axis=1), np.nansum(rows, axis=1)
+        if head:
+            # First bucket continues the previous chunk's last one
+            mins[0] = min(mins[0], lo[first])
+            maxs[0] = max(maxs[0], hi[first])
+            sums[0] += total[first]
+        lo[first:last + 1], hi[first:last + 1], total[first:last + 1] = mins, maxs, sums
+
+        # Trailing moving average at each bucket end inside this chunk
+        ext = np.concatenate([carry, values])
+        csum = np.concatenate([[0.0], np.cumsum(ext)])
+        ends = np.arange(first, last + 1) * bucket + bucket - 1   # global index of bucket ends
+        ends = np.minimum(ends, n - 1)
+        inside = (ends >= seen) & (ends < seen + len(values)) & (ends >= window - 1)
+        local = ends[inside] - seen + len(carry)                  # index into ext
+        ma[np.arange(first, last + 1)[inside]] = (csum[local + 1] - csum[local + 1 - window]) / window
+
+        seen += len(values)
+        carry = ext[-(window - 1):] if window > 1 else np.zeros(0)
+
+    counts = np.full(n_buckets, float(bucket))
+    if n_buckets:
+        counts[-1] = n - (n_buckets - 1) * bucket
+    return {
+        "episode": np.minimum(np.arange(1, n_buckets + 1) * bucket, n),
+        "min": lo,
+        "max": hi,
+        "mean": total / counts,
+        "moving_avg": ma,
+        "bucket": bucket,
+        "window": window,
+    }
+
+
+def summarize(path: str = REWARD_LOG, points: int = 2000, window: Optional[int] = None,
+              chunk: int = CHUNK) -> dict:
+    """downsample() straight from a reward log file."""
+    return downsample(read_chunks(path, chunk), episodes(path), points, window)
+
+
+def summarize_values(rewards: Sequence[float], points: int = 2000, window: Optional[int] = None,
+                     chunk: int = CHUNK) -> dict:
+    """downsample() of an in-memory sequence."""
+    values = np.asarray(rewards, dtype=np.float64)
+    return downsample((values[i:i + chunk] for i in range(0, len(values), chunk)),
+                      len(values), points, window)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RL episode-reward log")
+    parser.add_argument("--path", default=REWARD_LOG, help="Reward log file")
+    parser.add_argument("--info", action="store_true", help="Print episode count and summary")
+    parser.add_argument("--plot", action="store_true", help="Save the downsampled reward curve")
+    parser.add_argument("--points", type=int, default=2000, help="Buckets drawn")
+    parser.add_argument("--window", type=int, default=None, help="Moving-average window (episodes)")
+    args = parser.parse_args()
+
+    n = episodes(args.path)
+    if args.info or not args.plot:
+        if not n:
+            print(f"{args.path}: no episodes logged")
+            return
+        s = summarize(args.path, points=10, window=args.window)
+        print(f"{args.path}: {n} episodes  |  moving average window {s['window']}")
+        for ep, lo, mean, hi, ma in zip(s["episode"], s["min"], s["mean"], s["max"], s["moving_avg"]):
+            print(f"  ≤{ep:>10d}  min {lo:+.3f}  mean {mean:+.3f}  max {hi:+.3f}  avg {ma:+.3f}")
+    if args.plot:
+        from .visualize import plot_rl_rewards
+        path = plot_rl_rewards(log_path=args.path, max_points=args.points, window=args.window)
+        print(f"Plot saved: {path}" if path else "No episodes logged.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@
 State representation:
   Tuple of (agent_hp_bin, agent_mp_bin, opp_hp_bin, opp_mp_bin, last_opp_move)
   Each component is already discretised by FightEnv.
+  The Q-table is a dense float32 array of shape (N_STATES, n_actions) indexed
+  by the mixed-radix state id over OBS_DIMS = (5, 5, 5, 5, 4) — 2 500 states.
 
 Action space: 3 discrete actions (0=Attack, 1=Regen, 2=Special).
 
@@ -13,6 +15,7 @@ Hyperparameters (defaults):
   epsilon_decay              : 0.995
 """
 
+import ast
 import json
 import os
 import random
@@ -20,7 +23,15 @@ from typing import List, Optional
 
 import numpy as np
 
-QTABLE_PATH = os.path.join(os.path.dirname(__file__), "..", "outputs", "qtable.json")
+QTABLE_PATH = os.path.join(os.path.dirname(__file__), "..", "outputs", "qtable.npz")
+# Dict-of-strings format written by earlier versions; converted on load
+LEGACY_QTABLE_PATH = os.path.join(os.path.dirname(__file__), "..", "outputs", "qtable.json")
+
+# Observation dimensions of FightEnv (see rl_env.py)
+OBS_DIMS = (5, 5, 5, 5, 4)
+N_STATES = int(np.prod(OBS_DIMS))
+# Mixed-radix place values of each observation component
+OBS_STRIDES = np.cumprod((OBS_DIMS[1:] + (1,))[::-1])[::-1].astype(np.int64)
 
 
 class QLearningAgent:
@@ -42,8 +53,12 @@ class QLearningAgent:
         self.epsilon_min = epsilon_min
         self.epsilon_decay = epsilon_decay
 
-        self.q_table: dict = {}
+        self.q_table = np.zeros((N_STATES, n_actions), dtype=np.float32)
+        # States whose Q-values have been read or written at least once
+        self.visited = np.zeros(N_STATES, dtype=bool)
         self.episode_rewards: List[float] = []
+        # Generator for the batched methods (scalar ones use `random`)
+        self.rng = np.random.default_rng()
 
     # ------------------------------------------------------------------
     # Policy
@@ -53,8 +68,17 @@ class QLearningAgent:
         """Epsilon-greedy action selection."""
         if random.random() < self.epsilon:
             return random.randint(0, self.n_actions - 1)
-        key = self._state_key(obs)
-        return int(np.argmax(self._get_q(key)))
+        s = self.state_id(obs)
+        self.visited[s] = True
+        return int(self.q_table[s].argmax())
+
+    def choose_actions(self, obs: np.ndarray) -> np.ndarray:
+        """Epsilon-greedy actions for a batch of observations (K × 5)."""
+        s = self.state_ids(obs)
+        self.visited[s] = True
+        greedy = self.q_table[s].argmax(axis=1)
+        explore = self.rng.random(len(s)) < self.epsilon
+        return np.where(explore, self.rng.integers(0, self.n_actions, size=len(s)), greedy)
 
     # ------------------------------------------------------------------
     # Learning
@@ -62,16 +86,42 @@ class QLearningAgent:
 
     def update(self, obs, action: int, reward: float, next_obs, done: bool):
         """TD(0) Q-table update."""
-        key = self._state_key(obs)
-        next_key = self._state_key(next_obs)
-        q_vals = list(self._get_q(key))
-        next_q_max = 0.0 if done else float(np.max(self._get_q(next_key)))
+        s = self.state_id(obs)
+        s_next = self.state_id(next_obs)
+        self.visited[s] = self.visited[s_next] = True
+        q = self.q_table
+        next_q_max = 0.0 if done else max(q[s_next].tolist())
         target = reward + self.gamma * next_q_max
-        q_vals[action] += self.alpha * (target - q_vals[action])
-        self.q_table[key] = q_vals
-
-    def decay_epsilon(self):
-        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+        q[s, action] += self.alpha * (target - float(q[s, action]))
+
+    def update_batch(self, obs, actions, rewards, next_obs, dones):
+        """
+        TD(0) update for a batch of transitions. TD errors are computed
+        from the table before the batch. A (state, action) pair hit c times
+        moves by its mean TD error with step 1 - (1 - alpha)^c, i.e. what c
+        sequential updates towards the same target would do.
+        """
+        s = self.state_ids(obs)
+        s_next = self.state_ids(next_obs)
+        self.visited[s] = True
+        self.visited[s_next] = True
+        q = self.q_table
+        next_q_max = np.where(dones, 0.0, q[s_next].max(axis=1))
+        td = rewards + self.gamma * next_q_max - q[s, actions]
+
+        flat = s * self.n_actions + actions
+        td_sum = np.bincount(flat, weights=td, minlength=q.size)
+        counts = np.bincount(flat, minlength=q.size)
+        hit = np.flatnonzero(counts)
+        step = 1.0 - (1.0 - self.alpha) ** counts[hit]
+        q.reshape(-1)[hit] += (step * td_sum[hit] / counts[hit]).astype(np.float32)
+
+    def decay_epsilon(self, episodes: int = 1):
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay ** episodes)
+
+    @property
+    def states_explored(self) -> int:
+        return int(self.visited.sum())
 
     # ------------------------------------------------------------------
     # Persistence
@@ -80,40 +130,66 @@ class QLearningAgent:
     def save(self, path: Optional[str] = None):
         save_path = path or QTABLE_PATH
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        data = {
-            "q_table": self.q_table,
-            "epsilon": self.epsilon,
-            "alpha": self.alpha,
-            "gamma": self.gamma,
-            # Keep last 1 000 rewards to avoid unbounded file growth
-            "episode_rewards": self.episode_rewards[-1000:],
-        }
-        with open(save_path, "w") as fh:
-            json.dump(data, fh)
+        # np.savez appends .npz to names without it; keep the caller's path
+        with open(save_path, "wb") as fh:
+            np.savez(
+                fh,
+                q_table=self.q_table,
+                visited=self.visited,
+                epsilon=self.epsilon,
+                alpha=self.alpha,
+                gamma=self.gamma,
+                # Keep last 1 000 rewards to avoid unbounded file growth
+                episode_rewards=np.asarray(self.episode_rewards[-1000:], dtype=np.float64),
+            )
 
     def load(self, path: Optional[str] = None) -> bool:
-        """Load saved Q-table. Returns True if successful."""
+        """Load saved Q-table (converting a legacy JSON file). Returns True if successful."""
         load_path = path or QTABLE_PATH
+        if path is None and not os.path.exists(load_path):
+            load_path = LEGACY_QTABLE_PATH
         if not os.path.exists(load_path):
             return False
-        with open(load_path) as fh:
+        if load_path.endswith(".json"):
+            self._load_legacy_json(load_path)
+            return True
+        with np.load(load_path) as data:
+            q = data["q_table"]
+            if q.shape != self.q_table.shape:
+                return False
+            self.q_table = q.astype(np.float32)
+            self.visited = data["visited"].astype(bool)
+            self.epsilon = float(data["epsilon"])
+            self.alpha = float(data["alpha"])
+            self.gamma = float(data["gamma"])
+            self.episode_rewards = data["episode_rewards"].tolist()
+        return True
+
+    def _load_legacy_json(self, path: str):
+        """Convert a `{"(a, b, c, d, e)": [q0, q1, q2]}` JSON Q-table."""
+        with open(path) as fh:
             data = json.load(fh)
-        self.q_table = data.get("q_table", {})
+        self.q_table[:] = 0.0
+        self.visited[:] = False
+        for key, q_vals in data.get("q_table", {}).items():
+            s = self.state_id(ast.literal_eval(key))
+            self.q_table[s] = q_vals
+            self.visited[s] = True
         self.epsilon = data.get("epsilon", self.epsilon_min)
         self.alpha = data.get("alpha", self.alpha)
         self.gamma = data.get("gamma", self.gamma)
         self.episode_rewards = data.get("episode_rewards", [])
-        return True
 
     # ------------------------------------------------------------------
     # Internals
     # ------------------------------------------------------------------
 
     @staticmethod
-    def _state_key(obs) -> str:
-        return str(tuple(int(x) for x in obs))
+    def state_id(obs) -> int:
+        """Mixed-radix index of an observation over OBS_DIMS."""
+        return int(np.dot(obs, OBS_STRIDES))
 
-    def _get_q(self, key: str) -> list:
-        if key not in self.q_table:
-            self.q_table[key] = [0.0] * self.n_actions
-        return self.q_table[key]
+    @staticmethod
+    def state_ids(obs: np.ndarray) -> np.ndarray:
+        """Vectorised `state_id` for a (K, 5) observation batch."""
+        return np.asarray(obs, dtype=np.int64) @ OBS_STRIDES
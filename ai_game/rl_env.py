@@ -24,13 +24,23 @@ Reward shaping:
   +1.0  if agent wins (opponent HP ≤ 0)
   -1.0  if agent loses (own HP ≤ 0)
   Episode truncated after MAX_ROUNDS rounds.
-"""
 
-import random
+FightVectorEnv steps K independent fights at once with array state and a
+single seeded generator, following the Gymnasium vector-env API. Finished
+episodes are reset within the same step; their last observation is
+returned in ``infos["final_obs"]`` (masked by ``infos["_final_obs"]``).
+"""
 
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+
+try:
+    from gymnasium.vector import AutoresetMode
+    _AUTORESET_METADATA = {"autoreset_mode": AutoresetMode.SAME_STEP}
+except ImportError:  # gymnasium < 1.1 has no autoreset modes
+    _AUTORESET_METADATA = {}
 
 MAX_HP = 100
 MAX_MP = 50
@@ -72,21 +82,12 @@ class FightEnv(gym.Env):
         agent_action = int(action)
 
         # Opponent acts randomly
-        opp_action = self.np_random.integers(0, 3) if hasattr(self, "np_random") else random.randint(0, 2)
-        opp_action = int(opp_action)
+        opp_action = int(self.np_random.integers(0, 3))
 
-        agent_dmg = self._apply_action(
-            action=agent_action,
-            actor_mp=self._agent_mp,
-            set_mp=lambda v: setattr(self, "_agent_mp", v),
-        )
+        agent_dmg, self._agent_mp = self._apply_action(agent_action, self._agent_mp)
         self._opp_hp = max(0, self._opp_hp - agent_dmg)
 
-        opp_dmg = self._apply_action(
-            action=opp_action,
-            actor_mp=self._opp_mp,
-            set_mp=lambda v: setattr(self, "_opp_mp", v),
-        )
+        opp_dmg, self._opp_mp = self._apply_action(opp_action, self._opp_mp)
         self._agent_hp = max(0, self._agent_hp - opp_dmg)
 
         self._last_opp_move = opp_action + 1  # store 1-indexed (1/2/3)
@@ -138,14 +139,121 @@ class FightEnv(gym.Env):
             dtype=np.int64,
         )
 
-    def _apply_action(self, action: int, actor_mp: int, set_mp) -> int:
-        """Apply an action and return the damage dealt."""
+    def _apply_action(self, action: int, actor_mp: int):
+        """Apply an action; return (damage dealt, actor's new MP)."""
         if action == 0 and actor_mp >= 10:   # Attack
-            set_mp(actor_mp - 10)
-            return random.randint(10, 20)
+            return int(self.np_random.integers(10, 21)), actor_mp - 10
         elif action == 2 and actor_mp >= 20:  # Special
-            set_mp(actor_mp - 20)
-            return random.randint(25, 35)
+            return int(self.np_random.integers(25, 36)), actor_mp - 20
         else:                                  # Regen (or fallback)
-            set_mp(min(actor_mp + 5, MAX_MP))
-            return 0
+            return 0, min(actor_mp + 5, MAX_MP)
+
+
+class FightVectorEnv(gym.vector.VectorEnv):
+    """K independent FightEnv episodes stepped together with NumPy arrays."""
+
+    metadata = {"render_modes": [], **_AUTORESET_METADATA}
+
+    def __init__(self, num_envs: int):
+        super().__init__()
+        self.num_envs = num_envs
+        self.single_observation_space = spaces.MultiDiscrete(
+            [HP_BINS, MP_BINS, HP_BINS, MP_BINS, 4]
+        )
+        self.single_action_space = spaces.Discrete(3)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self._rng = np.random.default_rng()
+        self._agent_hp = np.empty(num_envs, dtype=np.int64)
+        self._agent_mp = np.empty(num_envs, dtype=np.int64)
+        self._opp_hp = np.empty(num_envs, dtype=np.int64)
+        self._opp_mp = np.empty(num_envs, dtype=np.int64)
+        self._round = np.empty(num_envs, dtype=np.int64)
+        self._last_opp_move = np.empty(num_envs, dtype=np.int64)
+        self._reset_envs(np.ones(num_envs, dtype=bool))
+
+    # ------------------------------------------------------------------
+    # Gymnasium vector interface
+    # ------------------------------------------------------------------
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._obs(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        opp_actions = self._rng.integers(0, 3, size=self.num_envs)
+
+        agent_dmg = self._apply_actions(actions, self._agent_mp)
+        self._opp_hp = np.maximum(self._opp_hp - agent_dmg, 0)
+        opp_dmg = self._apply_actions(opp_actions, self._opp_mp)
+        self._agent_hp = np.maximum(self._agent_hp - opp_dmg, 0)
+
+        self._last_opp_move = opp_actions + 1
+        self._round += 1
+
+        # Same reward and termination order as FightEnv.step
+        won = self._opp_hp <= 0
+        lost = (self._agent_hp <= 0) & ~won
+        rewards = (agent_dmg - opp_dmg) / MAX_DAMAGE * 0.5 + won - lost
+        terminations = won | lost
+        truncations = self._round >= MAX_ROUNDS
+
+        obs = self._obs()
+        infos = {}
+        done = terminations | truncations
+        if done.any():
+            infos["final_obs"] = obs.copy()
+            infos["_final_obs"] = done
+            self._reset_envs(done)
+            obs[done] = self._obs()[done]
+        return obs, rewards, terminations, truncations, infos
+
+    def raw_state(self) -> dict:
+        """Unbinned per-env state (copies), e.g. for exact-model policies."""
+        return {
+            "agent_hp": self._agent_hp.copy(),
+            "agent_mp": self._agent_mp.copy(),
+            "opp_hp": self._opp_hp.copy(),
+            "opp_mp": self._opp_mp.copy(),
+            "round": self._round.copy(),
+            "last_opp_move": self._last_opp_move.copy(),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _reset_envs(self, mask: np.ndarray):
+        self._agent_hp[mask] = MAX_HP
+        self._agent_mp[mask] = MAX_MP
+        self._opp_hp[mask] = MAX_HP
+        self._opp_mp[mask] = MAX_MP
+        self._round[mask] = 0
+        self._last_opp_move[mask] = 0
+
+    def _obs(self) -> np.ndarray:
+        return np.stack(
+            [
+                np.minimum(self._agent_hp * HP_BINS // MAX_HP, HP_BINS - 1),
+                np.minimum(self._agent_mp * MP_BINS // MAX_MP, MP_BINS - 1),
+                np.minimum(self._opp_hp * HP_BINS // MAX_HP, HP_BINS - 1),
+                np.minimum(self._opp_mp * MP_BINS // MAX_MP, MP_BINS - 1),
+                self._last_opp_move,
+            ],
+            axis=1,
+        )
+
+    def _apply_actions(self, actions: np.ndarray, mp: np.ndarray) -> np.ndarray:
+        """Apply actions in place on `mp`; return damage per env."""
+        attack = (actions == 0) & (mp >= 10)
+        special = (actions == 2) & (mp >= 20)
+        # Both damage ranges are 11 wide: 10–20 and 25–35
+        roll = self._rng.integers(0, 11, size=self.num_envs)
+        mp[:] = np.where(
+            attack | special, mp - 10 * attack - 20 * special, np.minimum(mp + 5, MAX_MP)
+        )
+        return np.where(attack, 10 + roll, np.where(special, 25 + roll, 0))
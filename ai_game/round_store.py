@@ -0,0 +1,317 @@
+"""Columnar binary store for RoundRecords.
+
+Layout (`logs/rounds/` by default):
+  <column>.npy   one file per RoundRecord field, fixed-width dtype (COLUMNS)
+  match.npy      per-row ordinal of the row's match in the index
+  index.npy      one record per match: (match_id, start, stop) row range
+
+Every file is a regular `.npy` array with a fixed 256-byte header, so it
+can be appended to in place (data first, then the shape in the header) and
+read with `np.load(..., mmap_mode="r")`. Reading a column maps the file
+instead of parsing text; reading one match maps every column and slices its
+row range from the index, touching only those pages.
+
+The index is the commit point: rows count only once their match is in
+index.npy, so a write interrupted between columns leaves the store readable
+and the next append overwrites the partial rows. Appends hold the store's
+lock file (store.lock) as well as a per-process lock, so GUI and CLI
+processes appending to the same store are serialised.
+
+Usage:
+    python -m ai_game.round_store --import          # convert logs/game_logs.csv
+    python -m ai_game.round_store --info
+    python -m ai_game.round_store --match 20250101_120000
+"""
+
+import argparse
+import os
+import struct
+import threading
+import time
+from dataclasses import fields
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .damage_tracker import LOGS_DIR, GLOBAL_LOG, RoundRecord
+from .filelock import locked
+
+STORE_DIR = os.path.join(LOGS_DIR, "rounds")
+
+COLUMNS: Dict[str, np.dtype] = {
+    "round_num": np.dtype("<i4"),
+    "player_move": np.dtype("i1"),
+    "ai_move": np.dtype("i1"),
+    "player_damage": np.dtype("<i2"),
+    "ai_damage": np.dtype("<i2"),
+    "player_hp_after": np.dtype("<i2"),
+    "ai_hp_after": np.dtype("<i2"),
+    "player_mp_after": np.dtype("<i2"),
+    "ai_mp_after": np.dtype("<i2"),
+    "player_hp_delta": np.dtype("<i2"),
+    "ai_hp_delta": np.dtype("<i2"),
+    "ai_confidence": np.dtype("<f8"),
+    "timestamp": np.dtype("<M8[us]"),
+}
+MATCH_COLUMN = "match"
+INDEX_DTYPE = np.dtype([("match_id", "S64"), ("start", "<i8"), ("stop", "<i8")])
+
+_LOCK = "store.lock"
+_HEADER_LEN = 256
+_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+# ---------------------------------------------------------------------------
+# Appendable .npy files
+# ---------------------------------------------------------------------------
+
+
+def _header(dtype: np.dtype, length: int) -> bytes:
+    d = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)}
+    text = repr(d).encode("latin1").ljust(_HEADER_LEN - len(_MAGIC) - 2 - 1) + b"\n"
+    return _MAGIC + struct.pack("<H", len(text)) + text
+
+
+def _write_at(path: str, dtype: np.dtype, at: int, values: np.ndarray):
+    """Write `values` at row `at` (dropping anything after) and update the header."""
+    values = np.ascontiguousarray(values, dtype=dtype)
+    mode = "r+b" if os.path.exists(path) else "w+b"
+    with open(path, mode) as fh:
+        fh.seek(_HEADER_LEN + at * dtype.itemsize)
+        fh.write(values.tobytes())
+        fh.truncate()
+        fh.seek(0)
+        fh.write(_header(dtype, at + len(values)))
+
+
+def _open(path: str, length: int) -> np.ndarray:
+    """Read-only memory map of the first `length` rows of an appendable .npy."""
+    if length == 0 or not os.path.exists(path):
+        return np.zeros(0, dtype=_dtype_of(path))
+    return np.load(path, mmap_mode="r")[:length]
+
+
+def _dtype_of(path: str) -> np.dtype:
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name == "index":
+        return INDEX_DTYPE
+    return COLUMNS.get(name, np.dtype("<i4"))
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+
+class RoundStore:
+    """Append-only columnar round history with a match_id → row-range index."""
+
+    _locks: Dict[str, threading.Lock] = {}
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._lock = self._locks.setdefault(os.path.abspath(root), threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def index(self) -> np.ndarray:
+        """The committed match index: records of (match_id, start, stop)."""
+        path = self._path("index")
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.load(path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        index = self.index()
+        return int(index["stop"][-1]) if len(index) else 0
+
+    @property
+    def n_matches(self) -> int:
+        return len(self.index())
+
+    def match_ids(self) -> List[str]:
+        return [m.decode() for m in self.index()["match_id"].tolist()]
+
+    def column(self, name: str) -> np.ndarray:
+        """One column over all committed rows, memory-mapped."""
+        if name not in COLUMNS and name != MATCH_COLUMN:
+            raise KeyError(name)
+        return _open(self._path(name), len(self))
+
+    def columns(self, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        n = len(self)
+        return {
+            name: _open(self._path(name), n)
+            for name in (names if names is not None else COLUMNS)
+        }
+
+    def match_range(self, match_id: str) -> Optional[Tuple[int, int]]:
+        """Row range of the most recent match saved under `match_id`."""
+        index = self.index()
+        hits = np.flatnonzero(index["match_id"] == match_id.encode())
+        if len(hits) == 0:
+            return None
+        rec = index[hits[-1]]
+        return int(rec["start"]), int(rec["stop"])
+
+    def match(
+        self, match_id: str, names: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Columns of one match (copies of just its rows)."""
+        rng = self.match_range(match_id)
+        if rng is None:
+            return None
+        start, stop = rng
+        return {
+            name: np.array(_open(self._path(name), stop)[start:stop])
+            for name in (names if names is not None else COLUMNS)
+        }
+
+    def match_rows(self, match_id: str) -> Optional[List[dict]]:
+        """One match as a list of per-round dicts (RoundRecord field names)."""
+        cols = self.match(match_id)
+        if cols is None:
+            return None
+        cols["timestamp"] = np.datetime_as_string(cols["timestamp"], unit="us")
+        as_lists = {name: values.tolist() for name, values in cols.items()}
+        return [dict(zip(as_lists, row)) for row in zip(*as_lists.values())]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append_match(self, match_id: str, records: Sequence[RoundRecord]) -> Tuple[int, int]:
+        """Append one match; returns its row range."""
+        cols = {
+            f.name: [getattr(r, f.name) for r in records]
+            for f in fields(RoundRecord)
+        }
+        return self.append_columns(cols, [match_id], [len(records)])[0]
+
+    def append_columns(
+        self,
+        columns: Dict[str, Sequence],
+        match_ids: Sequence[str],
+        lengths: Sequence[int],
+    ) -> List[Tuple[int, int]]:
+        """
+        Append consecutive matches given column-wise: rows
+        [sum(lengths[:i]), sum(lengths[:i+1])) belong to match_ids[i].
+        Missing columns are zero-filled (NaT for timestamps).
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        n_new = int(lengths.sum())
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, locked(os.path.join(self.root, _LOCK)):
+            index = self.index()
+            n_rows = int(index["stop"][-1]) if len(index) else 0
+            n_matches = len(index)
+
+            for name, dtype in COLUMNS.items():
+                values = columns.get(name)
+                if values is None:
+                    values = np.full(n_new, np.datetime64("NaT") if dtype.kind == "M" else 0, dtype=dtype)
+                values = np.asarray(values, dtype=dtype)
+                if len(values) != n_new:
+                    raise ValueError(f"column {name!r} has {len(values)} rows, expected {n_new}")
+                _write_at(self._path(name), dtype, n_rows, values)
+            ordinals = np.repeat(np.arange(n_matches, n_matches + len(lengths)), lengths)
+            _write_at(self._path(MATCH_COLUMN), np.dtype("<i4"), n_rows, ordinals)
+
+            stops = n_rows + np.cumsum(lengths)
+            new_index = np.zeros(len(lengths), dtype=INDEX_DTYPE)
+            new_index["match_id"] = [m.encode() for m in match_ids]
+            new_index["start"] = stops - lengths
+            new_index["stop"] = stops
+            # Commit: the rows become visible once the index covers them
+            _write_at(self._path("index"), INDEX_DTYPE, n_matches, new_index)
+        return list(zip(new_index["start"].tolist(), new_index["stop"].tolist()))
+
+    def import_csv(self, path: str = GLOBAL_LOG, chunksize: int = 500_000) -> int:
+        """
+        Append the rows of a game_logs.csv, one index entry per match_id.
+        Rows of a match need not be adjacent in the CSV (or within one chunk):
+        a first pass over the match_id column finds each match's last row, and
+        the second buffers rows until their match is complete. Matches already
+        in the store are skipped. Returns the number of rows imported.
+        """
+        import pandas as pd
+
+        read = dict(chunksize=chunksize, dtype={"match_id": str})
+        ids = pd.concat(
+            [df["match_id"].dropna() for df in pd.read_csv(path, usecols=["match_id"], **read)],
+            ignore_index=True,
+        )
+        if ids.empty:
+            return 0
+        last_row = ids.groupby(ids, sort=False).tail(1)
+        last_row = pd.Series(last_row.index, index=last_row.to_numpy())
+        skip = set(self.match_ids())
+
+        total = 0
+        seen = 0
+        pending = None
+        for df in pd.read_csv(path, **read):
+            df = df.dropna(subset=["match_id"])
+            seen += len(df)
+            df = df[~df["match_id"].isin(skip)]
+            pending = df if pending is None else pd.concat([pending, df])
+            done = last_row.reindex(pending["match_id"]).to_numpy() < seen
+            if done.any():
+                total += self._append_frame(pending[done])
+                pending = pending[~done]
+        return total
+
+    def _append_frame(self, df) -> int:
+        """Append whole matches from a DataFrame, making each match's rows contiguous."""
+        import pandas as pd
+
+        codes, match_ids = pd.factorize(df["match_id"])
+        df = df.iloc[np.argsort(codes, kind="stable")]
+        cols = {}
+        for name in COLUMNS:
+            if name == "timestamp":
+                cols[name] = pd.to_datetime(df[name], errors="coerce").to_numpy("datetime64[us]")
+            elif name in df.columns:
+                cols[name] = df[name].fillna(0).to_numpy()
+        self.append_columns(cols, list(match_ids), np.bincount(codes))
+        return len(df)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.npy")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar round store")
+    parser.add_argument("--root", default=STORE_DIR, help="Store directory")
+    parser.add_argument("--import", dest="import_csv", nargs="?", const=GLOBAL_LOG,
+                        metavar="CSV", help="Append a game_logs.csv (default: logs/game_logs.csv)")
+    parser.add_argument("--info", action="store_true", help="Print row / match counts")
+    parser.add_argument("--match", default=None, help="Print one match")
+    args = parser.parse_args()
+
+    store = RoundStore(args.root)
+    if args.import_csv:
+        t0 = time.perf_counter()
+        n = store.import_csv(args.import_csv)
+        print(f"Imported {n} rows from {args.import_csv} in {time.perf_counter() - t0:.2f}s")
+    if args.info or not (args.import_csv or args.match):
+        print(f"{store.root}: {len(store)} rows, {store.n_matches} matches")
+    if args.match:
+        rows = store.match_rows(args.match)
+        if rows is None:
+            print(f"No match {args.match!r}")
+            return
+        for row in rows:
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
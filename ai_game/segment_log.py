@@ -0,0 +1,504 @@
+"""Segmented, rotating global round log with compaction.
+
+An alternative to the single ever-growing `logs/game_logs.csv` (enabled with
+`--segmented-log` in the GUI/CLI). Rows go to CSV segments in
+`logs/segments/`, each with the usual game_logs.csv header:
+
+  seg_<created>_<pid>_<seq>.csv   written by exactly one process, which
+                                  holds an advisory lock on it while open
+  merged_<n>.csv                  produced by compaction
+  manifest.json                   segment list in log order with state
+                                  (open / sealed), kind, rows, bytes
+  rollups.json                    per-day aggregates of compacted rows
+  manifest.lock                   serialises manifest updates
+
+A writer seals its segment and starts a new one once it reaches
+`max_bytes` or `max_age_s`, and on close. Since no two processes share a
+segment, concurrent GUI / CLI / simulation runs never interleave rows.
+
+`compact()`:
+  1. seals open segments whose writer died (its lock is free)
+  2. adds every newly sealed segment to the per-day rollups (rows, matches,
+     damage totals, 3×3 player_move × ai_move counts)
+  3. merges the run of sealed segments before the first open one into
+     segments of up to `merge_max_bytes`
+  4. enforces retention — at most `keep_segments` segments and/or none
+     older than `retention_days` — deleting only rolled-up segments, so the
+     aggregates outlive the rows
+
+Readers list segments from the manifest; `read_rows(last=K)` parses only the
+newest K, which is what `AdaptiveAIOpponent.load_history(last_segments=K)` uses.
+
+Usage:
+    python -m ai_game.segment_log --info
+    python -m ai_game.segment_log --compact --keep 20 --retention-days 30
+    python -m ai_game.segment_log --import logs/game_logs.csv
+"""
+
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+import shutil
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .damage_tracker import LOGS_DIR, GLOBAL_LOG, GLOBAL_LOG_FIELDS
+from .filelock import locked, try_lock, unlock
+from .log_writer import BufferedCSVWriter
+
+SEGMENT_DIR = os.path.join(LOGS_DIR, "segments")
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+SEGMENT_MAX_AGE_S = 24 * 3600.0
+MERGE_MAX_BYTES = 64 * 1024 * 1024
+
+_MANIFEST = "manifest.json"
+_ROLLUPS = "rollups.json"
+_LOCK = "manifest.lock"
+
+_SHARED: Dict[str, "SegmentedLogWriter"] = {}
+
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+
+def _read_json(path: str, default):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path: str, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def read_manifest(directory: str = SEGMENT_DIR) -> dict:
+    return _read_json(os.path.join(directory, _MANIFEST), {"version": 1, "segments": []})
+
+
+def _update_manifest(directory: str, fn: Callable[[dict], None]):
+    """Apply `fn` to the manifest under the manifest lock."""
+    os.makedirs(directory, exist_ok=True)
+    with locked(os.path.join(directory, _LOCK)):
+        manifest = read_manifest(directory)
+        fn(manifest)
+        _write_json(os.path.join(directory, _MANIFEST), manifest)
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+
+class SegmentedLogWriter(BufferedCSVWriter):
+    """BufferedCSVWriter that writes to this process's own rotating segments."""
+
+    def __init__(
+        self,
+        directory: str = SEGMENT_DIR,
+        fieldnames: Sequence[str] = GLOBAL_LOG_FIELDS,
+        max_bytes: int = SEGMENT_MAX_BYTES,
+        max_age_s: float = SEGMENT_MAX_AGE_S,
+        flush_rows: Optional[int] = None,
+        flush_ms: Optional[float] = None,
+        io=None,
+    ):
+        super().__init__(None, fieldnames, flush_rows=flush_rows, flush_ms=flush_ms, io=io)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._seq = 0
+        self._opened = 0.0
+        self._segment_rows = 0
+        self.segments_sealed: int = 0
+
+    def _ensure_open(self):
+        if self._fh is not None:
+            if (
+                self._fh.tell() < self.max_bytes
+                and time.monotonic() - self._opened < self.max_age_s
+            ):
+                return
+            self._release()
+        os.makedirs(self.directory, exist_ok=True)
+        self._seq += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        name = f"seg_{stamp}_{os.getpid()}_{self._seq:04d}.csv"
+        self.path = os.path.join(self.directory, name)
+        # Register first, so compaction never sees an unlisted file
+        _update_manifest(self.directory, lambda m: m["segments"].append({
+            "name": name, "state": "open", "kind": "raw", "pid": os.getpid(),
+            "created": _now(), "rows": 0, "bytes": 0,
+        }))
+        self._fh = open(self.path, "a", newline="")
+        try_lock(self._fh)
+        self._csv = csv.writer(self._fh)
+        self._csv.writerow(self.fieldnames)
+        self._opened = time.monotonic()
+        self._segment_rows = 0
+
+    def _write(self, rows):
+        super()._write(rows)
+        self._segment_rows += len(rows)
+
+    def _release(self):
+        """Seal the current segment."""
+        if self._fh is None:
+            return
+        self._fh.flush()
+        size = self._fh.tell()
+        name, rows = os.path.basename(self.path), self._segment_rows
+        unlock(self._fh)
+        self._fh.close()
+        self._fh = self._csv = None
+        self.segments_sealed += 1
+
+        def seal(manifest):
+            for entry in manifest["segments"]:
+                if entry["name"] == name:
+                    entry.update(state="sealed", rows=rows, bytes=size, sealed=_now())
+        _update_manifest(self.directory, seal)
+
+
+def shared_writer(
+    directory: str = SEGMENT_DIR,
+    flush_rows: Optional[int] = None,
+    flush_ms: Optional[float] = None,
+    io=None,
+) -> SegmentedLogWriter:
+    """The process-wide writer for `directory` (one open segment per process)."""
+    key = os.path.abspath(directory)
+    writer = _SHARED.get(key)
+    if writer is None or writer._closed:
+        writer = _SHARED[key] = SegmentedLogWriter(directory, io=io)
+    writer.flush_rows, writer.flush_ms = flush_rows, flush_ms
+    if io is not None:
+        writer.io = io
+    return writer
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+
+def list_segments(directory: str = SEGMENT_DIR, last: Optional[int] = None) -> List[str]:
+    """Segment paths in log order (oldest first); only the newest `last` if given."""
+    names = [e["name"] for e in read_manifest(directory)["segments"]]
+    if last is not None:
+        names = names[-last:] if last > 0 else []
+    return [os.path.join(directory, n) for n in names]
+
+
+def _complete_rows(path: str) -> bytes:
+    """Segment bytes up to the last complete row."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    return data[: data.rfind(b"\n") + 1]
+
+
+def read_rows(
+    last: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    directory: str = SEGMENT_DIR,
+):
+    """
+    Rows of the newest `last` segments (all if None) as one DataFrame.
+    Raises FileNotFoundError rather than return a partial history.
+    """
+    import pandas as pd
+
+    def read_all():
+        frames = []
+        for path in list_segments(directory, last):
+            data = _complete_rows(path)
+            if data.count(b"\n") > 1:
+                frames.append(pd.read_csv(io.BytesIO(data), usecols=columns))
+        return frames
+
+    try:
+        frames = read_all()
+    except FileNotFoundError:
+        # Compacted away under us. compact() removes files only once the
+        # manifest no longer lists them, and holding the manifest lock keeps
+        # another compaction out, so this read sees a consistent set
+        with locked(os.path.join(directory, _LOCK)):
+            frames = read_all()
+    if not frames:
+        return pd.DataFrame(columns=list(columns or GLOBAL_LOG_FIELDS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def match_row_count(match_id: str, since: float, directory: str = SEGMENT_DIR) -> int:
+    """Rows of `match_id` in segments modified at or after `since` (epoch seconds)."""
+    count = 0
+    for path in list_segments(directory):
+        try:
+            if os.path.getmtime(path) < since:
+                continue
+            text = _complete_rows(path).decode("utf-8", "replace")
+        except OSError:
+            continue
+        count += sum(1 for row in csv.reader(io.StringIO(text)) if row and row[-1] == match_id)
+    return count
+
+
+def remove_match_rows(match_id: str, since: float, directory: str = SEGMENT_DIR) -> int:
+    """Drop `match_id`'s rows from segments not held by a live writer; returns rows removed."""
+    removed = 0
+
+    def rewrite(manifest):
+        nonlocal removed
+        for entry in manifest["segments"]:
+            path = os.path.join(directory, entry["name"])
+            try:
+                if os.path.getmtime(path) < since:
+                    continue
+            except OSError:
+                continue
+            with open(path, "a") as lock_fh:
+                if not try_lock(lock_fh):
+                    continue
+                try:
+                    lines = _complete_rows(path).splitlines(keepends=True)
+                    kept = lines[:1] + [
+                        line for line in lines[1:]
+                        if next(csv.reader([line.decode("utf-8", "replace")]), [None])[-1] != match_id
+                    ]
+                    if len(kept) == len(lines):
+                        continue
+                    removed += len(lines) - len(kept)
+                    _write_bytes(path, b"".join(kept))
+                    entry["rows"] = len(kept) - 1
+                    entry["bytes"] = os.path.getsize(path)
+                finally:
+                    unlock(lock_fh)
+
+    _update_manifest(directory, rewrite)
+    return removed
+
+
+def _write_bytes(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+
+def _rollup(path: str, rollups: dict):
+    """Add one segment's rows to the per-day aggregates."""
+    import numpy as np
+    import pandas as pd
+
+    data = _complete_rows(path)
+    if data.count(b"\n") <= 1:
+        return
+    df = pd.read_csv(
+        io.BytesIO(data),
+        usecols=["round_num", "player_move", "ai_move", "player_damage", "ai_damage", "timestamp"],
+    )
+    df["day"] = df["timestamp"].astype(str).str[:10]
+    for day, g in df.groupby("day"):
+        agg = rollups.setdefault(day, {
+            "rows": 0, "matches": 0, "player_damage": 0, "ai_damage": 0,
+            "move_pairs": [[0] * 3 for _ in range(3)],
+        })
+        agg["rows"] += len(g)
+        agg["matches"] += int((g["round_num"] == 1).sum())
+        agg["player_damage"] += int(g["player_damage"].sum())
+        agg["ai_damage"] += int(g["ai_damage"].sum())
+        pm = g["player_move"].to_numpy()
+        am = g["ai_move"].to_numpy()
+        ok = (pm >= 1) & (pm <= 3) & (am >= 1) & (am <= 3)
+        pairs = np.bincount((pm[ok] - 1) * 3 + (am[ok] - 1), minlength=9).reshape(3, 3)
+        agg["move_pairs"] = (np.asarray(agg["move_pairs"]) + pairs).tolist()
+
+
+def _merge(directory: str, entries: List[dict], seq: int) -> dict:
+    """Concatenate sealed segments (one header) into a new merged segment."""
+    name = f"merged_{seq:06d}.csv"
+    path = os.path.join(directory, name)
+    tmp = f"{path}.tmp"
+    rows = 0
+    with open(tmp, "wb") as out:
+        for i, entry in enumerate(entries):
+            data = _complete_rows(os.path.join(directory, entry["name"]))
+            header_end = data.find(b"\n") + 1
+            out.write(data if i == 0 else data[header_end:])
+            rows += max(0, data.count(b"\n") - 1)
+    os.replace(tmp, path)
+    return {
+        "name": name, "state": "sealed", "kind": "merged", "pid": None,
+        "created": entries[0]["created"], "sealed": max(e.get("sealed", "") for e in entries),
+        "rows": rows, "bytes": os.path.getsize(path), "rolled_up": True,
+    }
+
+
+def compact(
+    directory: str = SEGMENT_DIR,
+    merge_max_bytes: int = MERGE_MAX_BYTES,
+    keep_segments: Optional[int] = None,
+    retention_days: Optional[float] = None,
+) -> dict:
+    """Seal abandoned segments, roll up, merge and apply retention. Returns counts."""
+    stats = {"sealed": 0, "rolled_up": 0, "merged": 0, "deleted": 0}
+    if not os.path.isdir(directory):
+        return stats
+    rollups_path = os.path.join(directory, _ROLLUPS)
+    doomed: List[str] = []
+
+    def run(manifest):
+        segments = manifest["segments"]
+
+        # 1. Seal segments whose writer died
+        for entry in segments:
+            if entry["state"] != "open" or entry.get("pid") == os.getpid():
+                continue
+            path = os.path.join(directory, entry["name"])
+            try:
+                with open(path, "a") as lock_fh:
+                    if not try_lock(lock_fh):
+                        continue
+                    unlock(lock_fh)
+            except OSError:
+                continue
+            data = _complete_rows(path)
+            _write_bytes(path, data)  # drop a torn last row
+            entry.update(state="sealed", rows=max(0, data.count(b"\n") - 1),
+                         bytes=len(data), sealed=_now())
+            stats["sealed"] += 1
+
+        # 2. Roll up newly sealed segments
+        rollups = _read_json(rollups_path, {})
+        for entry in segments:
+            if entry["state"] == "sealed" and not entry.get("rolled_up"):
+                try:
+                    _rollup(os.path.join(directory, entry["name"]), rollups)
+                except OSError:
+                    continue
+                entry["rolled_up"] = True
+                stats["rolled_up"] += 1
+        _write_json(rollups_path, rollups)
+
+        # 3. Merge the sealed prefix in runs of at most merge_max_bytes
+        prefix = []
+        for entry in segments:
+            if entry["state"] != "sealed":
+                break
+            prefix.append(entry)
+        merged, run_ = [], []
+
+        def flush_run():
+            if len(run_) > 1:
+                manifest["merges"] = manifest.get("merges", 0) + 1
+                merged.append(_merge(directory, run_, manifest["merges"]))
+                doomed.extend(e["name"] for e in run_)
+                stats["merged"] += len(run_)
+            else:
+                merged.extend(run_)
+            run_.clear()
+
+        for entry in prefix:
+            if run_ and sum(e["bytes"] for e in run_) + entry["bytes"] > merge_max_bytes:
+                flush_run()
+            run_.append(entry)
+        flush_run()
+        segments[: len(prefix)] = merged
+
+        # 4. Retention (sealed, rolled-up segments only, oldest first)
+        cutoff = None
+        if retention_days is not None:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=retention_days)).isoformat()
+        while segments and segments[0]["state"] == "sealed" and segments[0].get("rolled_up"):
+            too_many = keep_segments is not None and len(segments) > keep_segments
+            too_old = cutoff is not None and segments[0].get("sealed", "") < cutoff
+            if not (too_many or too_old):
+                break
+            doomed.append(segments.pop(0)["name"])
+            stats["deleted"] += 1
+
+    _update_manifest(directory, run)
+    # Files leave only after the manifest no longer lists them
+    for name in doomed:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+    return stats
+
+
+def read_rollups(directory: str = SEGMENT_DIR) -> dict:
+    """Per-day aggregates ({day: {rows, matches, player_damage, ai_damage, move_pairs}})."""
+    return _read_json(os.path.join(directory, _ROLLUPS), {})
+
+
+def import_log(path: str = GLOBAL_LOG, directory: str = SEGMENT_DIR) -> int:
+    """Add an existing game_logs.csv as a sealed segment at the start of the log."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"seg_00000000T000000_import_{int(time.time())}.csv"
+    dest = os.path.join(directory, name)
+    shutil.copyfile(path, dest)
+    data = _complete_rows(dest)
+    _write_bytes(dest, data)
+    rows = max(0, data.count(b"\n") - 1)
+    _update_manifest(directory, lambda m: m["segments"].insert(0, {
+        "name": name, "state": "sealed", "kind": "raw", "pid": None,
+        "created": _now(), "sealed": _now(), "rows": rows, "bytes": len(data),
+    }))
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segmented round log maintenance")
+    parser.add_argument("--dir", default=SEGMENT_DIR, help="Segment directory")
+    parser.add_argument("--info", action="store_true", help="List segments")
+    parser.add_argument("--compact", action="store_true", help="Seal, roll up, merge, retain")
+    parser.add_argument("--keep", type=int, default=None, help="Keep at most this many segments")
+    parser.add_argument("--retention-days", type=float, default=None,
+                        help="Delete rolled-up segments sealed longer ago than this")
+    parser.add_argument("--merge-max-mb", type=float, default=MERGE_MAX_BYTES / 2 ** 20,
+                        help="Largest merged segment")
+    parser.add_argument("--import", dest="import_csv", nargs="?", const=GLOBAL_LOG,
+                        metavar="CSV", help="Add a game_logs.csv as the oldest segment")
+    args = parser.parse_args()
+
+    if args.import_csv:
+        n = import_log(args.import_csv, args.dir)
+        print(f"Imported {n} rows from {args.import_csv}")
+    if args.compact:
+        stats = compact(args.dir, int(args.merge_max_mb * 2 ** 20), args.keep, args.retention_days)
+        print(f"Compaction: {stats}")
+    if args.info or not (args.compact or args.import_csv):
+        segments = read_manifest(args.dir)["segments"]
+        for e in segments:
+            print(f"  {e['name']:<48} {e['state']:<7} {e['kind']:<7} {e['rows']:>9} rows")
+        rollups = read_rollups(args.dir)
+        print(f"{len(segments)} segments, rollups for {len(rollups)} days, "
+              f"{sum(r['rows'] for r in rollups.values())} rows rolled up")
+
+
+if __name__ == "__main__":
+    main()
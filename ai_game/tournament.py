@@ -0,0 +1,377 @@
+"""Round-robin tournament between AI variants with Elo ratings.
+
+Competitors:
+  ensemble — AdaptiveAIOpponent (incremental mode, warm-started from logs/,
+             keeps learning during each job like it does in the GUI)
+  rl       — QLearningAgent loaded from outputs/qtable.json, greedy
+  random / valid / greedy — scripted policies from batch_sim
+
+Every ordered pair (A moves first, B answers) is split into jobs of
+`--batch` matches and run on a ProcessPoolExecutor. Each job derives its
+seed from (tournament seed, pair, batch index) and starts from fresh copies
+of the competitors, so results do not depend on which worker runs it or in
+what order. Finished jobs are appended to a JSONL journal as they arrive;
+rerunning with the same --name skips jobs already in the journal. The
+journal's first line records the tournament parameters (players, matches,
+batch, seed); resuming with different ones is refused unless --fresh is
+given.
+
+Ratings are the maximum-likelihood Elo fit (Bradley–Terry on the Elo scale,
+draws count half) over all finished games, so they do not depend on the order
+results streamed in. Ratings are centred on 1500 and the 95% intervals come
+from the inverse Fisher information, relative to the field mean. A weak
+prior keeps ratings finite for perfect records.
+
+Usage:
+    python -m ai_game.tournament --players ensemble rl greedy valid random
+    python -m ai_game.tournament --matches 400 --workers 8 --name nightly
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import permutations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .fighter import Fighter
+
+OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs")
+TOURNAMENT_DIR = os.path.join(OUTPUTS_DIR, "tournaments")
+MAX_ROUNDS = 200
+ELO_BASE = 1500.0
+ELO_SCALE = 400.0 / np.log(10.0)
+# Weak Gaussian prior on ratings (natural-log scale) so perfect records stay finite
+ELO_PRIOR_PRECISION = 0.01
+
+# RL action → move id (same mapping as BattleEngine._rl_ai_move)
+RL_ACTION_TO_MOVE = {0: 1, 1: 3, 2: 2}
+
+
+# ---------------------------------------------------------------------------
+# Competitors
+# ---------------------------------------------------------------------------
+
+
+class _ScriptedAgent:
+    def __init__(self, policy):
+        self.policy = policy
+
+    def choose(self, me: Fighter, opp: Fighter, opp_move: int, rng) -> int:
+        def one(x):
+            return np.array([x], dtype=np.int64)
+
+        return int(self.policy(one(me.health), one(me.mp), one(opp.health),
+                               one(opp.mp), one(opp_move), rng)[0])
+
+    def observe(self, opp_move: int, my_move: int):
+        pass
+
+
+class _EnsembleAgent:
+    def __init__(self, ai):
+        self.ai = ai
+
+    def choose(self, me: Fighter, opp: Fighter, opp_move: int, rng) -> int:
+        return self.ai.predict_move(opp_move)[0]
+
+    def observe(self, opp_move: int, my_move: int):
+        self.ai.update_and_train(opp_move, my_move)
+
+
+class _RLAgent:
+    def __init__(self, agent):
+        self.agent = agent
+        self.agent.epsilon = 0.0
+
+    def choose(self, me: Fighter, opp: Fighter, opp_move: int, rng) -> int:
+        from .rl_env import _bin, MAX_HP, MAX_MP, HP_BINS, MP_BINS
+
+        obs = np.array([
+            _bin(me.health, MAX_HP, HP_BINS),
+            _bin(me.mp, MAX_MP, MP_BINS),
+            _bin(opp.health, MAX_HP, HP_BINS),
+            _bin(opp.mp, MAX_MP, MP_BINS),
+            opp_move,
+        ], dtype=np.int64)
+        return RL_ACTION_TO_MOVE[self.agent.choose_action(obs)]
+
+    def observe(self, opp_move: int, my_move: int):
+        pass
+
+
+def build_agents(names: List[str]) -> Dict[str, object]:
+    """Load each competitor once (in the parent; workers get copies)."""
+    from .batch_sim import POLICIES
+
+    agents = {}
+    for name in names:
+        if name in POLICIES:
+            agents[name] = _ScriptedAgent(POLICIES[name])
+        elif name == "ensemble":
+            from .ai_opponent import AdaptiveAIOpponent
+            ai = AdaptiveAIOpponent("AI", incremental=True)
+            ai.load_history()
+            agents[name] = _EnsembleAgent(ai)
+        elif name == "rl":
+            from .rl_agent import QLearningAgent
+            agent = QLearningAgent()
+            if not agent.load():
+                raise ValueError("rl: no trained Q-table; run `python -m ai_game.train_rl` first")
+            agents[name] = _RLAgent(agent)
+        else:
+            raise ValueError(f"Unknown competitor: {name}")
+    return agents
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_WORKER_AGENTS: Dict[str, object] = {}
+
+
+def _init_worker(agents: Dict[str, object], seed: int):
+    global _WORKER_AGENTS
+    _WORKER_AGENTS = agents
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+
+
+def _play_match(first, second, rng) -> int:
+    """Play one match; returns 0 if `first` wins, 1 if `second` wins, -1 draw."""
+    a, b = Fighter("A"), Fighter("B")
+    last_b = 0
+    for _ in range(MAX_ROUNDS):
+        a_move = first.choose(a, b, last_b, rng)
+        b.take_damage(a.execute_move(a_move))
+        b_move = second.choose(b, a, a_move, rng)
+        a.take_damage(b.execute_move(b_move))
+        first.observe(last_b, a_move)
+        second.observe(a_move, b_move)
+        last_b = b_move
+        if not a.is_alive():
+            return 1
+        if not b.is_alive():
+            return 0
+    return -1
+
+
+def _run_job(job: dict) -> dict:
+    random.seed(job["seed"])
+    rng = np.random.default_rng(job["seed"])
+    first = copy.deepcopy(_WORKER_AGENTS[job["a"]])
+    second = copy.deepcopy(_WORKER_AGENTS[job["b"]])
+    a_wins = b_wins = draws = 0
+    for _ in range(job["n"]):
+        result = _play_match(first, second, rng)
+        if result == 0:
+            a_wins += 1
+        elif result == 1:
+            b_wins += 1
+        else:
+            draws += 1
+    return {**job, "a_wins": a_wins, "b_wins": b_wins, "draws": draws}
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+
+
+def _job_seed(seed: int, a: str, b: str, batch: int) -> int:
+    digest = hashlib.sha256(f"{seed}:{a}:{b}:{batch}".encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def make_jobs(players: List[str], matches: int, batch: int, seed: int) -> List[dict]:
+    """`matches` games per ordered pair, split into jobs of `batch` games."""
+    jobs = []
+    for a, b in permutations(players, 2):
+        for i, start in enumerate(range(0, matches, batch)):
+            jobs.append({
+                "id": f"{a}|{b}|{i}",
+                "a": a,
+                "b": b,
+                "n": min(batch, matches - start),
+                "seed": _job_seed(seed, a, b, i),
+            })
+    return jobs
+
+
+def _load_journal(path: str) -> Tuple[Optional[dict], List[dict]]:
+    """(parameter header or None, job results) of a journal."""
+    header, results = None, []
+    if not os.path.exists(path):
+        return header, results
+    with open(path) as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from an interrupted run
+                continue
+            if "header" in entry:
+                header = entry["header"]
+            else:
+                results.append(entry)
+    return header, results
+
+
+# ---------------------------------------------------------------------------
+# Ratings
+# ---------------------------------------------------------------------------
+
+
+def elo_ratings(results: List[dict], players: List[str], iters: int = 100) -> Dict[str, tuple]:
+    """
+    Maximum-likelihood Elo ratings from job results.
+    Returns {player: (rating, ci95_halfwidth, games)}.
+    """
+    idx = {p: i for i, p in enumerate(players)}
+    k = len(players)
+    games = np.zeros((k, k))
+    score = np.zeros((k, k))
+    for r in results:
+        if r["a"] not in idx or r["b"] not in idx:
+            continue
+        i, j = idx[r["a"]], idx[r["b"]]
+        n = r["a_wins"] + r["b_wins"] + r["draws"]
+        games[i, j] += n
+        games[j, i] += n
+        score[i, j] += r["a_wins"] + 0.5 * r["draws"]
+        score[j, i] += r["b_wins"] + 0.5 * r["draws"]
+
+    theta = np.zeros(k)  # natural-log scale
+    hessian = np.eye(k)
+    for _ in range(iters):
+        p = 1.0 / (1.0 + np.exp(theta[None, :] - theta[:, None]))
+        grad = (score - games * p).sum(axis=1) - ELO_PRIOR_PRECISION * theta
+        w = games * p * (1.0 - p)
+        hessian = np.diag(w.sum(axis=1)) - w + ELO_PRIOR_PRECISION * np.eye(k)
+        step = np.linalg.solve(hessian, grad)
+        theta += step
+        if np.max(np.abs(step)) < 1e-9:
+            break
+
+    # Ratings are only identified up to a common shift: report them, and
+    # their uncertainty, relative to the field mean
+    centre = np.eye(k) - 1.0 / k
+    theta = centre @ theta
+    cov = centre @ np.linalg.inv(hessian) @ centre
+    se = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    return {
+        p: (ELO_BASE + ELO_SCALE * theta[i], 1.96 * ELO_SCALE * se[i], int(games[i].sum()))
+        for p, i in idx.items()
+    }
+
+
+def _print_standings(ratings: Dict[str, tuple]):
+    print(f"  {'player':<10} {'elo':>7}  {'95% CI':>9}  {'games':>7}")
+    for name, (elo, ci, n) in sorted(ratings.items(), key=lambda kv: -kv[1][0]):
+        print(f"  {name:<10} {elo:7.0f}  ±{ci:8.0f}  {n:7d}")
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+
+def run_tournament(
+    players: List[str],
+    matches: int = 200,
+    batch: int = 50,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    name: str = "default",
+    fresh: bool = False,
+    verbose: bool = True,
+) -> Dict[str, tuple]:
+    """
+    Run (or resume) a tournament and return the final ratings.
+    Raises ValueError if the journal `name` holds a tournament with other
+    parameters (pass fresh=True to discard it), or if a competitor can't be
+    loaded (e.g. `rl` before train_rl has saved a Q-table).
+    """
+    os.makedirs(TOURNAMENT_DIR, exist_ok=True)
+    journal = os.path.join(TOURNAMENT_DIR, f"{name}.jsonl")
+    if fresh and os.path.exists(journal):
+        os.remove(journal)
+
+    params = {"players": list(players), "matches": matches, "batch": batch, "seed": seed}
+    header, done = _load_journal(journal)
+    if (header is not None or done) and header != params:
+        raise ValueError(
+            f"Journal '{name}' was started with {header or 'unrecorded parameters'}, "
+            f"not {params}; use --fresh or another --name."
+        )
+    if header is None:
+        with open(journal, "w") as fh:
+            fh.write(json.dumps({"header": params}) + "\n")
+    done_ids = {r["id"] for r in done}
+    pending = [j for j in make_jobs(players, matches, batch, seed) if j["id"] not in done_ids]
+    if verbose:
+        print(f"Tournament '{name}': {len(players)} players, {len(done_ids)} jobs done, "
+              f"{len(pending)} to run.")
+
+    results = list(done)
+    if os.path.exists(journal) and os.path.getsize(journal):
+        with open(journal, "rb+") as fh:
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                # Terminate a torn line so new results start cleanly
+                fh.write(b"\n")
+    if pending:
+        agents = build_agents(players)
+        start = time.perf_counter()
+        with open(journal, "a") as fh, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(agents, seed)
+        ) as pool:
+            futures = [pool.submit(_run_job, job) for job in pending]
+            for n_done, fut in enumerate(as_completed(futures), 1):
+                res = fut.result()
+                fh.write(json.dumps(res) + "\n")
+                fh.flush()
+                results.append(res)
+                if verbose and (n_done % max(1, len(pending) // 10) == 0 or n_done == len(pending)):
+                    elapsed = time.perf_counter() - start
+                    print(f"\n[{n_done}/{len(pending)} jobs, {elapsed:.1f}s]")
+                    _print_standings(elo_ratings(results, players))
+
+    ratings = elo_ratings(results, players)
+    if verbose:
+        print("\nFinal ratings:")
+        _print_standings(ratings)
+    return ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin AI tournament with Elo ratings")
+    parser.add_argument("--players", nargs="+",
+                        default=["ensemble", "rl", "greedy", "valid", "random"])
+    parser.add_argument("--matches", type=int, default=200,
+                        help="Matches per ordered pair (each side moves first in turn)")
+    parser.add_argument("--batch", type=int, default=50, help="Matches per job")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name", default="default", help="Journal name (resume key)")
+    parser.add_argument("--fresh", action="store_true", help="Discard an existing journal")
+    args = parser.parse_args()
+
+    try:
+        run_tournament(
+            args.players, matches=args.matches, batch=args.batch, workers=args.workers,
+            seed=args.seed, name=args.name, fresh=args.fresh,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,14 @@ Usage:
     python -m ai_game.train_rl --episodes 5000
     python -m ai_game.train_rl --eval              # evaluate saved agent
     python -m ai_game.train_rl --eval-episodes 200
+    python -m ai_game.train_rl --episodes 1000000 --num-envs 1024   # vectorised
 """
 
 import argparse
 
+# Rewards kept in agent.episode_rewards; the full curve is in the reward log
+_KEEP_REWARDS = 10_000
+
 
 def main():
     parser = argparse.ArgumentParser(description="RL training for AI Fighting Game")
@@ -19,46 +23,59 @@ def main():
     parser.add_argument(
         "--eval-episodes", type=int, default=100, help="Episodes for evaluation"
     )
+    parser.add_argument(
+        "--num-envs", type=int, default=1,
+        help="Step this many fights at once with FightVectorEnv (1 = scalar FightEnv)",
+    )
     args = parser.parse_args()
 
-    from .rl_env import FightEnv
+    from .rl_env import FightEnv, FightVectorEnv
     from .rl_agent import QLearningAgent
+    from .reward_log import RewardLog
     from .visualize import plot_rl_rewards
 
     agent = QLearningAgent()
-    env = FightEnv()
+    if args.num_envs > 1:
+        env = FightVectorEnv(args.num_envs)
+        train, evaluate = _train_vec, _evaluate_vec
+    else:
+        env = FightEnv()
+        train, evaluate = _train, _evaluate
 
     if args.eval:
         if not agent.load():
             print("No saved Q-table found. Run training first.")
             return
         print(f"Evaluating saved agent over {args.eval_episodes} episodes...")
-        _evaluate(env, agent, args.eval_episodes)
+        evaluate(env, agent, args.eval_episodes)
         return
 
     # Load existing checkpoint if available (continue training)
     loaded = agent.load()
+    log = RewardLog()
     if loaded:
         print(f"Resuming from saved agent (ε={agent.epsilon:.3f}, "
-              f"{len(agent.q_table)} states explored).")
+              f"{agent.states_explored} states explored).")
     else:
         print("Starting fresh Q-learning agent.")
+        log.reset()
 
     print(f"Training for {args.episodes} episodes "
           f"(α={agent.alpha}, γ={agent.gamma}, ε→{agent.epsilon_min})...")
-    _train(env, agent, args.episodes)
+    train(env, agent, args.episodes, log)
+    log.close()
 
     agent.save()
-    print(f"\nQ-table saved. Total states explored: {len(agent.q_table)}")
+    print(f"\nQ-table saved. Total states explored: {agent.states_explored}")
     print(f"Last 10 episode rewards: "
           f"{[round(r, 3) for r in agent.episode_rewards[-10:]]}")
 
-    plot_path = plot_rl_rewards(agent.episode_rewards)
+    plot_path = plot_rl_rewards(log_path=log.path)
     if plot_path:
         print(f"Training reward plot saved: {plot_path}")
 
     print("\nRunning post-training evaluation...")
-    _evaluate(env, agent, min(args.eval_episodes, 200))
+    evaluate(env, agent, min(args.eval_episodes, 200))
 
 
 # ---------------------------------------------------------------------------
@@ -66,7 +83,7 @@ def main():
 # ---------------------------------------------------------------------------
 
 
-def _train(env, agent, n_episodes: int):
+def _train(env, agent, n_episodes: int, log):
     import numpy as np
 
     for ep in range(1, n_episodes + 1):
@@ -83,7 +100,10 @@ def _train(env, agent, n_episodes: int):
                 break
 
         agent.episode_rewards.append(total_reward)
+        log.append(total_reward)
         agent.decay_epsilon()
+        if len(agent.episode_rewards) > 2 * _KEEP_REWARDS:
+            del agent.episode_rewards[:-_KEEP_REWARDS]
 
         if ep % 100 == 0:
             mean_r = float(np.mean(agent.episode_rewards[-100:]))
@@ -120,7 +140,13 @@ def _evaluate(env, agent, n_episodes: int):
         rewards.append(total_r)
 
     agent.epsilon = old_eps
+    _print_evaluation(wins, rewards)
+
+
+def _print_evaluation(wins: int, rewards: list):
+    import numpy as np
 
+    n_episodes = len(rewards)
     win_rate = 100 * wins / n_episodes
     mean_r = float(np.mean(rewards))
     std_r = float(np.std(rewards))
@@ -128,5 +154,81 @@ def _evaluate(env, agent, n_episodes: int):
     print(f"  Mean reward: {mean_r:.3f} ± {std_r:.3f}")
 
 
+# ---------------------------------------------------------------------------
+# Vectorised loops (FightVectorEnv)
+# ---------------------------------------------------------------------------
+
+
+def _train_vec(env, agent, n_episodes: int, log):
+    """Batched Q-learning over env.num_envs fights; epsilon decays per finished episode."""
+    import numpy as np
+
+    obs, _ = env.reset()
+    returns = np.zeros(env.num_envs)
+    finished = 0
+    report_every = max(100, n_episodes // 20)
+    next_report = report_every
+
+    while finished < n_episodes:
+        actions = agent.choose_actions(obs)
+        next_obs, rewards, terminated, truncated, infos = env.step(actions)
+        done = terminated | truncated
+        # Done rows were auto-reset; learn from their final observation
+        target_obs = np.where(done[:, None], infos.get("final_obs", next_obs), next_obs)
+        agent.update_batch(obs, actions, rewards, target_obs, done)
+        returns += rewards
+        obs = next_obs
+
+        if done.any():
+            # Episodes past n_episodes finishing in the same step are not counted
+            finished_returns = returns[done][: n_episodes - finished].tolist()
+            n_done = len(finished_returns)
+            agent.episode_rewards.extend(finished_returns)
+            log.extend(finished_returns)
+            if len(agent.episode_rewards) > 2 * _KEEP_REWARDS:
+                del agent.episode_rewards[:-_KEEP_REWARDS]
+            returns[done] = 0.0
+            finished += n_done
+            agent.decay_epsilon(n_done)
+
+            if finished >= next_report:
+                mean_r = float(np.mean(agent.episode_rewards[-100:]))
+                print(
+                    f"  Episode {finished:7d}/{n_episodes}  "
+                    f"mean(last 100)={mean_r:+.3f}  ε={agent.epsilon:.3f}"
+                )
+                next_report += report_every
+
+
+def _evaluate_vec(env, agent, n_episodes: int):
+    import numpy as np
+
+    old_eps = agent.epsilon
+    agent.epsilon = 0.0  # greedy policy during evaluation
+
+    # Every env plays a fixed quota (n split as evenly as possible); stopping
+    # at the first n to finish would over-count short ones
+    quota = np.full(env.num_envs, n_episodes // env.num_envs, dtype=np.int64)
+    quota[: n_episodes % env.num_envs] += 1
+    played = np.zeros(env.num_envs, dtype=np.int64)
+    obs, _ = env.reset()
+    returns = np.zeros(env.num_envs)
+    wins = 0
+    rewards = []
+    while (played < quota).any():
+        obs, reward, terminated, truncated, _ = env.step(agent.choose_actions(obs))
+        returns += reward
+        done = terminated | truncated
+        if done.any():
+            counted = done & (played < quota)
+            wins += int(np.sum(reward[counted] >= 1.0))
+            rewards.extend(returns[counted].tolist())
+            played += done
+            returns[done] = 0.0
+
+    agent.epsilon = old_eps
+    _print_evaluation(wins, rewards)
+
+
 if __name__ == "__main__":
     main()
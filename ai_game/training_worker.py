@@ -0,0 +1,134 @@
+"""Background training worker for the ML-ensemble opponent.
+
+Refits of `AdaptiveAIOpponent` run on a dedicated thread so a GUI frame never
+waits on sklearn. The opponent keeps predicting from its last published
+snapshot (decision table + fitted models); a finished fit is swapped in with
+`AdaptiveAIOpponent.publish_snapshot`.
+
+Freshness vs. frame-time:
+  `max_staleness` is the largest number of recorded rounds the live snapshot
+  may be missing when a prediction is made. If a prediction would exceed it,
+  `before_predict` blocks until the worker catches up. 0 gives the same
+  predictions as synchronous training; larger values never block on short
+  bursts of input.
+
+Requests are coalesced: while a fit is running, new rounds only raise the
+target row count, and the next fit covers all of them at once.
+
+If a refit raises, the worker stops and keeps the exception in `error`;
+`before_predict` no longer waits from then on, so the game carries on with
+the last published snapshot instead of blocking forever.
+"""
+
+import threading
+
+from .ai_opponent import AdaptiveAIOpponent
+
+
+class BackgroundTrainer:
+    """Runs ensemble refits on a worker thread and tracks prediction staleness."""
+
+    def __init__(self, ai: AdaptiveAIOpponent, max_staleness: int = 5):
+        self.ai = ai
+        self.max_staleness = max(0, int(max_staleness))
+
+        self._cond = threading.Condition()
+        self._published_rows = ai.trained_rows
+        self._target_rows = ai.history_rows
+        self._closed = False
+        self.error = None  # exception that stopped the worker
+
+        # Counters
+        self.fits_completed: int = 0
+        self.predictions: int = 0
+        self.stale_predictions: int = 0
+        self.total_staleness: int = 0
+        self.max_observed_staleness: int = 0
+        self.blocking_waits: int = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="ai-training-worker", daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Engine hooks
+    # ------------------------------------------------------------------
+
+    def record(self, player_move: int, ai_move: int):
+        """Append one round to the history and schedule a refit."""
+        with self._cond:
+            self.ai.add_round(player_move, ai_move)
+            self._target_rows = self.ai.history_rows
+            self._cond.notify_all()
+
+    def before_predict(self) -> int:
+        """
+        Enforce the staleness bound, then count the prediction.
+        Returns how many rounds the live snapshot is behind.
+        """
+        with self._cond:
+            behind = self._target_rows - self._published_rows
+            if behind > self.max_staleness and not self._closed and self.error is None:
+                self.blocking_waits += 1
+                while (
+                    self._target_rows - self._published_rows > self.max_staleness
+                    and not self._closed
+                    and self.error is None
+                ):
+                    self._cond.wait()
+                behind = self._target_rows - self._published_rows
+
+            self.predictions += 1
+            if behind > 0:
+                self.stale_predictions += 1
+                self.total_staleness += behind
+                self.max_observed_staleness = max(self.max_observed_staleness, behind)
+            return behind
+
+    def close(self, timeout: float = None):
+        """Stop the worker. An in-flight fit is allowed to finish."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "fits_completed": self.fits_completed,
+                "predictions": self.predictions,
+                "stale_predictions": self.stale_predictions,
+                "mean_staleness": self.total_staleness / max(1, self.predictions),
+                "max_staleness": self.max_observed_staleness,
+                "blocking_waits": self.blocking_waits,
+                "rounds_behind": self._target_rows - self._published_rows,
+                "failed": self.error is not None,
+            }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._target_rows <= self._published_rows:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                n_rows = self._target_rows
+
+            try:
+                snapshot = self.ai.fit_snapshot(n_rows)
+                with self._cond:
+                    self.ai.publish_snapshot(snapshot)
+                    self._published_rows = n_rows
+                    self.fits_completed += 1
+                    self._cond.notify_all()
+            except Exception as exc:
+                # Release any waiting predictions; they use the last snapshot
+                with self._cond:
+                    self.error = exc
+                    self._cond.notify_all()
+                return
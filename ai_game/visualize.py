@@ -6,7 +6,7 @@ Uses the non-interactive 'Agg' backend so it works in headless environments.
 
 import csv
 import os
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 LOGS_DIR = os.path.join(os.path.dirname(__file__), "..", "logs")
 OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs")
@@ -17,133 +17,273 @@ OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), "..", "outputs")
 # ---------------------------------------------------------------------------
 
 
+# Global-log columns the per-match plots need
+_PLOT_COLUMNS = ["round_num", "player_damage", "ai_damage", "match_id"]
+
+
 def _load_match_csv(match_id: str) -> Optional[List[dict]]:
+    """
+    Rows of one match: from the round store if it has it, else
+    match_<id>.csv, else the match's rows of the global log.
+    """
+    from .round_store import RoundStore
+
+    try:
+        rows = RoundStore().match_rows(match_id)
+    except (OSError, ValueError):
+        rows = None
+    if rows:
+        return rows
     path = os.path.join(LOGS_DIR, f"match_{match_id}.csv")
-    if not os.path.exists(path):
+    if os.path.exists(path):
+        with open(path) as fh:
+            return list(csv.DictReader(fh))
+    return _match_rows_from_log(match_id)
+
+
+def _match_rows_from_log(match_id: str) -> Optional[List[dict]]:
+    """One match's rows of game_logs.csv; repeat calls parse only newly appended rows."""
+    from . import history_reader
+
+    try:
+        arrays = history_reader.shared(columns=_PLOT_COLUMNS).refresh()
+    except (OSError, KeyError, ValueError):
+        return None
+    mask = arrays["match_id"] == match_id
+    if not mask.any():
         return None
-    with open(path) as fh:
-        return list(csv.DictReader(fh))
+    columns = {c: arrays[c][mask] for c in _PLOT_COLUMNS}
+    return [
+        {c: columns[c][i] for c in _PLOT_COLUMNS}
+        for i in range(int(mask.sum()))
+    ]
 
 
 def _ensure_outputs():
     os.makedirs(OUTPUTS_DIR, exist_ok=True)
 
 
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
+def _match_columns(data) -> Tuple[List[int], List[int], List[int]]:
+    """Round numbers, player damage and AI damage of row dicts or RoundRecords."""
+    if data and not isinstance(data[0], dict):
+        data = [vars(r) for r in data]
+    return (
+        [int(r["round_num"]) for r in data],
+        [int(r["player_damage"]) for r in data],
+        [int(r["ai_damage"]) for r in data],
+    )
 
 
-def plot_damage_per_round(match_id: str) -> Optional[str]:
-    """
-    Bar chart of player and AI damage per round.
-    Saves to outputs/damage_per_round_<match_id>.png.
-    Returns the save path, or None if no data found.
-    """
+def _draw_damage_per_round(ax, match_id, rounds, player_dmg, ai_dmg, title=True):
+    ax.bar([r - 0.2 for r in rounds], player_dmg, 0.4, label="Player", color="steelblue")
+    ax.bar([r + 0.2 for r in rounds], ai_dmg, 0.4, label="AI", color="tomato")
+    ax.set_xlabel("Round")
+    ax.set_ylabel("Damage")
+    ax.set_title(f"Damage Per Round — Match {match_id}" if title else "Damage Per Round")
+    ax.legend()
+
+
+def _draw_cumulative_damage(ax, match_id, rounds, player_dmg, ai_dmg, title=True):
+    cum_player, cum_ai = [], []
+    p_sum = a_sum = 0
+    for p, a in zip(player_dmg, ai_dmg):
+        p_sum += p
+        a_sum += a
+        cum_player.append(p_sum)
+        cum_ai.append(a_sum)
+
+    ax.plot(rounds, cum_player, marker="o", label="Player Cumulative", color="steelblue")
+    ax.plot(rounds, cum_ai, marker="s", label="AI Cumulative", color="tomato")
+    ax.set_xlabel("Round")
+    ax.set_ylabel("Cumulative Damage")
+    ax.set_title(f"Cumulative Damage — Match {match_id}" if title else "Cumulative Damage")
+    ax.legend()
+
+
+_MATCH_CHARTS = {
+    "damage_per_round": _draw_damage_per_round,
+    "cumulative_damage": _draw_cumulative_damage,
+}
+
+
+def _save_match_chart(kind: str, match_id: str, rows) -> Optional[str]:
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
 
-    data = _load_match_csv(match_id)
+    data = rows if rows is not None else _load_match_csv(match_id)
     if not data:
         return None
     _ensure_outputs()
 
-    rounds = [int(r["round_num"]) for r in data]
-    player_dmg = [int(r["player_damage"]) for r in data]
-    ai_dmg = [int(r["ai_damage"]) for r in data]
-
     fig, ax = plt.subplots(figsize=(10, 5))
-    ax.bar([r - 0.2 for r in rounds], player_dmg, 0.4, label="Player", color="steelblue")
-    ax.bar([r + 0.2 for r in rounds], ai_dmg, 0.4, label="AI", color="tomato")
-    ax.set_xlabel("Round")
-    ax.set_ylabel("Damage")
-    ax.set_title(f"Damage Per Round — Match {match_id}")
-    ax.legend()
+    _MATCH_CHARTS[kind](ax, match_id, *_match_columns(data))
     plt.tight_layout()
 
-    path = os.path.join(OUTPUTS_DIR, f"damage_per_round_{match_id}.png")
+    path = os.path.join(OUTPUTS_DIR, f"{kind}_{match_id}.png")
     fig.savefig(path, dpi=120)
     plt.close(fig)
     return path
 
 
-def plot_cumulative_damage(match_id: str) -> Optional[str]:
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def plot_damage_per_round(match_id: str, rows: Optional[list] = None) -> Optional[str]:
+    """
+    Bar chart of player and AI damage per round.
+    Saves to outputs/damage_per_round_<match_id>.png.
+    `rows` (dicts with round_num, player_damage, ai_damage, or the
+    MatchTracker's RoundRecords) skips reading the logs.
+    Returns the save path, or None if no data found.
+    """
+    return _save_match_chart("damage_per_round", match_id, rows)
+
+
+def plot_cumulative_damage(match_id: str, rows: Optional[list] = None) -> Optional[str]:
     """
     Line chart of cumulative damage over rounds.
     Saves to outputs/cumulative_damage_<match_id>.png.
+    `rows` as for plot_damage_per_round.
     Returns the save path, or None if no data found.
     """
+    return _save_match_chart("cumulative_damage", match_id, rows)
+
+
+def render_match_chart(
+    kind: str,
+    match_id: str,
+    rows: list,
+    size: Tuple[int, int] = (470, 300),
+    dpi: int = 100,
+) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Draw a per-match chart ("damage_per_round" or "cumulative_damage") on
+    a dark background into an in-memory Agg buffer; nothing is written to
+    disk. Returns (RGBA bytes, (width, height)), ready for
+    pygame.image.frombuffer(data, size, "RGBA").
+    """
+    import matplotlib.style
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    with matplotlib.style.context(["dark_background", {"font.size": 8}]):
+        fig = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi, facecolor=(0.04, 0.04, 0.04))
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        ax.set_facecolor((0.04, 0.04, 0.04))
+        _MATCH_CHARTS[kind](ax, match_id, *_match_columns(rows), title=False)
+        fig.tight_layout()
+        canvas.draw()
+    return bytes(canvas.buffer_rgba()), canvas.get_width_height()
+
+
+def plot_rl_rewards(
+    episode_rewards: Optional[List[float]] = None,
+    log_path: Optional[str] = None,
+    max_points: int = 2000,
+    window: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Plot RL training episode rewards with a moving-average trend line.
+    Reads `episode_rewards` or, if not given, a reward log file (default
+    outputs/rl_rewards.bin, see reward_log.py). Long runs are reduced to
+    `max_points` buckets drawn as a min/max envelope plus the bucket mean,
+    so drawing cost does not grow with the episode count.
+    Saves to outputs/rl_training_rewards.png.
+    Returns the save path, or None if there are no rewards.
+    """
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
 
-    data = _load_match_csv(match_id)
-    if not data:
+    from .reward_log import REWARD_LOG, summarize, summarize_values
+
+    if episode_rewards is not None:
+        s = summarize_values(episode_rewards, max_points, window)
+    else:
+        s = summarize(log_path or REWARD_LOG, max_points, window)
+    if not len(s["episode"]):
         return None
     _ensure_outputs()
 
-    rounds = [int(r["round_num"]) for r in data]
-    cum_player, cum_ai = [], []
-    p_sum = a_sum = 0
-    for r in data:
-        p_sum += int(r["player_damage"])
-        a_sum += int(r["ai_damage"])
-        cum_player.append(p_sum)
-        cum_ai.append(a_sum)
-
     fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(rounds, cum_player, marker="o", label="Player Cumulative", color="steelblue")
-    ax.plot(rounds, cum_ai, marker="s", label="AI Cumulative", color="tomato")
-    ax.set_xlabel("Round")
-    ax.set_ylabel("Cumulative Damage")
-    ax.set_title(f"Cumulative Damage — Match {match_id}")
+    if s["bucket"] == 1:
+        ax.plot(s["episode"], s["mean"], alpha=0.3, color="steelblue", label="Episode reward")
+    else:
+        ax.fill_between(s["episode"], s["min"], s["max"], step="pre", alpha=0.15, color="steelblue",
+                        linewidth=0, label=f"Min / max per {s['bucket']} episodes")
+        ax.plot(s["episode"], s["mean"], alpha=0.5, color="steelblue", linewidth=1,
+                drawstyle="steps-pre", label=f"Mean per {s['bucket']} episodes")
+    ax.plot(
+        s["episode"],
+        s["moving_avg"],
+        color="tomato",
+        linewidth=2,
+        label=f"Moving avg (window={s['window']})",
+    )
+    ax.set_xlabel("Episode")
+    ax.set_ylabel("Total Reward")
+    ax.set_title(f"RL Training — Episode Rewards ({int(s['episode'][-1]):,} episodes)")
     ax.legend()
     plt.tight_layout()
 
-    path = os.path.join(OUTPUTS_DIR, f"cumulative_damage_{match_id}.png")
+    path = os.path.join(OUTPUTS_DIR, "rl_training_rewards.png")
     fig.savefig(path, dpi=120)
     plt.close(fig)
     return path
 
 
-def plot_rl_rewards(episode_rewards: List[float]) -> Optional[str]:
+def plot_profile_trends(name: str, window: int = 10) -> Optional[str]:
     """
-    Plot RL training episode rewards with a moving-average trend line.
-    Saves to outputs/rl_training_rewards.png.
-    Returns the save path.
+    Rolling win rate, move mix and damage per match for one profile, from
+    its match history (profile_history.py) rather than the round logs.
+    Saves to outputs/profile_trends_<name>.png.
+    Returns the save path, or None if the profile has no history.
     """
     import matplotlib
     matplotlib.use("Agg")
     import matplotlib.pyplot as plt
     import numpy as np
 
-    if not episode_rewards:
+    from .profile_history import load, move_mix, move_mix_drift, rolling_win_rate
+
+    recs = load(name)
+    if not len(recs):
         return None
     _ensure_outputs()
 
-    episodes = list(range(1, len(episode_rewards) + 1))
-    window = min(50, len(episode_rewards))
-    moving_avg = np.convolve(
-        episode_rewards, np.ones(window) / window, mode="valid"
-    )
+    games = np.arange(1, len(recs) + 1)
+    mix = move_mix(recs, window)
+    drift = move_mix_drift(recs, window)
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(episodes, episode_rewards, alpha=0.3, color="steelblue", label="Episode reward")
-    ax.plot(
-        list(range(window, len(episode_rewards) + 1)),
-        moving_avg,
-        color="tomato",
-        linewidth=2,
-        label=f"Moving avg (window={window})",
-    )
-    ax.set_xlabel("Episode")
-    ax.set_ylabel("Total Reward")
-    ax.set_title("RL Training — Episode Rewards")
-    ax.legend()
+    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 9), sharex=True)
+    ax1.plot(games, rolling_win_rate(recs, window), color="steelblue",
+             label=f"Win rate (last {window})")
+    ax1.axhline(recs["won"].mean(), color="grey", linestyle="--", label="Overall")
+    ax1.set_ylim(0, 1)
+    ax1.set_ylabel("Win rate")
+    ax1.legend(loc="lower left")
+
+    ax2.stackplot(games, mix.T, labels=["Attack", "Special", "Regen"],
+                  colors=["tomato", "mediumpurple", "seagreen"], alpha=0.8)
+    ax2.plot(games, drift, color="black", linewidth=1, label="Drift")
+    ax2.set_ylim(0, 1)
+    ax2.set_ylabel(f"Move mix (last {window})")
+    ax2.legend(loc="upper left", fontsize=8)
+
+    ax3.plot(games, recs["damage_dealt"], marker=".", color="steelblue", label="Dealt")
+    ax3.plot(games, recs["damage_taken"], marker=".", color="tomato", label="Taken")
+    ax3.set_xlabel("Match")
+    ax3.set_ylabel("Damage")
+    ax3.legend(loc="upper left")
+
+    fig.suptitle(f"Profile Trends — {name}")
     plt.tight_layout()
 
-    path = os.path.join(OUTPUTS_DIR, "rl_training_rewards.png")
+    path = os.path.join(OUTPUTS_DIR, f"profile_trends_{name}.png")
     fig.savefig(path, dpi=120)
     plt.close(fig)
     return path
@@ -0,0 +1,59 @@
+"""Per-round training cost of AdaptiveAIOpponent vs. history size.
+
+Usage:
+    python benchmarks/bench_online_training.py [--sizes 100 1000 10000] [--rounds 20]
+
+For each history size the opponent is warm-started with that many synthetic
+rounds, then `update_and_train` + `predict_move` are timed for a few rounds.
+The full-refit path grows linearly with history; the incremental path should
+stay flat.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_game.ai_opponent import AdaptiveAIOpponent  # noqa: E402
+
+
+def _per_round_ms(incremental: bool, history: int, rounds: int) -> float:
+    rng = random.Random(0)
+    ai = AdaptiveAIOpponent("AI", incremental=incremental)
+    ai._train_X = [[rng.randint(1, 3)] for _ in range(history)]
+    ai._train_y = [rng.randint(1, 3) for _ in range(history)]
+    if incremental:
+        ai._rebuild_counts()
+    else:
+        ai._fit_models()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        player_move = rng.randint(1, 3)
+        ai_move, _ = ai.predict_move(player_move)
+        ai.update_and_train(player_move, ai_move)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--skip-full", action="store_true", help="Only time incremental mode")
+    args = parser.parse_args()
+
+    import warnings
+    warnings.filterwarnings("ignore")
+
+    print(f"{'history':>10}  {'full refit (ms/round)':>22}  {'incremental (ms/round)':>24}")
+    for size in args.sizes:
+        full = "-" if args.skip_full else f"{_per_round_ms(False, size, args.rounds):.3f}"
+        inc = _per_round_ms(True, size, args.rounds)
+        print(f"{size:>10}  {full:>22}  {inc:>24.3f}")
+
+
+if __name__ == "__main__":
+    main()
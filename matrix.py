@@ -1,3 +1,5 @@
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -5,20 +7,27 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import confusion_matrix, ConfusionMatrixDisplay, classification_report
 
+from ai_game.history_reader import HistoryCache
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LOG_FILE = os.path.join(ROOT, "logs", "game_logs.csv")
+CACHE_FILE = os.path.join(ROOT, "outputs", "matrix_history.npz")
+COLUMNS = ["player_move", "ai_move", "ai_damage", "ai_mp_after", "player_damage", "player_mp_after"]
 
-df = pd.read_csv(r"C:\Users\Vikra\OneDrive\Desktop\ai_game\logs\game_logs.csv")
+# Only rows appended to the log since the last run are parsed
+df = pd.DataFrame(HistoryCache(LOG_FILE, COLUMNS, cache_file=CACHE_FILE).refresh())
 
 
 
-print("PlayerMove counts:\n", df['PlayerMove'].value_counts())
-print("AIMove counts:\n", df['AIMove'].value_counts())
+print("PlayerMove counts:\n", df['player_move'].value_counts())
+print("AIMove counts:\n", df['ai_move'].value_counts())
 
 
 print("\n=== MODEL TRAINING: Predicting PlayerMove from Game Stats ===")
 
 
-features = ['AIMove', 'AIDamage', 'AIMPUsed', 'PlayerDamage', 'PlayerMPUsed']
-target = 'PlayerMove'
+features = ['ai_move', 'ai_damage', 'ai_mp_after', 'player_damage', 'player_mp_after']
+target = 'player_move'
 
 X = df[features]
 y = df[target]
@@ -46,8 +55,8 @@ print(classification_report(y_test, y_pred, labels=[1, 2, 3]))
 
 print("\n=== GAME ANALYSIS: Comparing AI's Moves to Player's Actual Moves ===")
 
-y_true_game = df['PlayerMove']
-y_pred_game = df['AIMove']
+y_true_game = df['player_move']
+y_pred_game = df['ai_move']
 
 # Confusion Matrix
 cm_game = confusion_matrix(y_true_game, y_pred_game, labels=[1, 2, 3])